@@ -0,0 +1,98 @@
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, List
+
+import aioredis
+import pytest
+from async_asgi_testclient import TestClient
+from starlette.status import HTTP_202_ACCEPTED
+
+from currency_converter_service.currency import Currency
+from currency_converter_service.main import app
+from tests.conftest import REDIS_TEST_SERVER_URI, docker, redis_server  # noqa: F401
+
+BASE_CURRENCIES_COUNT = 30
+
+
+@pytest.fixture
+def database(event_loop: asyncio.AbstractEventLoop):
+    connection = event_loop.run_until_complete(
+        aioredis.create_redis(REDIS_TEST_SERVER_URI, encoding="UTF-8")
+    )
+
+    yield connection
+
+    async def close() -> None:
+        await connection.flushdb()
+        connection.close()
+        await connection.wait_closed()
+
+    event_loop.run_until_complete(close())
+
+
+@pytest.fixture
+def client(event_loop: asyncio.AbstractEventLoop, database: aioredis.Redis):
+    test_client = TestClient(app)
+    event_loop.run_until_complete(test_client.__aenter__())
+
+    yield test_client
+    event_loop.run_until_complete(test_client.__aexit__(None, None, None))
+
+
+@pytest.fixture
+def market_exchange_rates() -> Dict[str, Any]:
+    """Load request with every quote currency for a number of base currencies."""
+    currencies = list(Currency)
+
+    return {
+        "currency_exchange_rates": [
+            {
+                "base": base_currency.value,
+                "quotes": {
+                    quote_currency.value: {
+                        "rate": f"{index + 1}.{quote_index:04d}",
+                        "last_updated": 1584989828,
+                    }
+                    for quote_index, quote_currency in enumerate(currencies)
+                    if quote_currency != base_currency
+                },
+            }
+            for index, base_currency in enumerate(currencies[:BASE_CURRENCIES_COUNT])
+        ]
+    }
+
+
+@pytest.fixture
+def run(event_loop: asyncio.AbstractEventLoop) -> Callable[[Awaitable], Any]:
+    return event_loop.run_until_complete
+
+
+async def load_exchange_rates(
+    client: TestClient, exchange_rates: Dict[str, Any], merge: bool
+) -> Dict[str, Any]:
+    """Queue exchange rates load and wait until its job is done."""
+    response = await client.post(
+        "/database", query_string={"merge": str(int(merge))}, json=exchange_rates
+    )
+    assert response.status_code == HTTP_202_ACCEPTED
+
+    job = response.json()
+    while job["status"] in ("QUEUED", "RUNNING"):
+        await asyncio.sleep(0.001)
+        job = (await client.get(f"/database/jobs/{job['job_id']}")).json()
+
+    return job
+
+
+def record_latency_percentiles(benchmark, requests_per_round: int = 1) -> None:
+    """Save p50/p99 round timings and throughput along with benchmark results."""
+    if benchmark.disabled or not benchmark.stats:
+        return
+
+    timings: List[float] = sorted(benchmark.stats.stats.data)
+    for name, fraction in (("p50", 0.5), ("p99", 0.99)):
+        benchmark.extra_info[name] = timings[
+            min(len(timings) - 1, int(len(timings) * fraction))
+        ]
+    benchmark.extra_info["requests_per_second"] = requests_per_round / (
+        benchmark.stats.stats.mean
+    )
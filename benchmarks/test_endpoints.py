@@ -0,0 +1,304 @@
+import asyncio
+import json
+from itertools import cycle
+from time import perf_counter
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+import pytest
+from async_asgi_testclient import TestClient
+from starlette.status import (
+    HTTP_200_OK,
+    HTTP_201_CREATED,
+    HTTP_304_NOT_MODIFIED,
+    HTTP_429_TOO_MANY_REQUESTS,
+    HTTP_503_SERVICE_UNAVAILABLE,
+)
+
+from benchmarks.conftest import load_exchange_rates, record_latency_percentiles
+from currency_converter_service import main
+from currency_converter_service.admission import AdmissionLimiter
+from currency_converter_service.currency import Currency
+
+ROUNDS = 200
+WARMUP_ROUNDS = 10
+CONCURRENT_REQUESTS = 64
+OVERLOAD_REQUESTS = 512
+CSV_ROWS_COUNT = 100000
+
+CONVERT_QUERY = {
+    "from_currency": list(Currency)[0].value,
+    "to_currency": list(Currency)[1].value,
+    "amount": "65",
+}
+
+
+@pytest.fixture
+def loaded_client(
+    client: TestClient,
+    run: Callable[[Awaitable], Any],
+    market_exchange_rates: Dict[str, Any],
+) -> TestClient:
+    job = run(load_exchange_rates(client, market_exchange_rates, merge=False))
+    assert job["status"] == "SUCCESS"
+
+    return client
+
+
+def test_convert_latency(
+    benchmark, loaded_client: TestClient, run: Callable[[Awaitable], Any]
+) -> None:
+    response = benchmark.pedantic(
+        lambda: run(loaded_client.get("/convert", query_string=CONVERT_QUERY)),
+        rounds=ROUNDS,
+        warmup_rounds=WARMUP_ROUNDS,
+    )
+
+    assert response.status_code == HTTP_200_OK
+    record_latency_percentiles(benchmark)
+
+
+def test_convert_not_modified_latency(
+    benchmark, loaded_client: TestClient, run: Callable[[Awaitable], Any]
+) -> None:
+    """``/convert`` revalidated by ``If-None-Match``, answered without rates."""
+    response = run(loaded_client.get("/convert", query_string=CONVERT_QUERY))
+    headers = {"If-None-Match": response.headers["ETag"]}
+
+    response = benchmark.pedantic(
+        lambda: run(
+            loaded_client.get("/convert", query_string=CONVERT_QUERY, headers=headers)
+        ),
+        rounds=ROUNDS,
+        warmup_rounds=WARMUP_ROUNDS,
+    )
+
+    assert response.status_code == HTTP_304_NOT_MODIFIED
+    record_latency_percentiles(benchmark)
+
+
+def test_convert_throughput(
+    benchmark, loaded_client: TestClient, run: Callable[[Awaitable], Any]
+) -> None:
+    async def convert_concurrently() -> list:
+        return await asyncio.gather(
+            *(
+                loaded_client.get("/convert", query_string=CONVERT_QUERY)
+                for _ in range(CONCURRENT_REQUESTS)
+            )
+        )
+
+    responses = benchmark.pedantic(
+        lambda: run(convert_concurrently()), rounds=ROUNDS // 10, warmup_rounds=1,
+    )
+
+    assert all(response.status_code == HTTP_200_OK for response in responses)
+    record_latency_percentiles(benchmark, requests_per_round=CONCURRENT_REQUESTS)
+
+
+def test_batch_convert_latency(
+    benchmark,
+    loaded_client: TestClient,
+    run: Callable[[Awaitable], Any],
+    market_exchange_rates: Dict[str, Any],
+) -> None:
+    conversions = [
+        {"from_currency": base, "to_currency": quote, "amount": "65"}
+        for base, quote in (
+            (exchange_rates["base"], quote)
+            for exchange_rates in market_exchange_rates["currency_exchange_rates"]
+            for quote in exchange_rates["quotes"]
+        )
+    ][:1000]
+
+    response = benchmark.pedantic(
+        lambda: run(
+            loaded_client.post("/convert/batch", json={"conversions": conversions})
+        ),
+        rounds=ROUNDS // 10,
+        warmup_rounds=1,
+    )
+
+    assert response.status_code == HTTP_200_OK
+    record_latency_percentiles(benchmark)
+
+
+@pytest.mark.parametrize("quotes_count", [20, None])
+def test_convert_quotes_latency(
+    benchmark,
+    loaded_client: TestClient,
+    run: Callable[[Awaitable], Any],
+    quotes_count: Optional[int],
+) -> None:
+    """Convert to many quotes in one request, instead of one request per quote."""
+    query_string = [
+        ("from_currency", CONVERT_QUERY["from_currency"]),
+        ("amount", CONVERT_QUERY["amount"]),
+    ]
+    if quotes_count is not None:
+        query_string += [
+            ("to_currency", currency.value)
+            for currency in list(Currency)[1:][:quotes_count]
+        ]
+
+    response = benchmark.pedantic(
+        lambda: run(loaded_client.get("/convert/quotes", query_string=query_string)),
+        rounds=ROUNDS,
+        warmup_rounds=WARMUP_ROUNDS,
+    )
+
+    assert response.status_code == HTTP_200_OK
+    record_latency_percentiles(benchmark)
+
+
+@pytest.mark.parametrize("merge", [True, False])
+def test_load_latency(
+    benchmark,
+    client: TestClient,
+    run: Callable[[Awaitable], Any],
+    market_exchange_rates: Dict[str, Any],
+    merge: bool,
+) -> None:
+    """Time from queueing a load to its job being done."""
+    job = benchmark.pedantic(
+        lambda: run(load_exchange_rates(client, market_exchange_rates, merge)),
+        rounds=ROUNDS // 10,
+        warmup_rounds=1,
+    )
+
+    assert job["status"] == "SUCCESS"
+    record_latency_percentiles(benchmark)
+
+
+def test_convert_latency_during_loads(
+    benchmark,
+    loaded_client: TestClient,
+    run: Callable[[Awaitable], Any],
+    market_exchange_rates: Dict[str, Any],
+) -> None:
+    """``/convert`` latency while large loads are applied in the background."""
+
+    async def load_continuously() -> None:
+        while True:
+            await load_exchange_rates(loaded_client, market_exchange_rates, merge=True)
+
+    loader = asyncio.ensure_future(load_continuously())
+    try:
+        response = benchmark.pedantic(
+            lambda: run(loaded_client.get("/convert", query_string=CONVERT_QUERY)),
+            rounds=ROUNDS,
+            warmup_rounds=WARMUP_ROUNDS,
+        )
+    finally:
+        loader.cancel()
+        run(asyncio.gather(loader, return_exceptions=True))
+
+    assert response.status_code == HTTP_200_OK
+    record_latency_percentiles(benchmark)
+
+
+def test_convert_latency_under_overload(
+    benchmark,
+    loaded_client: TestClient,
+    run: Callable[[Awaitable], Any],
+    market_exchange_rates: Dict[str, Any],
+    monkeypatch,
+) -> None:
+    """Latency of admitted ``/convert`` requests in bursts past admission limits.
+
+    Loads are applied meanwhile. Requests beyond limits are rejected early
+    instead of queueing, so admitted ones keep bounded latency.
+    """
+    monkeypatch.setitem(
+        main.admission_limiters,
+        "/convert",
+        AdmissionLimiter(CONCURRENT_REQUESTS, CONCURRENT_REQUESTS, max_wait=0.5),
+    )
+    latencies: List[float] = []
+    rejected = 0
+
+    async def timed_convert() -> Tuple[int, float]:
+        started_at = perf_counter()
+        response = await loaded_client.get("/convert", query_string=CONVERT_QUERY)
+        return response.status_code, perf_counter() - started_at
+
+    async def convert_in_burst() -> None:
+        nonlocal rejected
+        for status_code, latency in await asyncio.gather(
+            *(timed_convert() for _ in range(OVERLOAD_REQUESTS))
+        ):
+            if status_code == HTTP_200_OK:
+                latencies.append(latency)
+            else:
+                assert status_code in (
+                    HTTP_429_TOO_MANY_REQUESTS,
+                    HTTP_503_SERVICE_UNAVAILABLE,
+                )
+                rejected += 1
+
+    async def load_continuously() -> None:
+        while True:
+            await load_exchange_rates(loaded_client, market_exchange_rates, merge=True)
+
+    loader = asyncio.ensure_future(load_continuously())
+    try:
+        benchmark.pedantic(
+            lambda: run(convert_in_burst()), rounds=ROUNDS // 20, warmup_rounds=1
+        )
+    finally:
+        loader.cancel()
+        run(asyncio.gather(loader, return_exceptions=True))
+
+    assert latencies
+    latencies.sort()
+    benchmark.extra_info["admitted_p50"] = latencies[len(latencies) // 2]
+    benchmark.extra_info["admitted_p99"] = latencies[int(len(latencies) * 0.99)]
+    benchmark.extra_info["rejected_share"] = rejected / (rejected + len(latencies))
+
+
+def test_stream_load_latency(
+    benchmark,
+    client: TestClient,
+    run: Callable[[Awaitable], Any],
+    market_exchange_rates: Dict[str, Any],
+) -> None:
+    body = "\n".join(
+        json.dumps(exchange_rates)
+        for exchange_rates in market_exchange_rates["currency_exchange_rates"]
+    ).encode()
+
+    response = benchmark.pedantic(
+        lambda: run(
+            client.post("/database/stream", query_string={"merge": "0"}, data=body)
+        ),
+        rounds=ROUNDS // 10,
+        warmup_rounds=1,
+    )
+
+    assert response.status_code == HTTP_201_CREATED
+    record_latency_percentiles(benchmark)
+
+
+def test_convert_csv_throughput(
+    benchmark,
+    loaded_client: TestClient,
+    run: Callable[[Awaitable], Any],
+    market_exchange_rates: Dict[str, Any],
+) -> None:
+    pairs = [
+        (exchange_rates["base"], quote)
+        for exchange_rates in market_exchange_rates["currency_exchange_rates"]
+        for quote in exchange_rates["quotes"]
+    ]
+    body = "\n".join(
+        f"{index + 1}.25,{base},{quote}"
+        for index, (base, quote) in zip(range(CSV_ROWS_COUNT), cycle(pairs))
+    ).encode()
+
+    response = benchmark.pedantic(
+        lambda: run(loaded_client.post("/convert/csv", data=body)),
+        rounds=5,
+        warmup_rounds=1,
+    )
+
+    assert response.status_code == HTTP_200_OK
+    record_latency_percentiles(benchmark, requests_per_round=CSV_ROWS_COUNT)
@@ -0,0 +1,160 @@
+import io
+from decimal import Decimal
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict
+
+import pytest
+
+from currency_converter_service.cross_rates import derive_cross_rates
+from currency_converter_service.csv_conversion import convert_csv
+from currency_converter_service.currency import Currency, validate_currency
+from currency_converter_service.currency_converter import (
+    calculate_conversion,
+    calculate_fixed_point_conversion,
+)
+from currency_converter_service.dependencies import SharedRatesTable, preprocess
+from currency_converter_service.dependencies.rates_encoding import (
+    StorageFormat,
+    decode_exchange_rates,
+    encode_exchange_rate,
+)
+from currency_converter_service.models import (
+    CurrencyExchangeRatesLoadRequest,
+    ExchangeRate,
+)
+from currency_converter_service.rate_matrix import RateMatrix
+
+CSV_ROWS_COUNT = 100000
+
+
+def test_calculate_conversion(benchmark) -> None:
+    benchmark(calculate_conversion, Decimal("65.37"), Decimal("79.7112"))
+
+
+def test_calculate_quantized_conversion(benchmark) -> None:
+    benchmark(calculate_conversion, Decimal("65.37"), Decimal("79.7112"), 2)
+
+
+def test_calculate_fixed_point_conversion(benchmark) -> None:
+    benchmark(calculate_fixed_point_conversion, Decimal("65.37"), Decimal("79.7112"), 2)
+
+
+def test_validate_currency(benchmark) -> None:
+    benchmark(validate_currency, "ZWL")
+
+
+def test_parse_load_request(benchmark, market_exchange_rates: Dict[str, Any]) -> None:
+    benchmark(CurrencyExchangeRatesLoadRequest.parse_obj, market_exchange_rates)
+
+
+@pytest.mark.parametrize("storage_format", list(StorageFormat))
+def test_preprocess(
+    benchmark, market_exchange_rates: Dict[str, Any], storage_format: StorageFormat
+) -> None:
+    load_request = CurrencyExchangeRatesLoadRequest.parse_obj(market_exchange_rates)
+
+    benchmark(lambda: list(preprocess(load_request, storage_format)))
+
+
+@pytest.mark.parametrize("storage_format", list(StorageFormat))
+def test_decode_exchange_rates(benchmark, storage_format: StorageFormat) -> None:
+    serialized_rates = {
+        quote_currency.value: encode_exchange_rate(
+            ExchangeRate(rate="79.7112", last_updated=1584989828), storage_format
+        )
+        for quote_currency in Currency
+    }
+
+    benchmark(decode_exchange_rates, serialized_rates)
+
+
+def test_derive_cross_rates(benchmark) -> None:
+    exchange_rates = {
+        Currency.EUR: {
+            quote_currency: ExchangeRate(rate="1.2345", last_updated=1584989828)
+            for quote_currency in Currency
+            if quote_currency != Currency.EUR
+        },
+        **{
+            base_currency: {
+                Currency.EUR: ExchangeRate(rate="0.81", last_updated=1584989828)
+            }
+            for base_currency in Currency
+            if base_currency != Currency.EUR
+        },
+    }
+
+    benchmark(derive_cross_rates, exchange_rates, 3)
+
+
+def test_rate_matrix_convert(benchmark) -> None:
+    pytest.importorskip("numpy")
+
+    currencies = list(Currency)
+    rate_matrix = RateMatrix.from_exchange_rates(
+        {
+            base_currency: {
+                quote_currency: ExchangeRate(rate="1.2345", last_updated=1584989828)
+                for quote_currency in currencies
+            }
+            for base_currency in currencies
+        }
+    )
+    currency_pairs = [
+        (currencies[index % len(currencies)], currencies[index * 7 % len(currencies)])
+        for index in range(1000)
+    ]
+    amounts = [Decimal(index + 1) for index in range(1000)]
+
+    benchmark(rate_matrix.convert, amounts, currency_pairs)
+
+
+def test_convert_csv(benchmark, run: Callable[[Awaitable], Any]) -> None:
+    currencies = list(Currency)
+    exchange_rate = ExchangeRate(rate="79.7112", last_updated=1584989828)
+    lines = [
+        f"{index + 1}.25,{currencies[index % 30].value},"
+        f"{currencies[index % 30 + 1].value}".encode()
+        for index in range(CSV_ROWS_COUNT)
+    ]
+
+    async def convert() -> int:
+        async def iter_lines() -> AsyncIterator[bytes]:
+            for line in lines:
+                yield line
+
+        return await convert_csv(
+            iter_lines(), lambda base, quote: exchange_rate, io.BytesIO(), 10000
+        )
+
+    rows_count = benchmark.pedantic(lambda: run(convert()), rounds=5, warmup_rounds=1)
+
+    assert rows_count == CSV_ROWS_COUNT
+    if benchmark.stats:
+        benchmark.extra_info["rows_per_second"] = (
+            CSV_ROWS_COUNT / benchmark.stats.stats.mean
+        )
+
+
+@pytest.mark.parametrize("operation", ["publish", "exchange_rate", "exchange_rates"])
+def test_shared_rates_table(benchmark, tmp_path, operation: str) -> None:
+    exchange_rates = {
+        base_currency: {
+            quote_currency: ExchangeRate(rate="1.2345", last_updated=1584989828)
+            for quote_currency in Currency
+            if quote_currency != base_currency
+        }
+        for base_currency in Currency
+    }
+    writer = SharedRatesTable.create(str(tmp_path / "rates"))
+    writer.publish("generation", exchange_rates)
+    reader = SharedRatesTable(str(tmp_path / "rates"), max_age=60)
+
+    if operation == "publish":
+        benchmark(writer.publish, "generation", exchange_rates)
+    elif operation == "exchange_rate":
+        benchmark(reader.exchange_rate, Currency.USD, Currency.EUR)
+    else:
+        benchmark(reader.exchange_rates, [Currency.USD])
+
+    writer.close()
+    reader.close()
@@ -0,0 +1,86 @@
+import os
+import subprocess
+import sys
+from time import perf_counter
+from typing import Any, Awaitable, Callable, Dict
+
+import aioredis
+import pytest
+from async_asgi_testclient import TestClient
+from starlette.status import HTTP_200_OK
+
+from benchmarks.conftest import load_exchange_rates
+from benchmarks.test_endpoints import CONVERT_QUERY
+from currency_converter_service import main
+
+ROUNDS = 10
+
+IMPORT_APP = (
+    "from time import perf_counter\n"
+    "started_at = perf_counter()\n"
+    "import currency_converter_service.main\n"
+    "print(perf_counter() - started_at)\n"
+)
+
+
+@pytest.mark.parametrize("docs_enabled", [True, False])
+def test_app_import(benchmark, docs_enabled: bool) -> None:
+    """Import app in a fresh interpreter, as a worker does on cold start."""
+    environment = dict(os.environ, DOCS_ENABLED=str(docs_enabled))
+
+    def import_app() -> float:
+        output = subprocess.run(
+            [sys.executable, "-c", IMPORT_APP],
+            env=environment,
+            check=True,
+            stdout=subprocess.PIPE,
+        ).stdout
+        return float(output)
+
+    import_time = benchmark.pedantic(import_app, rounds=ROUNDS, warmup_rounds=1)
+
+    benchmark.extra_info["import_seconds"] = import_time
+
+
+@pytest.mark.parametrize("warmup_enabled", [True, False])
+def test_cold_start_to_first_convert(
+    benchmark,
+    database: aioredis.Redis,
+    run: Callable[[Awaitable], Any],
+    market_exchange_rates: Dict[str, Any],
+    monkeypatch,
+    warmup_enabled: bool,
+) -> None:
+    """Time from worker startup to its first successful ``/convert``."""
+
+    async def load() -> None:
+        async with TestClient(main.app) as client:
+            job = await load_exchange_rates(client, market_exchange_rates, merge=False)
+            assert job["status"] == "SUCCESS"
+
+    run(load())
+    monkeypatch.setattr(main, "RATES_CACHE_WARMUP_ENABLED", warmup_enabled)
+
+    async def start_and_convert() -> Dict[str, float]:
+        started_at = perf_counter()
+        cold_client = TestClient(main.app)
+        await cold_client.__aenter__()
+        try:
+            ready_at = perf_counter()
+            response = await cold_client.get("/convert", query_string=CONVERT_QUERY)
+            converted_at = perf_counter()
+            assert response.status_code == HTTP_200_OK
+        finally:
+            await cold_client.__aexit__(None, None, None)
+
+        return {
+            "startup_seconds": ready_at - started_at,
+            "first_convert_seconds": converted_at - ready_at,
+            "cold_start_seconds": converted_at - started_at,
+        }
+
+    timings = benchmark.pedantic(
+        lambda: run(start_and_convert()), rounds=ROUNDS, warmup_rounds=1
+    )
+
+    benchmark.extra_info.update(timings)
@@ -0,0 +1,132 @@
+import asyncio
+from collections import deque
+from math import ceil
+from typing import Deque, Mapping
+
+from starlette.responses import JSONResponse
+from starlette.status import HTTP_429_TOO_MANY_REQUESTS, HTTP_503_SERVICE_UNAVAILABLE
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+
+class Overloaded(Exception):
+    """Request is rejected by admission control, retry after ``retry_after``."""
+
+    def __init__(self, status_code: int, detail: str, retry_after: float) -> None:
+        super().__init__(detail)
+        self.status_code = status_code
+        self.detail = detail
+        self.retry_after = retry_after
+
+
+class AdmissionLimiter:
+    """Caps concurrent requests of a route, queueing a bounded number more.
+
+    At most ``max_in_flight`` requests are admitted at once and at most
+    ``max_waiting`` more wait for a slot, in arrival order. A request
+    arriving while the queue is full is rejected with 429 right away, one
+    waiting longer than ``max_wait`` seconds with 503, both asking clients to
+    retry after ``retry_after`` seconds. A released slot is handed over to
+    the first waiting request directly, so a newcomer can not take it.
+    """
+
+    def __init__(
+        self,
+        max_in_flight: int,
+        max_waiting: int,
+        max_wait: float,
+        retry_after: float = 1.0,
+    ) -> None:
+        self._max_in_flight = max_in_flight
+        self._max_waiting = max_waiting
+        self._max_wait = max_wait
+        self._retry_after = retry_after
+        self._in_flight = 0
+        self._waiters: "Deque[asyncio.Future[None]]" = deque()
+
+    @property
+    def in_flight(self) -> int:
+        return self._in_flight
+
+    @property
+    def waiting(self) -> int:
+        return len(self._waiters)
+
+    async def acquire(self) -> None:
+        """Wait for a slot, raising ``Overloaded`` if it can not be had."""
+        if self._in_flight < self._max_in_flight and not self._waiters:
+            self._in_flight += 1
+            return
+
+        if len(self._waiters) >= self._max_waiting:
+            raise Overloaded(
+                HTTP_429_TOO_MANY_REQUESTS, "Too many requests", self._retry_after
+            )
+
+        waiter: "asyncio.Future[None]" = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        try:
+            await asyncio.wait_for(waiter, self._max_wait)
+        except asyncio.TimeoutError:
+            self._abandon(waiter)
+            raise Overloaded(
+                HTTP_503_SERVICE_UNAVAILABLE,
+                "Service is overloaded",
+                self._retry_after,
+            )
+        except asyncio.CancelledError:
+            self._abandon(waiter)
+            raise
+
+    def release(self) -> None:
+        while self._waiters:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(None)
+                return
+
+        self._in_flight -= 1
+
+    def _abandon(self, waiter: "asyncio.Future[None]") -> None:
+        if waiter.done() and not waiter.cancelled():
+            # Slot has been handed over just before the waiter gave up.
+            self.release()
+        elif waiter in self._waiters:
+            self._waiters.remove(waiter)
+
+
+class AdmissionMiddleware:
+    """Admits HTTP requests of limited routes through their route limiter.
+
+    ``limiters`` are looked up by exact request path, requests of other
+    paths are not limited. A request keeps its slot until its response,
+    streamed ones included, is sent.
+    """
+
+    def __init__(self, app: ASGIApp, limiters: Mapping[str, AdmissionLimiter]) -> None:
+        self._app = app
+        self._limiters = limiters
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        limiter = None
+        if scope["type"] == "http":
+            limiter = self._limiters.get(scope["path"])
+
+        if limiter is None:
+            await self._app(scope, receive, send)
+            return
+
+        try:
+            await limiter.acquire()
+        except Overloaded as error:
+            response = JSONResponse(
+                status_code=error.status_code,
+                content={"detail": error.detail},
+                headers={"Retry-After": str(ceil(error.retry_after))},
+            )
+            await response(scope, receive, send)
+            return
+
+        try:
+            await self._app(scope, receive, send)
+        finally:
+            limiter.release()
@@ -1,7 +1,109 @@
 from starlette.config import Config
+from starlette.datastructures import CommaSeparatedStrings
+
+from currency_converter_service.currency_converter import ConversionEngine, Rounding
+from currency_converter_service.dependencies.rates_encoding import StorageFormat
 
 config = Config(".env")
 
 DATABASE_URI = config("DATABASE_URI")
+DATABASE_REPLICA_URIS: CommaSeparatedStrings = config(
+    "DATABASE_REPLICA_URIS", cast=CommaSeparatedStrings, default=""
+)
 APP_NAME: str = config("APP_NAME", default="FastAPI App")
 DEBUG: bool = config("DEBUG", default=False)
+DOCS_ENABLED: bool = config("DOCS_ENABLED", cast=bool, default=True)
+
+DATABASE_POOL_MIN_SIZE: int = config("DATABASE_POOL_MIN_SIZE", cast=int, default=1)
+DATABASE_POOL_MAX_SIZE: int = config("DATABASE_POOL_MAX_SIZE", cast=int, default=10)
+DATABASE_WRITE_POOL_MAX_SIZE: int = config(
+    "DATABASE_WRITE_POOL_MAX_SIZE", cast=int, default=2
+)
+DATABASE_CONNECT_TIMEOUT: float = config(
+    "DATABASE_CONNECT_TIMEOUT", cast=float, default=1.0
+)
+DATABASE_COMMAND_TIMEOUT: float = config(
+    "DATABASE_COMMAND_TIMEOUT", cast=float, default=2.0
+)
+DATABASE_FAILURE_THRESHOLD: int = config(
+    "DATABASE_FAILURE_THRESHOLD", cast=int, default=5
+)
+DATABASE_RETRY_BACKOFF: float = config(
+    "DATABASE_RETRY_BACKOFF", cast=float, default=0.5
+)
+DATABASE_MAX_RETRY_BACKOFF: float = config(
+    "DATABASE_MAX_RETRY_BACKOFF", cast=float, default=30.0
+)
+DATABASE_HEALTH_CHECK_INTERVAL: float = config(
+    "DATABASE_HEALTH_CHECK_INTERVAL", cast=float, default=5.0
+)
+DATABASE_AUTO_PIPELINING: bool = config(
+    "DATABASE_AUTO_PIPELINING", cast=bool, default=False
+)
+
+RATES_STORAGE_FORMAT: StorageFormat = config(
+    "RATES_STORAGE_FORMAT", cast=StorageFormat, default="JSON"
+)
+
+RATES_CACHE_ENABLED: bool = config("RATES_CACHE_ENABLED", cast=bool, default=True)
+RATES_CACHE_TTL: float = config("RATES_CACHE_TTL", cast=float, default=1.0)
+RATES_CACHE_MAX_SIZE: int = config("RATES_CACHE_MAX_SIZE", cast=int, default=256)
+RATES_CACHE_UPDATES_ENABLED: bool = config(
+    "RATES_CACHE_UPDATES_ENABLED", cast=bool, default=True
+)
+RATES_CACHE_UPDATES_RETRY_DELAY: float = config(
+    "RATES_CACHE_UPDATES_RETRY_DELAY", cast=float, default=1.0
+)
+RATES_CACHE_WARMUP_ENABLED: bool = config(
+    "RATES_CACHE_WARMUP_ENABLED", cast=bool, default=True
+)
+
+SHARED_RATES_ENABLED: bool = config("SHARED_RATES_ENABLED", cast=bool, default=False)
+SHARED_RATES_PATH: str = config(
+    "SHARED_RATES_PATH", default="/dev/shm/currency-converter-rates"
+)
+SHARED_RATES_REFRESH_INTERVAL: float = config(
+    "SHARED_RATES_REFRESH_INTERVAL", cast=float, default=5.0
+)
+
+BATCH_CONVERT_MAX_SIZE: int = config("BATCH_CONVERT_MAX_SIZE", cast=int, default=1000)
+
+CONVERT_CSV_CHUNK_SIZE: int = config("CONVERT_CSV_CHUNK_SIZE", cast=int, default=10000)
+CONVERT_CSV_SPOOL_SIZE: int = config(
+    "CONVERT_CSV_SPOOL_SIZE", cast=int, default=16777216
+)
+
+CROSS_RATES_ENABLED: bool = config("CROSS_RATES_ENABLED", cast=bool, default=True)
+CROSS_RATES_MAX_LEGS: int = config("CROSS_RATES_MAX_LEGS", cast=int, default=3)
+
+CONVERSION_ENGINE: ConversionEngine = config(
+    "CONVERSION_ENGINE", cast=ConversionEngine, default="DECIMAL"
+)
+CONVERSION_ROUNDING: Rounding = config(
+    "CONVERSION_ROUNDING", cast=Rounding, default="ROUND_HALF_EVEN"
+)
+
+LOAD_CHUNK_SIZE: int = config("LOAD_CHUNK_SIZE", cast=int, default=10000)
+LOAD_MAX_LINE_LENGTH: int = config("LOAD_MAX_LINE_LENGTH", cast=int, default=1048576)
+LOAD_STAGING_TTL: int = config("LOAD_STAGING_TTL", cast=int, default=3600)
+LOAD_QUEUE_MAX_SIZE: int = config("LOAD_QUEUE_MAX_SIZE", cast=int, default=100)
+LOAD_BATCH_MAX_SIZE: int = config("LOAD_BATCH_MAX_SIZE", cast=int, default=100000)
+LOAD_JOB_TTL: int = config("LOAD_JOB_TTL", cast=int, default=86400)
+
+HISTORY_ENABLED: bool = config("HISTORY_ENABLED", cast=bool, default=False)
+HISTORY_RETENTION: int = config("HISTORY_RETENTION", cast=int, default=2592000)
+
+ADMISSION_CONTROL_ENABLED: bool = config(
+    "ADMISSION_CONTROL_ENABLED", cast=bool, default=True
+)
+ADMISSION_MAX_WAIT: float = config("ADMISSION_MAX_WAIT", cast=float, default=0.5)
+ADMISSION_RETRY_AFTER: float = config("ADMISSION_RETRY_AFTER", cast=float, default=1.0)
+CONVERT_MAX_IN_FLIGHT: int = config("CONVERT_MAX_IN_FLIGHT", cast=int, default=256)
+CONVERT_MAX_WAITING: int = config("CONVERT_MAX_WAITING", cast=int, default=1024)
+LOAD_MAX_IN_FLIGHT: int = config("LOAD_MAX_IN_FLIGHT", cast=int, default=4)
+LOAD_MAX_WAITING: int = config("LOAD_MAX_WAITING", cast=int, default=16)
+
+HTTP_CACHING_ENABLED: bool = config("HTTP_CACHING_ENABLED", cast=bool, default=True)
+HTTP_CACHE_MAX_AGE: int = config("HTTP_CACHE_MAX_AGE", cast=int, default=0)
+
+FAST_RESPONSES_ENABLED: bool = config("FAST_RESPONSES_ENABLED", cast=bool, default=True)
@@ -0,0 +1,101 @@
+from functools import reduce
+from operator import mul
+from typing import Dict, Iterator, List, Mapping, Optional
+
+from currency_converter_service.currency import Currency, CurrencyPair
+from currency_converter_service.models import CrossExchangeRate, ExchangeRate
+
+
+def derive_cross_rates(
+    exchange_rates: Mapping[Currency, Mapping[Currency, ExchangeRate]], max_legs: int
+) -> Dict[CurrencyPair, CrossExchangeRate]:
+    """Derive exchange rates of currency pairs missing in ``exchange_rates``.
+
+    Each missing pair is resolved through the shortest chain of at most
+    ``max_legs`` stored exchange rates, e.g. USD/RUB through USD/EUR and
+    EUR/RUB. A leg may go against a stored rate, taking its inverse when the
+    opposite pair is not stored, so USD/RUB also resolves through EUR/USD and
+    EUR/RUB. Path lists currencies in conversion order, an inverted leg shows
+    up as a step opposite to the stored pair. Derived rate is a product of
+    chain rates and it is as old as the oldest rate in chain.
+    """
+    legs = _legs(exchange_rates)
+
+    cross_rates = {}
+    for base_currency in legs:
+        stored_quotes = exchange_rates.get(base_currency, {})
+        for path in _shortest_paths(legs, base_currency, max_legs):
+            if path[-1] in stored_quotes:
+                continue
+
+            path_legs = [
+                legs[leg_base][leg_quote] for leg_base, leg_quote in zip(path, path[1:])
+            ]
+            cross_rates[base_currency, path[-1]] = CrossExchangeRate.construct(
+                rate=reduce(mul, (leg.rate for leg in path_legs)),
+                last_updated=min(leg.last_updated for leg in path_legs),
+                path=path,
+            )
+
+    return cross_rates
+
+
+def _legs(
+    exchange_rates: Mapping[Currency, Mapping[Currency, ExchangeRate]]
+) -> Dict[Currency, Dict[Currency, ExchangeRate]]:
+    """Stored exchange rates followed by inverses of pairs stored one way only."""
+    legs: Dict[Currency, Dict[Currency, ExchangeRate]] = {
+        base_currency: dict(quotes) for base_currency, quotes in exchange_rates.items()
+    }
+    for base_currency, quotes in exchange_rates.items():
+        for quote_currency, exchange_rate in quotes.items():
+            if not exchange_rate.rate:
+                continue
+
+            inverse_legs = legs.setdefault(quote_currency, {})
+            if base_currency not in inverse_legs:
+                inverse_legs[base_currency] = ExchangeRate.construct(
+                    rate=1 / exchange_rate.rate,
+                    last_updated=exchange_rate.last_updated,
+                )
+
+    return legs
+
+
+def _shortest_paths(
+    legs: Mapping[Currency, Mapping[Currency, ExchangeRate]],
+    base_currency: Currency,
+    max_legs: int,
+) -> Iterator[List[Currency]]:
+    """Breadth-first search of paths from ``base_currency``."""
+    previous: Dict[Currency, Optional[Currency]] = {base_currency: None}
+    frontier = [base_currency]
+
+    for _ in range(max_legs):
+        next_frontier = []
+        for currency in frontier:
+            for quote_currency in legs.get(currency, {}):
+                if quote_currency in previous:
+                    continue
+
+                previous[quote_currency] = currency
+                next_frontier.append(quote_currency)
+                yield _unwind_path(previous, quote_currency)
+
+                if len(previous) == len(legs):
+                    return
+
+        frontier = next_frontier
+
+
+def _unwind_path(
+    previous: Mapping[Currency, Optional[Currency]], currency: Currency
+) -> List[Currency]:
+    path = []
+    current: Optional[Currency] = currency
+    while current is not None:
+        path.append(current)
+        current = previous[current]
+
+    path.reverse()
+    return path
@@ -0,0 +1,160 @@
+import asyncio
+import csv
+import io
+from decimal import Decimal, InvalidOperation
+from typing import (
+    IO,
+    AsyncIterable,
+    Callable,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Sequence,
+    Tuple,
+)
+
+from currency_converter_service.currency import CURRENCY_BY_CODE, Currency
+from currency_converter_service.currency_converter import Conversion, exact_conversion
+from currency_converter_service.models import ExchangeRate
+
+CSV_HEADER = ("amount", "from_currency", "to_currency")
+CONVERTED_CSV_HEADER = (
+    *CSV_HEADER,
+    "rate",
+    "conversion_result",
+    "last_updated",
+    "error",
+)
+
+ExchangeRateLookup = Callable[[Currency, Currency], Optional[ExchangeRate]]
+ConvertedRow = Tuple[str, ...]
+
+
+async def convert_csv(
+    lines: AsyncIterable[bytes],
+    lookup: ExchangeRateLookup,
+    output: IO[bytes],
+    chunk_size: int,
+    conversion: Conversion = exact_conversion,
+) -> int:
+    """Convert ``amount,from_currency,to_currency`` CSV rows into ``output``.
+
+    Rows are converted and written in chunks of ``chunk_size`` rows, so
+    memory usage does not depend on the number of rows. Chunks are converted
+    in the default executor, not blocking the event loop. Optional header row
+    is skipped. Invalid rows are written with ``error`` column filled in.
+    Amounts are converted by ``conversion``. Returns the number of converted
+    rows.
+    """
+    _write_rows(output, [CONVERTED_CSV_HEADER])
+
+    loop = asyncio.get_running_loop()
+    rows_count = 0
+    chunk: List[str] = []
+    first_chunk = True
+    async for line in lines:
+        chunk.append(line.decode("utf-8", errors="replace"))
+        if len(chunk) >= chunk_size:
+            rows_count += await loop.run_in_executor(
+                None, _convert_chunk, chunk, lookup, output, first_chunk, conversion
+            )
+            chunk, first_chunk = [], False
+
+    rows_count += await loop.run_in_executor(
+        None, _convert_chunk, chunk, lookup, output, first_chunk, conversion
+    )
+
+    return rows_count
+
+
+def convert_rows(
+    rows: Iterable[Sequence[str]],
+    lookup: ExchangeRateLookup,
+    conversion: Conversion = exact_conversion,
+) -> Iterator[ConvertedRow]:
+    for row in rows:
+        if row:
+            yield convert_row(row, lookup, conversion)
+
+
+def convert_row(
+    row: Sequence[str],
+    lookup: ExchangeRateLookup,
+    conversion: Conversion = exact_conversion,
+) -> ConvertedRow:
+    """Convert a single CSV row the same way ``/convert`` does."""
+    if len(row) != len(CSV_HEADER):
+        return _failed(row, f"Expected {len(CSV_HEADER)} columns")
+
+    raw_amount, from_code, to_code = (value.strip() for value in row)
+    try:
+        amount = Decimal(raw_amount)
+    except InvalidOperation:
+        return _failed(row, "Invalid amount")
+    if not amount.is_finite() or amount <= 0:
+        return _failed(row, "Amount must be greater than 0")
+
+    from_currency = CURRENCY_BY_CODE.get(from_code)
+    to_currency = CURRENCY_BY_CODE.get(to_code)
+    if from_currency is None or to_currency is None:
+        return _failed(row, "Unknown currency")
+    if from_currency == to_currency:
+        return _failed(row, "Choose different currencies")
+
+    exchange_rate = lookup(from_currency, to_currency)
+    if exchange_rate is None:
+        return _failed(row, f"No exchange rates for {from_code}/{to_code} currencies")
+
+    try:
+        conversion_result = conversion(amount, exchange_rate.rate, to_currency)
+    except ArithmeticError:
+        return _failed(row, "Conversion result is out of range")
+
+    return (
+        raw_amount,
+        from_code,
+        to_code,
+        str(exchange_rate.rate),
+        str(conversion_result),
+        str(exchange_rate.last_updated),
+        "",
+    )
+
+
+def _convert_chunk(
+    lines: List[str],
+    lookup: ExchangeRateLookup,
+    output: IO[bytes],
+    first_chunk: bool,
+    conversion: Conversion,
+) -> int:
+    rows: Iterable[List[str]] = csv.reader(lines)
+    if first_chunk:
+        rows = _skip_header(rows)
+
+    converted_rows = list(convert_rows(rows, lookup, conversion))
+    _write_rows(output, converted_rows)
+
+    return len(converted_rows)
+
+
+def _skip_header(rows: Iterable[List[str]]) -> Iterator[List[str]]:
+    rows = iter(rows)
+    for row in rows:
+        if tuple(value.strip() for value in row) != CSV_HEADER:
+            yield row
+        break
+
+    yield from rows
+
+
+def _write_rows(output: IO[bytes], rows: Iterable[Sequence[str]]) -> None:
+    buffer = io.StringIO()
+    csv.writer(buffer, lineterminator="\n").writerows(rows)
+    output.write(buffer.getvalue().encode("utf-8"))
+
+
+def _failed(row: Sequence[str], error: str) -> ConvertedRow:
+    values = (*row, "", "")[: len(CSV_HEADER)]
+    return (*values, "", "", "", error)
@@ -1,4 +1,11 @@
 from enum import Enum
+from typing import Any, Callable, Dict, Iterator, Optional, Tuple
+
+try:
+    from pydantic.errors import EnumMemberError
+except ImportError:  # pragma: no cover
+    # pydantic < 1.5 names enum member error ``EnumError``
+    from pydantic.errors import EnumError as EnumMemberError  # type: ignore
 
 
 class Currency(Enum):
@@ -184,3 +191,95 @@ class Currency(Enum):
     ZAR = "ZAR"
     ZMW = "ZMW"
     ZWL = "ZWL"
+
+    @classmethod
+    def __get_validators__(cls) -> Iterator[Callable[[Any], "Currency"]]:
+        yield validate_currency
+
+
+CurrencyPair = Tuple[Currency, Currency]
+
+CURRENCIES: Tuple[Currency, ...] = tuple(Currency)
+CURRENCY_BY_CODE: Dict[str, Currency] = {
+    currency.value: currency for currency in CURRENCIES
+}
+CURRENCY_INDEX: Dict[Currency, int] = {
+    currency: index for index, currency in enumerate(CURRENCIES)
+}
+
+# Number of ISO 4217 minor unit digits, ``None`` for currencies without minor
+# units like precious metals and funds, 2 for ones not listed.
+MINOR_UNITS_EXCEPTIONS: Dict[Currency, Optional[int]] = {
+    **dict.fromkeys(
+        (
+            Currency.BIF,
+            Currency.BYR,
+            Currency.CLP,
+            Currency.DJF,
+            Currency.GNF,
+            Currency.ISK,
+            Currency.JPY,
+            Currency.KMF,
+            Currency.KRW,
+            Currency.PYG,
+            Currency.RWF,
+            Currency.UGX,
+            Currency.UYI,
+            Currency.VND,
+            Currency.VUV,
+            Currency.XAF,
+            Currency.XOF,
+            Currency.XPF,
+        ),
+        0,
+    ),
+    **dict.fromkeys(
+        (
+            Currency.BHD,
+            Currency.IQD,
+            Currency.JOD,
+            Currency.KWD,
+            Currency.LYD,
+            Currency.OMR,
+            Currency.TND,
+        ),
+        3,
+    ),
+    Currency.CLF: 4,
+    **dict.fromkeys(
+        (
+            Currency.XAG,
+            Currency.XAU,
+            Currency.XBA,
+            Currency.XBB,
+            Currency.XBC,
+            Currency.XBD,
+            Currency.XDR,
+            Currency.XFU,
+            Currency.XPD,
+            Currency.XPT,
+            Currency.XSU,
+            Currency.XTS,
+            Currency.XUA,
+        ),
+        None,
+    ),
+}
+MINOR_UNITS: Dict[Currency, Optional[int]] = {
+    currency: MINOR_UNITS_EXCEPTIONS.get(currency, 2) for currency in CURRENCIES
+}
+
+
+def validate_currency(value: Any) -> Currency:
+    """Validate currency code with a single dict lookup.
+
+    Replaces ``Enum`` lookup made by ``pydantic`` for every ``Currency`` field
+    and query parameter, failing with the same error.
+    """
+    if isinstance(value, Currency):
+        return value
+
+    try:
+        return CURRENCY_BY_CODE[value]
+    except (KeyError, TypeError):
+        raise EnumMemberError(enum_values=CURRENCIES)
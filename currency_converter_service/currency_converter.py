@@ -1,7 +1,162 @@
-from decimal import Decimal
+from decimal import (
+    ROUND_CEILING,
+    ROUND_DOWN,
+    ROUND_FLOOR,
+    ROUND_HALF_DOWN,
+    ROUND_HALF_EVEN,
+    ROUND_HALF_UP,
+    ROUND_UP,
+    Decimal,
+    InvalidOperation,
+    getcontext,
+)
+from enum import Enum
+from functools import lru_cache, partial
+from typing import Callable, Optional, Tuple
 
+from currency_converter_service.currency import MINOR_UNITS, Currency
 
-def calculate_conversion(amount: Decimal, rate: Decimal) -> Decimal:
+Conversion = Callable[[Decimal, Decimal, Currency], Decimal]
+
+
+class ConversionEngine(Enum):
+    DECIMAL = "DECIMAL"
+    MATRIX = "MATRIX"
+    FIXED_POINT = "FIXED_POINT"
+
+
+class Rounding(Enum):
+    HALF_EVEN = ROUND_HALF_EVEN
+    HALF_UP = ROUND_HALF_UP
+    HALF_DOWN = ROUND_HALF_DOWN
+    UP = ROUND_UP
+    DOWN = ROUND_DOWN
+    CEILING = ROUND_CEILING
+    FLOOR = ROUND_FLOOR
+
+
+def calculate_conversion(
+    amount: Decimal,
+    rate: Decimal,
+    minor_units: Optional[int] = None,
+    rounding: Rounding = Rounding.HALF_EVEN,
+) -> Decimal:
+    """Convert ``amount`` at ``rate``, quantized to ``minor_units`` if given."""
     conversion_result = amount * rate
+    if minor_units is not None:
+        conversion_result = conversion_result.quantize(
+            Decimal(1).scaleb(-minor_units), rounding=rounding.value
+        )
 
     return conversion_result
+
+
+def calculate_fixed_point_conversion(
+    amount: Decimal,
+    rate: Decimal,
+    minor_units: Optional[int],
+    rounding: Rounding = Rounding.HALF_EVEN,
+) -> Decimal:
+    """Convert ``amount`` at ``rate`` in integers, quantized to ``minor_units``.
+
+    Amount and rate are taken as integer ratios, rates cached per distinct rate,
+    and their exact product is divided down to ``minor_units`` with ``rounding``.
+    Result equals ``calculate_conversion`` one quantized to ``minor_units``
+    whenever the ``Decimal`` product is exact, i.e. fits context precision,
+    and fails with ``InvalidOperation`` like its quantization does when the
+    result does not fit. Currencies without minor units are not quantized.
+    """
+    if minor_units is None:
+        return calculate_conversion(amount, rate)
+
+    if not amount.is_finite() or not rate.is_finite():
+        raise InvalidOperation("Conversion of a value which is not finite")
+
+    if not amount or not rate:
+        return Decimal(0).scaleb(-minor_units)
+
+    precision = getcontext().prec
+    # Scaled product is at least 10 ** magnitude and below 10 ** (magnitude + 2).
+    magnitude = amount.adjusted() + rate.adjusted() + minor_units
+    if magnitude >= precision:
+        raise InvalidOperation("Conversion result exceeds precision")
+
+    negative = amount.is_signed() != rate.is_signed()
+    if magnitude < -2:
+        # Scaled product is below a tenth, its digits do not matter to rounding.
+        coefficient = int(_rounds_away(0, 1, 4, negative, rounding))
+    else:
+        amount_numerator, amount_denominator = amount.as_integer_ratio()
+        rate_numerator, rate_denominator = as_rate_ratio(rate)
+        coefficient = divide(
+            abs(amount_numerator * rate_numerator) * 10 ** minor_units,
+            amount_denominator * rate_denominator,
+            negative,
+            rounding,
+        )
+        if coefficient >= 10 ** precision:
+            raise InvalidOperation("Conversion result exceeds precision")
+
+    return Decimal(-coefficient if negative else coefficient).scaleb(-minor_units)
+
+
+def divide(dividend: int, divisor: int, negative: bool, rounding: Rounding) -> int:
+    """Divide non-negative ``dividend`` rounding quotient of signed one to integer."""
+    quotient, remainder = divmod(dividend, divisor)
+    if remainder and _rounds_away(quotient, 2 * remainder, divisor, negative, rounding):
+        quotient += 1
+
+    return quotient
+
+
+def _rounds_away(
+    quotient: int,
+    double_remainder: int,
+    divisor: int,
+    negative: bool,
+    rounding: Rounding,
+) -> bool:
+    if rounding == Rounding.HALF_EVEN:
+        return double_remainder > divisor or (
+            double_remainder == divisor and quotient % 2 == 1
+        )
+    if rounding == Rounding.HALF_UP:
+        return double_remainder >= divisor
+    if rounding == Rounding.HALF_DOWN:
+        return double_remainder > divisor
+    if rounding == Rounding.CEILING:
+        return not negative
+    if rounding == Rounding.FLOOR:
+        return negative
+
+    return rounding == Rounding.UP
+
+
+@lru_cache(maxsize=65536)
+def as_rate_ratio(rate: Decimal) -> Tuple[int, int]:
+    """Rate as a pair of integers, numerator and positive denominator."""
+    return rate.as_integer_ratio()
+
+
+def exact_conversion(amount: Decimal, rate: Decimal, to_currency: Currency) -> Decimal:
+    return calculate_conversion(amount, rate)
+
+
+def fixed_point_conversion(
+    amount: Decimal,
+    rate: Decimal,
+    to_currency: Currency,
+    rounding: Rounding = Rounding.HALF_EVEN,
+) -> Decimal:
+    return calculate_fixed_point_conversion(
+        amount, rate, MINOR_UNITS[to_currency], rounding
+    )
+
+
+@lru_cache(maxsize=None)
+def as_conversion(engine: ConversionEngine, rounding: Rounding) -> Conversion:
+    """Single conversion by ``engine``, ``MATRIX`` converts single ones exactly."""
+    if engine == ConversionEngine.FIXED_POINT:
+        return partial(fixed_point_conversion, rounding=rounding)
+
+    return exact_conversion
@@ -1,4 +1,26 @@
-from .database import create_connection_pool
-from .rates_storage import CurrencyExchangeRatesStorage, preprocess
+from .database import (
+    CircuitBreaker,
+    DatabaseUnavailable,
+    check_health,
+    create_connection_pool,
+)
+from .ingestion import IngestionQueue
+from .rates_cache import ExchangeRatesCache
+from .rates_storage import CurrencyExchangeRatesStorage, preprocess, preprocess_stream
+from .replicas import Replica, ReplicaSet
+from .shared_rates import SharedRatesTable
 
-__all__ = ["CurrencyExchangeRatesStorage", "preprocess", "create_connection_pool"]
+__all__ = [
+    "CircuitBreaker",
+    "CurrencyExchangeRatesStorage",
+    "DatabaseUnavailable",
+    "ExchangeRatesCache",
+    "IngestionQueue",
+    "Replica",
+    "ReplicaSet",
+    "SharedRatesTable",
+    "check_health",
+    "preprocess",
+    "preprocess_stream",
+    "create_connection_pool",
+]
@@ -1,7 +1,243 @@
+import asyncio
+from time import monotonic
+from typing import Any, Awaitable, Optional, Tuple, Type, TypeVar
+
 import aioredis
+from aioredis import ConnectionClosedError, ConnectionsPool, PoolClosedError, Redis
+from aioredis.commands import MultiExec, Pipeline
+
+from currency_converter_service.metrics import watch_connection_pool
+
+CONNECTION_ERRORS: Tuple[Type[BaseException], ...] = (
+    ConnectionClosedError,
+    PoolClosedError,
+    OSError,
+    asyncio.TimeoutError,
+)
+
+Result = TypeVar("Result")
+
+
+class DatabaseUnavailable(aioredis.RedisError):
+    """Redis is down or did not respond in time, retry after ``retry_after``."""
+
+    def __init__(self, retry_after: float) -> None:
+        super().__init__(f"Database is unavailable, retry after {retry_after:.1f}s")
+        self.retry_after = retry_after
+
+
+class CircuitBreaker:
+    """Fails redis calls fast while redis is down.
+
+    Opens after ``failure_threshold`` consecutive connection failures. While
+    open, calls fail immediately until ``backoff`` seconds pass, then a single
+    call probes redis. A failed probe doubles the backoff up to
+    ``max_backoff``, a succeeded call closes the breaker.
+    """
+
+    def __init__(
+        self, failure_threshold: int, backoff: float, max_backoff: float
+    ) -> None:
+        self._failure_threshold = failure_threshold
+        self._initial_backoff = backoff
+        self._max_backoff = max_backoff
+        self._backoff = backoff
+        self._failures = 0
+        self._open_until: Optional[float] = None
+
+    @property
+    def is_open(self) -> bool:
+        return self._open_until is not None
+
+    @property
+    def retry_after(self) -> float:
+        if self._open_until is None:
+            return 0.0
+
+        return max(self._open_until - monotonic(), 0.0)
+
+    def raise_if_open(self) -> None:
+        """Raise ``DatabaseUnavailable`` until the next probe is allowed."""
+        if self._open_until is not None and monotonic() < self._open_until:
+            raise DatabaseUnavailable(self.retry_after)
+
+    def check(self) -> None:
+        """Raise ``DatabaseUnavailable`` unless a call may go to redis.
+
+        Once backoff passes, lets a single call through as a probe.
+        """
+        self.raise_if_open()
+        if self._open_until is not None:
+            self._open_until = monotonic() + self._backoff
+
+    def record_success(self) -> None:
+        self._failures = 0
+        self._backoff = self._initial_backoff
+        self._open_until = None
+
+    def record_failure(self) -> None:
+        self._failures += 1
+        if self._open_until is not None:
+            self._backoff = min(self._backoff * 2, self._max_backoff)
+            self._open_until = monotonic() + self._backoff
+        elif self._failures >= self._failure_threshold:
+            self._open_until = monotonic() + self._backoff
+
+    async def guard(self, call: Awaitable[Result], timeout: Optional[float]) -> Result:
+        """Await redis ``call`` within ``timeout`` recording its outcome.
+
+        Connection failures and timeouts are raised as ``DatabaseUnavailable``.
+        """
+        try:
+            result = await asyncio.wait_for(call, timeout)
+        except CONNECTION_ERRORS as error:
+            self.record_failure()
+            raise DatabaseUnavailable(self.retry_after) from error
+
+        if isinstance(result, list) and any(
+            isinstance(item, CONNECTION_ERRORS) for item in result
+        ):
+            self.record_failure()
+        else:
+            self.record_success()
+
+        return result
+
+
+class GuardedRedis(Redis):
+    """``Redis`` failing fast through circuit breaker and bounding call time.
 
+    Plain commands, pipelines and transactions are checked and timed out
+    as a whole. Pub/sub commands are not guarded.
+    """
 
-async def create_connection_pool(uri: str) -> aioredis.Redis:
-    pool = await aioredis.create_redis_pool(uri)
+    def __init__(
+        self,
+        pool_or_conn: Any,
+        circuit_breaker: CircuitBreaker,
+        command_timeout: Optional[float],
+    ) -> None:
+        super().__init__(pool_or_conn)
+        self._circuit_breaker = circuit_breaker
+        self._command_timeout = command_timeout
+
+    def execute(self, command: Any, *args: Any, **kwargs: Any) -> Any:
+        self._circuit_breaker.check()
+        return self._circuit_breaker.guard(
+            super().execute(command, *args, **kwargs), self._command_timeout
+        )
+
+    def pipeline(self) -> Pipeline:
+        return GuardedPipeline(
+            self._pool_or_conn, self._circuit_breaker, self._command_timeout
+        )
+
+    def multi_exec(self) -> MultiExec:
+        return GuardedMultiExec(
+            self._pool_or_conn, self._circuit_breaker, self._command_timeout
+        )
+
+
+class GuardedPipeline(Pipeline):
+    def __init__(
+        self,
+        pool_or_conn: Any,
+        circuit_breaker: CircuitBreaker,
+        command_timeout: Optional[float],
+    ) -> None:
+        super().__init__(pool_or_conn, Redis)
+        self._circuit_breaker = circuit_breaker
+        self._command_timeout = command_timeout
+
+    async def execute(self, *, return_exceptions: bool = False) -> Any:
+        self._circuit_breaker.check()
+        return await self._circuit_breaker.guard(
+            super().execute(return_exceptions=return_exceptions), self._command_timeout,
+        )
+
+
+class GuardedMultiExec(MultiExec):
+    def __init__(
+        self,
+        pool_or_conn: Any,
+        circuit_breaker: CircuitBreaker,
+        command_timeout: Optional[float],
+    ) -> None:
+        super().__init__(pool_or_conn, Redis)
+        self._circuit_breaker = circuit_breaker
+        self._command_timeout = command_timeout
+
+    async def execute(self, *, return_exceptions: bool = False) -> Any:
+        self._circuit_breaker.check()
+        return await self._circuit_breaker.guard(
+            super().execute(return_exceptions=return_exceptions), self._command_timeout,
+        )
+
+
+class PipeliningConnectionsPool(ConnectionsPool):
+    """Connections pool sharing free connections among concurrent pipelines.
+
+    Like single commands, pipelines and transactions are written to a
+    connection at once, so they are multiplexed over free connections instead
+    of holding one exclusively. A connection is acquired exclusively only when
+    no free connection is left.
+    """
+
+    def get(self) -> Any:
+        connection, _ = self.get_connection("EXEC")
+        if connection is None:
+            return super().get()
+
+        return _SharedConnection(connection)
+
+
+class _SharedConnection:
+    def __init__(self, connection: Any) -> None:
+        self._connection = connection
+
+    async def __aenter__(self) -> Any:
+        return self._connection
+
+    async def __aexit__(self, *exc_info: Any) -> None:
+        pass
+
+
+async def create_connection_pool(
+    uri: str,
+    min_size: int = 1,
+    max_size: int = 10,
+    connect_timeout: Optional[float] = None,
+    command_timeout: Optional[float] = None,
+    circuit_breaker: Optional[CircuitBreaker] = None,
+    auto_pipelining: bool = False,
+    watched: bool = True,
+) -> aioredis.Redis:
+    """Create redis pool, reporting its saturation in metrics if ``watched``."""
+    pool = await aioredis.create_redis_pool(
+        uri,
+        minsize=min_size,
+        maxsize=max_size,
+        timeout=connect_timeout,
+        pool_cls=PipeliningConnectionsPool if auto_pipelining else None,
+    )
+    if circuit_breaker is not None:
+        pool = GuardedRedis(pool.connection, circuit_breaker, command_timeout)
+    if watched:
+        watch_connection_pool(pool)
 
     return pool
+
+
+async def check_health(connection_pool: Redis, interval: float) -> None:
+    """Ping redis every ``interval`` seconds until cancelled.
+
+    Keeps pool connections alive and reconnected, and probes redis while
+    circuit breaker is open, so it closes without waiting for requests.
+    """
+    while True:
+        try:
+            await connection_pool.ping()
+        except aioredis.RedisError:
+            pass
+
+        await asyncio.sleep(interval)
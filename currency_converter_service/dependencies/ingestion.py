@@ -0,0 +1,185 @@
+import asyncio
+import logging
+from typing import Dict, List, Optional, Tuple
+from uuid import uuid4
+
+from aioredis import Redis
+
+from currency_converter_service.metrics import measure_redis_command
+from currency_converter_service.models import (
+    CurrencyExchangeLoadJob,
+    CurrencyExchangeRatesLoadRequest,
+    LoadJobStatus,
+    LoadStatus,
+)
+
+from .rates_encoding import StorageFormat, StoredValue
+from .rates_storage import (
+    CurrencyExchangeRatesStorage,
+    LoadableExchangeRates,
+    preprocess,
+)
+
+QueuedLoad = Tuple[CurrencyExchangeLoadJob, CurrencyExchangeRatesLoadRequest]
+
+LOAD_JOB_KEY_PREFIX = "exchange-rates-load-job:"
+
+logger = logging.getLogger(__name__)
+
+
+class IngestionQueue:
+    """Bounded queue of exchange rates loads applied by a background worker.
+
+    Every queued load is tracked by a job kept in ``redis`` for ``job_ttl``
+    seconds, so its status can be reported by any worker. Consecutive merging
+    loads are coalesced, later rates of a pair winning, and applied in a single
+    transaction of at most ``batch_size`` rates unless a single load is larger.
+    Loads are preprocessed in the default executor, not blocking the event loop
+    which serves conversions meanwhile.
+    """
+
+    def __init__(
+        self,
+        storage: CurrencyExchangeRatesStorage,
+        connection_pool: Redis,
+        max_size: int,
+        batch_size: int,
+        job_ttl: int,
+        storage_format: StorageFormat = StorageFormat.JSON,
+    ) -> None:
+        self._storage = storage
+        self._connection_pool = connection_pool
+        self._batch_size = batch_size
+        self._job_ttl = job_ttl
+        self._storage_format = storage_format
+        self._queue: "asyncio.Queue[QueuedLoad]" = asyncio.Queue(max_size)
+        self._carried_load: Optional[QueuedLoad] = None
+
+    async def submit(
+        self, request: CurrencyExchangeRatesLoadRequest, merge: bool, delta: bool
+    ) -> CurrencyExchangeLoadJob:
+        """Queue load, raising ``asyncio.QueueFull`` while queue is full."""
+        if self._queue.full():
+            raise asyncio.QueueFull
+
+        job = CurrencyExchangeLoadJob(
+            job_id=uuid4().hex,
+            status=LoadJobStatus.QUEUED,
+            merge=merge,
+            delta=delta,
+            rates_count=sum(
+                len(currency_exchange_rates.quotes)
+                for currency_exchange_rates in request.currency_exchange_rates
+            ),
+        )
+        await self._save_jobs([job])
+        self._queue.put_nowait((job, request))
+
+        return job.copy()
+
+    async def fetch_job(self, job_id: str) -> Optional[CurrencyExchangeLoadJob]:
+        with measure_redis_command("get"):
+            serialized_job = await self._connection_pool.get(as_load_job_key(job_id))
+
+        job = None
+        if serialized_job:
+            job = CurrencyExchangeLoadJob.parse_raw(serialized_job)
+
+        return job
+
+    async def run(self) -> None:
+        """Apply queued loads one batch at a time until cancelled."""
+        while True:
+            batch = await self._next_batch()
+            try:
+                await self._apply(batch)
+            except Exception:
+                logger.exception("Exchange rates load failed")
+                await self._finish(batch, LoadStatus.FAILURE)
+
+    async def _next_batch(self) -> List[QueuedLoad]:
+        queued_load = self._carried_load or await self._queue.get()
+        self._carried_load = None
+
+        batch = [queued_load]
+        rates_count = queued_load[0].rates_count
+        while _is_coalescable(queued_load[0]) and not self._queue.empty():
+            next_load = self._queue.get_nowait()
+            rates_count += next_load[0].rates_count
+            if not _is_coalescable(next_load[0]) or rates_count > self._batch_size:
+                self._carried_load = next_load
+                break
+
+            batch.append(next_load)
+
+        return batch
+
+    async def _apply(self, batch: List[QueuedLoad]) -> None:
+        jobs = [job for job, _ in batch]
+        for job in jobs:
+            job.status = LoadJobStatus.RUNNING
+        await self._save_jobs(jobs)
+
+        loadable_exchange_rates = await asyncio.get_running_loop().run_in_executor(
+            None,
+            merge_load_requests,
+            [request for _, request in batch],
+            self._storage_format,
+        )
+
+        leading_job = jobs[0]
+        if leading_job.delta:
+            report = await self._storage.delta_load_exchange_rates(
+                loadable_exchange_rates
+            )
+            leading_job.applied, leading_job.skipped = report.applied, report.skipped
+            status = report.status
+        else:
+            status = await self._storage.load_exchange_rates(
+                loadable_exchange_rates, merge=leading_job.merge
+            )
+
+        await self._finish(batch, status)
+
+    async def _finish(self, batch: List[QueuedLoad], status: LoadStatus) -> None:
+        jobs = [job for job, _ in batch]
+        for job in jobs:
+            job.status = LoadJobStatus(status.value)
+
+        try:
+            await self._save_jobs(jobs)
+        except Exception:
+            logger.exception("Exchange rates load jobs status can not be saved")
+
+    async def _save_jobs(self, jobs: List[CurrencyExchangeLoadJob]) -> None:
+        pipeline = self._connection_pool.pipeline()
+        for job in jobs:
+            pipeline.set(as_load_job_key(job.job_id), job.json(), expire=self._job_ttl)
+
+        with measure_redis_command("set"):
+            await pipeline.execute()
+
+
+def merge_load_requests(
+    requests: List[CurrencyExchangeRatesLoadRequest],
+    storage_format: StorageFormat = StorageFormat.JSON,
+) -> List[LoadableExchangeRates]:
+    """Preprocess load requests into a single write per base currency.
+
+    Rates of later requests replace rates of the same pair in earlier ones.
+    """
+    quotes_by_base: Dict[str, Dict[str, StoredValue]] = {}
+    for request in requests:
+        for base_currency_key, quote_to_rate in preprocess(request, storage_format):
+            quotes_by_base.setdefault(base_currency_key, {}).update(quote_to_rate)
+
+    return list(quotes_by_base.items())
+
+
+def as_load_job_key(job_id: str) -> str:
+    load_job_key = f"{LOAD_JOB_KEY_PREFIX}{job_id}"
+    return load_job_key
+
+
+def _is_coalescable(job: CurrencyExchangeLoadJob) -> bool:
+    return job.merge and not job.delta
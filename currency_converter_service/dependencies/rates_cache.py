@@ -0,0 +1,104 @@
+from collections import OrderedDict
+from time import monotonic
+from typing import Any, Dict, Iterable, Optional
+
+from currency_converter_service.currency import Currency
+from currency_converter_service.models import ExchangeRate
+
+QuoteToExchangeRate = Dict[Currency, ExchangeRate]
+
+
+class ExchangeRatesCache:
+    """Per-worker in-memory snapshot of exchange rates grouped by base currency.
+
+    Cached rates belong to a single rates generation. The generation is
+    revalidated against storage at most once per ``ttl`` seconds, and a changed
+    generation drops the whole snapshot. While updates are tracked the snapshot
+    is kept in sync by pushed updates and never polls storage. At most
+    ``max_size`` base currencies are kept, least recently used ones are evicted
+    first. Structures derived from the whole snapshot, like cross rates, are
+    kept until the generation changes.
+    """
+
+    def __init__(self, ttl: float, max_size: int) -> None:
+        self._ttl = ttl
+        self._max_size = max_size
+        self._generation: Optional[str] = None
+        self._validated_at = float("-inf")
+        self._tracking_updates = False
+        self._exchange_rates: "OrderedDict[Currency, QuoteToExchangeRate]" = (
+            OrderedDict()
+        )
+        self._derived: Dict[str, Any] = {}
+
+    @property
+    def generation(self) -> Optional[str]:
+        return self._generation
+
+    def is_stale(self) -> bool:
+        if self._tracking_updates:
+            return False
+
+        return monotonic() - self._validated_at >= self._ttl
+
+    def track_updates(self, tracking: bool) -> None:
+        self._tracking_updates = tracking
+
+    def validate(self, generation: Optional[str]) -> None:
+        """Mark snapshot as fresh for ``generation``, dropping outdated rates."""
+        if generation != self._generation:
+            self._exchange_rates.clear()
+            self._derived.clear()
+            self._generation = generation
+
+        self._validated_at = monotonic()
+
+    def apply_update(
+        self, generation: str, base_currencies: Optional[Iterable[Currency]]
+    ) -> None:
+        """Move snapshot to ``generation`` dropping updated base currencies only.
+
+        ``None`` base currencies means that all rates might have been replaced.
+        """
+        if base_currencies is None:
+            self._exchange_rates.clear()
+        else:
+            for base_currency in base_currencies:
+                self._exchange_rates.pop(base_currency, None)
+
+        self._derived.clear()
+        self._generation = generation
+        self._validated_at = monotonic()
+
+    def get(self, base_currency: Currency) -> Optional[QuoteToExchangeRate]:
+        exchange_rates = self._exchange_rates.get(base_currency)
+        if exchange_rates is not None:
+            self._exchange_rates.move_to_end(base_currency)
+
+        return exchange_rates
+
+    def put(
+        self,
+        base_currency: Currency,
+        exchange_rates: QuoteToExchangeRate,
+        generation: Optional[str],
+    ) -> None:
+        """Cache rates fetched for ``generation`` unless it is already outdated."""
+        if generation != self._generation:
+            return
+
+        self._exchange_rates[base_currency] = exchange_rates
+        self._exchange_rates.move_to_end(base_currency)
+        while len(self._exchange_rates) > self._max_size:
+            self._exchange_rates.popitem(last=False)
+
+    def get_derived(self, name: str) -> Any:
+        return self._derived.get(name)
+
+    def put_derived(self, name: str, value: Any, generation: Optional[str]) -> None:
+        """Cache structure derived from rates of ``generation`` if still current."""
+        if generation == self._generation:
+            self._derived[name] = value
+
+    def __len__(self) -> int:
+        return len(self._exchange_rates)
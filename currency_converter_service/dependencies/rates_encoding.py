@@ -0,0 +1,88 @@
+import json
+import struct
+from decimal import Decimal
+from enum import Enum
+from typing import Dict, Mapping, Union
+
+from fastapi.encoders import jsonable_encoder
+
+from currency_converter_service.currency import CURRENCY_BY_CODE, Currency
+from currency_converter_service.models import ExchangeRate
+
+StoredValue = Union[bytes, str]
+
+BINARY_FORMAT_MARKER = b"\x01"
+BINARY_EXCHANGE_RATE = struct.Struct(">qbq")
+
+INT64_MIN, INT64_MAX = -(2 ** 63), 2 ** 63 - 1
+
+
+class StorageFormat(Enum):
+    """Format of exchange rates stored in hash fields.
+
+    ``JSON`` stores ``{"rate": "79.75", "last_updated": 1584989828}`` strings.
+    ``BINARY`` stores rate coefficient, exponent and update time packed into
+    18 bytes. Rates that do not fit into ``BINARY`` format are stored as JSON.
+    Both formats are always readable, so stored rates can be migrated lazily.
+    """
+
+    JSON = "JSON"
+    BINARY = "BINARY"
+
+
+def encode_exchange_rate(
+    exchange_rate: ExchangeRate, storage_format: StorageFormat = StorageFormat.JSON
+) -> StoredValue:
+    if storage_format == StorageFormat.BINARY:
+        sign, digits, exponent = exchange_rate.rate.as_tuple()
+        coefficient = int("".join(map(str, digits))) * (-1 if sign else 1)
+
+        if (
+            isinstance(exponent, int)
+            and -128 <= exponent <= 127
+            and INT64_MIN <= coefficient <= INT64_MAX
+        ):
+            return BINARY_FORMAT_MARKER + BINARY_EXCHANGE_RATE.pack(
+                coefficient, exponent, exchange_rate.last_updated
+            )
+
+    return json.dumps(jsonable_encoder(exchange_rate))
+
+
+def decode_exchange_rate(serialized_rate: StoredValue) -> ExchangeRate:
+    if isinstance(serialized_rate, bytes) and serialized_rate[:1] == (
+        BINARY_FORMAT_MARKER
+    ):
+        coefficient, exponent, last_updated = BINARY_EXCHANGE_RATE.unpack_from(
+            serialized_rate, 1
+        )
+        return ExchangeRate.construct(
+            rate=Decimal(coefficient).scaleb(exponent), last_updated=last_updated
+        )
+
+    return ExchangeRate(**json.loads(serialized_rate))
+
+
+def decode_last_updated(serialized_rate: StoredValue) -> int:
+    """Decode update time of exchange rate encoded by this service."""
+    if isinstance(serialized_rate, bytes) and serialized_rate[:1] == (
+        BINARY_FORMAT_MARKER
+    ):
+        _, _, last_updated = BINARY_EXCHANGE_RATE.unpack_from(serialized_rate, 1)
+        return last_updated
+
+    return json.loads(serialized_rate)["last_updated"]
+
+
+def decode_exchange_rates(
+    serialized_rates: Mapping[StoredValue, StoredValue]
+) -> Dict[Currency, ExchangeRate]:
+    """Decode whole base currency hash as fetched from storage."""
+    exchange_rates = {}
+    for quote, serialized_rate in serialized_rates.items():
+        quote_code = quote.decode() if isinstance(quote, bytes) else quote
+        exchange_rates[CURRENCY_BY_CODE[quote_code]] = decode_exchange_rate(
+            serialized_rate
+        )
+
+    return exchange_rates
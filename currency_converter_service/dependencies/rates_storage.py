@@ -1,66 +1,1195 @@
+import asyncio
 import json
-from typing import Dict, Iterable, Iterator, Optional, Tuple
+from functools import partial
+from itertools import islice
+from sys import intern
+from time import time
+from typing import (
+    Any,
+    AsyncIterable,
+    AsyncIterator,
+    Awaitable,
+    Callable,
+    Collection,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Sequence,
+    Set,
+    Tuple,
+    TypeVar,
+)
+from uuid import uuid4
 
-from aioredis import Redis
-from fastapi.encoders import jsonable_encoder
+from aioredis import Redis, RedisError
+from aioredis.commands import MultiExec
 
-from currency_converter_service.currency import Currency
+from currency_converter_service.cross_rates import derive_cross_rates
+from currency_converter_service.currency import (
+    CURRENCIES,
+    CURRENCY_BY_CODE,
+    Currency,
+    CurrencyPair,
+)
+from currency_converter_service.metrics import (
+    LoadMeter,
+    count_cache_lookups,
+    measure_redis_command,
+)
 from currency_converter_service.models import (
+    CrossExchangeRate,
+    CurrencyExchangeRates,
     CurrencyExchangeRatesLoadRequest,
+    DeltaLoadReport,
     ExchangeRate,
     LoadStatus,
 )
+from currency_converter_service.rate_matrix import RateMatrix
+
+from .rates_cache import ExchangeRatesCache, QuoteToExchangeRate
+from .rates_encoding import (
+    StorageFormat,
+    StoredValue,
+    decode_exchange_rate,
+    decode_exchange_rates,
+    decode_last_updated,
+    encode_exchange_rate,
+)
+from .replicas import ReplicaSet
+from .shared_rates import SharedRatesTable, SharedRatesUnavailable
+from .single_flight import SingleFlight
+
+LoadableExchangeRates = Tuple[str, Dict[str, StoredValue]]
+
+GENERATION_STORAGE_KEY = "exchange-rates-generation"
+UPDATES_CHANNEL = "exchange-rates-updates"
+
+STORAGE_KEY_PREFIX = "exchange-rates:"
+STAGING_KEY_PREFIX = "exchange-rates-staging:"
+HISTORY_KEY_PREFIX = "exchange-rates-history:"
+
+STORAGE_KEYS: Dict[Currency, str] = {
+    currency: intern(f"{STORAGE_KEY_PREFIX}{currency.value}") for currency in CURRENCIES
+}
+CURRENCY_BY_STORAGE_KEY: Dict[str, Currency] = {
+    storage_key: currency for currency, storage_key in STORAGE_KEYS.items()
+}
+
+CROSS_RATES = "cross-rates"
+RATE_MATRIX = "rate-matrix"
+RATE_MATRIX_WITH_CROSS_RATES = "rate-matrix-with-cross-rates"
+
+WARMUP_CHUNK_SIZE = 16
+
+# Drops history entries older than the newest one at or before ARGV[1], the
+# one still in effect at that time.
+PRUNE_HISTORY_SCRIPT = """
+local expired = redis.call("ZCOUNT", KEYS[1], "-inf", ARGV[1]) - 1
+if expired > 0 then
+    redis.call("ZREMRANGEBYRANK", KEYS[1], 0, expired - 1)
+end
+"""
+
+# Writes quotes of base currency hash KEYS[1] given as ARGV[4:] triples of
+# quote, serialized rate and its update time, skipping rates not newer than
+# stored ones. If any rate is written, moves rates generation KEYS[2] to
+# ARGV[1] and publishes update ARGV[3] to channel ARGV[2]. Only effective
+# writes are replicated. Returns written quotes.
+DELTA_LOAD_SCRIPT = """
+redis.replicate_commands()
+local applied, updates = {}, {}
+for i = 4, #ARGV, 3 do
+    local quote, last_updated = ARGV[i], tonumber(ARGV[i + 2])
+    local stored = redis.call("HGET", KEYS[1], quote)
+    local stored_last_updated
+    if stored and string.byte(stored, 1) == 1 then
+        stored_last_updated = struct.unpack(">i8", stored, 11)
+    elseif stored then
+        stored_last_updated = cjson.decode(stored)["last_updated"]
+    end
+    if not stored_last_updated or last_updated > stored_last_updated then
+        applied[#applied + 1] = quote
+        updates[#updates + 1] = quote
+        updates[#updates + 1] = ARGV[i + 1]
+    end
+end
+if #applied > 0 then
+    redis.call("HMSET", KEYS[1], unpack(updates))
+    redis.call("SET", KEYS[2], ARGV[1])
+    redis.call("PUBLISH", ARGV[2], ARGV[3])
+end
+return applied
+"""
+
+Derived = TypeVar("Derived")
+Item = TypeVar("Item")
 
-LoadableExchangeRates = Tuple[str, Dict[Currency, str]]
+ReadCommand = Tuple[str, Sequence[Any]]
 
 
 class CurrencyExchangeRatesStorage:
-    def __init__(self, connection_pool: Redis) -> None:
+    """Exchange rates stored in ``redis`` hashes, one per base currency.
+
+    Concurrent fetches of the same exchange rate, base currency rates, rates
+    generation or derived structure share one in-flight ``redis`` fetch and
+    decoded result.
+
+    With ``history_retention`` every loaded exchange rate is also kept in a
+    sorted set per currency pair scored by update time, once the load is
+    committed. Rates are kept for at least ``history_retention`` seconds after
+    they have been replaced by newer ones.
+
+    With ``shared_rates`` current rates are read from the table shared by all
+    workers of the host, falling back to cache and ``redis`` only while the
+    table can not answer. The table is kept in sync by a single process
+    running ``refresh_shared_rates``.
+
+    With ``write_connection_pool`` loads write through that pool only, so bulk
+    writes never hold connections conversions are waiting for.
+
+    With ``replicas`` current rates are read from replicas, while loads,
+    rates generation checks and history go to the primary. A replica answers
+    only while its rates generation is the expected one, the one cached or
+    the latest one this storage has seen, so loads are read right after they
+    are committed, even before replicas catch up.
+    """
+
+    def __init__(
+        self,
+        connection_pool: Redis,
+        cache: Optional[ExchangeRatesCache] = None,
+        max_cross_rate_legs: int = 3,
+        staging_ttl: int = 3600,
+        history_retention: Optional[int] = None,
+        shared_rates: Optional[SharedRatesTable] = None,
+        write_connection_pool: Optional[Redis] = None,
+        replicas: Optional[ReplicaSet] = None,
+    ) -> None:
         self._connection_pool = connection_pool
+        self._write_connection_pool = write_connection_pool or connection_pool
+        self._replicas = replicas
+        self._known_generation: Optional[str] = None
+        self._cache = cache
+        self._shared_rates = shared_rates
+        self._max_cross_rate_legs = max_cross_rate_legs
+        self._staging_ttl = staging_ttl
+        self._history_retention = history_retention
+        self._script_digests: Dict[str, StoredValue] = {}
+        self._exchange_rate_fetches: SingleFlight[
+            CurrencyPair, Optional[ExchangeRate]
+        ] = SingleFlight()
+        self._base_currency_fetches: SingleFlight[
+            Currency, QuoteToExchangeRate
+        ] = SingleFlight()
+        self._derived_fetches: SingleFlight[str, Any] = SingleFlight()
+        self._generation_fetches: SingleFlight[str, Optional[str]] = SingleFlight()
 
     async def fetch_exchange_rate(
         self, base_currency: Currency, quote_currency: Currency
     ) -> Optional[ExchangeRate]:
-        base_currency_storage_key = as_storage_key(base_currency)
-        serialized_rate = await self._connection_pool.hget(
-            base_currency_storage_key, quote_currency.value
+        if self._shared_rates is not None:
+            try:
+                return self._shared_rates.exchange_rate(base_currency, quote_currency)
+            except SharedRatesUnavailable:
+                pass
+
+        if self._cache is not None:
+            exchange_rates = await self._fetch_cached_exchange_rates(
+                self._cache, (base_currency,)
+            )
+            return exchange_rates[base_currency].get(quote_currency)
+
+        async def fetch() -> Optional[ExchangeRate]:
+            base_currency_storage_key = as_storage_key(base_currency)
+            with measure_redis_command("hget"):
+                (serialized_rate,) = await self._read(
+                    [("hget", (base_currency_storage_key, quote_currency.value))],
+                    pipelined=False,
+                )
+
+            currency_exchange_rate = None
+            if serialized_rate:
+                currency_exchange_rate = decode_exchange_rate(serialized_rate)
+
+            return currency_exchange_rate
+
+        return await self._exchange_rate_fetches.fetch(
+            (base_currency, quote_currency), fetch
         )
 
-        currency_exchange_rate = None
-        if serialized_rate:
-            currency_exchange_rate = ExchangeRate(**json.loads(serialized_rate))
+    async def fetch_exchange_rates(
+        self, currency_pairs: Iterable[CurrencyPair]
+    ) -> Dict[CurrencyPair, Optional[ExchangeRate]]:
+        """Fetch exchange rates of many currency pairs in a single round trip.
 
-        return currency_exchange_rate
+        Pairs are grouped by base currency, each base currency is resolved with
+        one ``HMGET`` and all of them are sent in one pipeline.
+        """
+        quotes_by_base: Dict[Currency, Dict[Currency, None]] = {}
+        for base_currency, quote_currency in currency_pairs:
+            quotes_by_base.setdefault(base_currency, {})[quote_currency] = None
+
+        cached_exchange_rates = self._read_shared_rates(quotes_by_base.keys())
+        if cached_exchange_rates is None and self._cache is not None:
+            cached_exchange_rates = await self._fetch_cached_exchange_rates(
+                self._cache, quotes_by_base.keys()
+            )
+        if cached_exchange_rates is not None:
+            return {
+                (base_currency, quote_currency): (
+                    cached_exchange_rates[base_currency].get(quote_currency)
+                )
+                for base_currency, quotes in quotes_by_base.items()
+                for quote_currency in quotes
+            }
+
+        with measure_redis_command("hmget"):
+            all_serialized_rates = await self._read(
+                [
+                    (
+                        "hmget",
+                        (
+                            as_storage_key(base_currency),
+                            *(quote.value for quote in quotes),
+                        ),
+                    )
+                    for base_currency, quotes in quotes_by_base.items()
+                ]
+            )
+
+        exchange_rates: Dict[CurrencyPair, Optional[ExchangeRate]] = {}
+        for (base_currency, quotes), serialized_rates in zip(
+            quotes_by_base.items(), all_serialized_rates
+        ):
+            for quote_currency, serialized_rate in zip(quotes, serialized_rates):
+                exchange_rates[base_currency, quote_currency] = (
+                    decode_exchange_rate(serialized_rate) if serialized_rate else None
+                )
+
+        return exchange_rates
+
+    async def fetch_all_rates(self, base_currency: Currency) -> QuoteToExchangeRate:
+        """Fetch exchange rates of ``base_currency`` to every stored quote.
+
+        Rates are fetched with a single ``HGETALL``. With cache enabled the
+        decoded rates are kept until rates generation changes.
+        """
+        shared_exchange_rates = self._read_shared_rates((base_currency,))
+        if shared_exchange_rates is not None:
+            return shared_exchange_rates[base_currency]
+
+        if self._cache is not None:
+            exchange_rates = await self._fetch_cached_exchange_rates(
+                self._cache, (base_currency,)
+            )
+            return exchange_rates[base_currency]
+
+        async def fetch() -> QuoteToExchangeRate:
+            with measure_redis_command("hgetall"):
+                (serialized_rates,) = await self._read(
+                    [("hgetall", (as_storage_key(base_currency),))], pipelined=False
+                )
+
+            return decode_exchange_rates(serialized_rates)
+
+        return await self._base_currency_fetches.fetch(base_currency, fetch)
+
+    async def fetch_all_exchange_rates(self) -> Dict[Currency, QuoteToExchangeRate]:
+        """Fetch rates of every base currency in a single pipeline."""
+        shared_exchange_rates = self._read_shared_rates(Currency)
+        if shared_exchange_rates is not None:
+            return {
+                base_currency: exchange_rates
+                for base_currency, exchange_rates in shared_exchange_rates.items()
+                if exchange_rates
+            }
+
+        if self._cache is not None:
+            return await self._fetch_cached_exchange_rates(self._cache, list(Currency))
+
+        with measure_redis_command("hgetall"):
+            all_serialized_rates = await self._read(
+                [
+                    ("hgetall", (as_storage_key(base_currency),))
+                    for base_currency in Currency
+                ]
+            )
+
+        return {
+            base_currency: decode_exchange_rates(serialized_rates)
+            for base_currency, serialized_rates in zip(Currency, all_serialized_rates)
+            if serialized_rates
+        }
+
+    async def fetch_generation(self) -> Optional[str]:
+        """Generation of rates current fetches read, ``None`` before any load.
+
+        Comes from shared rates table or cache when they are used, so checking
+        it does not touch rates themselves.
+        """
+        generation: Optional[StoredValue] = None
+        if self._shared_rates is not None:
+            generation = self._shared_rates.generation
+
+        cache = self._cache
+        if generation is None and cache is not None:
+            await self._revalidate(cache)
+            generation = cache.generation
+        elif generation is None:
+            generation = await self._generation_fetches.fetch(
+                GENERATION_STORAGE_KEY, self._fetch_generation
+            )
+
+        return None if generation is None else _as_str(generation)
+
+    async def fetch_cross_exchange_rate(
+        self, base_currency: Currency, quote_currency: Currency
+    ) -> Optional[CrossExchangeRate]:
+        """Fetch exchange rate derived through other stored exchange rates.
+
+        Cross rates are derived from the whole rates snapshot once per rates
+        generation when cache is enabled, and on every call otherwise.
+        """
+        cross_rates = await self.fetch_cross_exchange_rates()
+        return cross_rates.get((base_currency, quote_currency))
+
+    async def fetch_cross_exchange_rates(self) -> Dict[CurrencyPair, CrossExchangeRate]:
+        """Fetch all exchange rates derivable through stored exchange rates."""
+
+        async def derive() -> Dict[CurrencyPair, CrossExchangeRate]:
+            return derive_cross_rates(
+                await self.fetch_all_exchange_rates(), self._max_cross_rate_legs
+            )
+
+        return await self._fetch_derived(CROSS_RATES, derive)
+
+    async def fetch_rate_matrix(self, with_cross_rates: bool) -> RateMatrix:
+        """Fetch dense matrix of stored and, optionally, cross exchange rates.
+
+        Matrix is built once per rates generation when cache is enabled.
+        """
+
+        async def build() -> RateMatrix:
+            exchange_rates = await self.fetch_all_exchange_rates()
+            cross_rates = None
+            if with_cross_rates:
+                cross_rates = await self.fetch_cross_exchange_rates()
+
+            return RateMatrix.from_exchange_rates(exchange_rates, cross_rates)
+
+        name = RATE_MATRIX_WITH_CROSS_RATES if with_cross_rates else RATE_MATRIX
+        return await self._fetch_derived(name, build)
+
+    async def warm_up_cache(self, chunk_size: int = WARMUP_CHUNK_SIZE) -> None:
+        """Fill cache with rates of every base currency, a chunk per pipeline.
+
+        Requests arriving meanwhile wait for the chunk holding their base
+        currency at most, not for the whole table.
+        """
+        if self._cache is None:
+            return
+
+        currencies = iter(CURRENCIES)
+        while True:
+            base_currencies = list(islice(currencies, chunk_size))
+            if not base_currencies:
+                break
+
+            await self._fetch_cached_exchange_rates(self._cache, base_currencies)
 
     async def load_exchange_rates(
         self, loadable_exchange_rates: Iterable[LoadableExchangeRates], merge: bool
     ) -> LoadStatus:
+        """Load exchange rates merging them into or replacing stored ones.
+
+        Replacing rates are written to staging keys first and then swapped with
+        stored ones in a single short transaction, so readers never observe
+        partially loaded or missing rates.
+        """
+        return await self.load_exchange_rates_chunks(
+            _as_async_iterable([loadable_exchange_rates]), merge
+        )
+
+    async def load_exchange_rates_chunks(
+        self,
+        loadable_chunks: AsyncIterable[Iterable[LoadableExchangeRates]],
+        merge: bool,
+    ) -> LoadStatus:
+        """Load exchange rates chunk by chunk.
+
+        Merged chunks are loaded each in its own transaction, so chunks loaded
+        before a failure are kept in storage. Replacing chunks are all staged
+        and swapped with stored rates at once.
+        """
+        load_meter = LoadMeter("merge" if merge else "replace")
+        status = LoadStatus.FAILURE
+        try:
+            status = await self._load_exchange_rates_chunks(
+                load_meter.count_chunks(loadable_chunks), merge
+            )
+            return status
+        finally:
+            load_meter.observe(status)
+
+    async def _load_exchange_rates_chunks(
+        self,
+        loadable_chunks: AsyncIterable[Iterable[LoadableExchangeRates]],
+        merge: bool,
+    ) -> LoadStatus:
+        if not merge:
+            return await self._replace_exchange_rates(loadable_chunks)
+
+        status = LoadStatus.SUCCESS
+        async for loadable_exchange_rates in loadable_chunks:
+            status = await self._merge_exchange_rates(loadable_exchange_rates)
+            if status == LoadStatus.FAILURE:
+                break
+
+        return status
+
+    async def delta_load_exchange_rates(
+        self, loadable_exchange_rates: Iterable[LoadableExchangeRates]
+    ) -> DeltaLoadReport:
+        """Merge only exchange rates newer than stored ones of the same pair.
+
+        Update times are compared by ``redis`` itself, with one script call per
+        base currency, so unchanged rates resent by a feed are not rewritten
+        and rates generation changes only if some rate is written.
+        """
+        return await self.delta_load_exchange_rates_chunks(
+            _as_async_iterable([loadable_exchange_rates])
+        )
+
+    async def delta_load_exchange_rates_chunks(
+        self, loadable_chunks: AsyncIterable[Iterable[LoadableExchangeRates]]
+    ) -> DeltaLoadReport:
+        """Delta load exchange rates chunk by chunk, each in its own transaction.
+
+        Chunks loaded before a failure are kept in storage and counted.
+        """
+        load_meter = LoadMeter("delta")
+        report = DeltaLoadReport(status=LoadStatus.FAILURE)
+        try:
+            async for loadable_exchange_rates in load_meter.count_chunks(
+                loadable_chunks
+            ):
+                chunk_report = await self._delta_merge_exchange_rates(
+                    loadable_exchange_rates
+                )
+                report.applied += chunk_report.applied
+                report.skipped += chunk_report.skipped
+                if chunk_report.status == LoadStatus.FAILURE:
+                    return report
+
+            report.status = LoadStatus.SUCCESS
+            return report
+        finally:
+            load_meter.observe(report.status)
+
+    async def fetch_historical_exchange_rate(
+        self, base_currency: Currency, quote_currency: Currency, at: int
+    ) -> Optional[ExchangeRate]:
+        """Fetch exchange rate which was the latest one at ``at`` timestamp.
+
+        Looks up the rate with a single ``ZREVRANGEBYSCORE`` in O(log n).
+        """
+        with measure_redis_command("zrevrangebyscore"):
+            serialized_rates = await self._connection_pool.zrevrangebyscore(
+                as_history_key(base_currency, quote_currency.value),
+                max=at,
+                offset=0,
+                count=1,
+            )
+
+        currency_exchange_rate = None
+        if serialized_rates:
+            currency_exchange_rate = decode_exchange_rate(serialized_rates[0])
+
+        return currency_exchange_rate
+
+    async def import_history(
+        self, loadable_chunks: AsyncIterable[Iterable[LoadableExchangeRates]]
+    ) -> LoadStatus:
+        """Write historical exchange rates without touching current ones.
+
+        Each chunk is written in a single pipeline. Chunks written before a
+        failure are kept.
+        """
+        load_meter = LoadMeter("history")
+        status = LoadStatus.FAILURE
+        try:
+            async for loadable_exchange_rates in load_meter.count_chunks(
+                loadable_chunks
+            ):
+                if not await self._record_history(loadable_exchange_rates):
+                    return status
+
+            status = LoadStatus.SUCCESS
+            return status
+        finally:
+            load_meter.observe(status)
+
+    async def migrate_storage_format(self, storage_format: StorageFormat) -> LoadStatus:
+        """Rewrite stored exchange rates which are not in ``storage_format`` yet.
+
+        Rates are rewritten as a merging load, so it should not run concurrently
+        with other loads.
+        """
+        pipeline = self._write_connection_pool.pipeline()
+        for base_currency in Currency:
+            pipeline.hgetall(as_storage_key(base_currency))
+
+        all_serialized_rates = await pipeline.execute()
+
+        loadable_exchange_rates = []
+        for base_currency, serialized_rates in zip(Currency, all_serialized_rates):
+            quote_to_rate = {}
+            for quote, serialized_rate in serialized_rates.items():
+                encoded_rate = encode_exchange_rate(
+                    decode_exchange_rate(serialized_rate), storage_format
+                )
+                if _as_bytes(encoded_rate) != _as_bytes(serialized_rate):
+                    quote_code = quote.decode() if isinstance(quote, bytes) else quote
+                    quote_to_rate[quote_code] = encoded_rate
+
+            if quote_to_rate:
+                loadable_exchange_rates.append(
+                    (as_storage_key(base_currency), quote_to_rate)
+                )
+
+        if not loadable_exchange_rates:
+            return LoadStatus.SUCCESS
+
+        return await self._merge_exchange_rates(loadable_exchange_rates)
+
+    async def track_updates(self, retry_delay: float) -> None:
+        """Apply rates updates published by any worker to the cache.
+
+        Runs until cancelled and resubscribes after ``retry_delay`` seconds when
+        subscription is lost. Meanwhile cache falls back to generation polling.
+        """
+        cache = self._cache
+        if cache is None:
+            return
+
+        while True:
+            try:
+                (channel,) = await self._connection_pool.subscribe(UPDATES_CHANNEL)
+                cache.validate(await self._connection_pool.get(GENERATION_STORAGE_KEY))
+                cache.track_updates(True)
+
+                async for message in channel.iter():
+                    cache.apply_update(*decode_update(message))
+            except (RedisError, OSError):
+                pass
+            finally:
+                cache.track_updates(False)
+
+            await asyncio.sleep(retry_delay)
+
+    async def refresh_shared_rates(
+        self, shared_rates: SharedRatesTable, interval: float
+    ) -> None:
+        """Rewrite ``shared_rates`` after every rates update until cancelled.
+
+        Rates generation is also checked every ``interval`` seconds, so updates
+        missed while subscription is lost are picked up too, and the table is
+        marked as refreshed. Only one process per table may run it.
+        """
+        published = False
+        while True:
+            try:
+                (channel,) = await self._connection_pool.subscribe(UPDATES_CHANNEL)
+                while channel.is_active:
+                    generation = await self._fetch_generation()
+                    if isinstance(generation, bytes):
+                        generation = generation.decode()
+                    if not published or generation != shared_rates.generation:
+                        shared_rates.publish(*await self.fetch_snapshot())
+                        published = True
+                    shared_rates.touch()
+
+                    # Unlike wait_for, wait does not swallow a cancellation
+                    # arriving along with a message, which would keep the
+                    # refresher running.
+                    message = asyncio.ensure_future(channel.wait_message())
+                    try:
+                        await asyncio.wait((message,), timeout=interval)
+                    finally:
+                        message.cancel()
+                    if message.done() and message.result():
+                        await channel.get()
+            except (RedisError, OSError):
+                pass
+
+            await asyncio.sleep(interval)
+
+    async def fetch_snapshot(
+        self,
+    ) -> Tuple[Optional[str], Dict[Currency, QuoteToExchangeRate]]:
+        """Fetch rates generation and all rates of it in a single transaction."""
         transaction = self._connection_pool.multi_exec()
-        if merge is False:
-            transaction.flushdb()
+        transaction.get(GENERATION_STORAGE_KEY)
+        for base_currency in Currency:
+            transaction.hgetall(as_storage_key(base_currency))
 
-        for base_currency_key, quote_to_rate in loadable_exchange_rates:
+        with measure_redis_command("snapshot"):
+            generation, *all_serialized_rates = await transaction.execute()
+
+        exchange_rates = {
+            base_currency: decode_exchange_rates(serialized_rates)
+            for base_currency, serialized_rates in zip(Currency, all_serialized_rates)
+            if serialized_rates
+        }
+
+        return generation, exchange_rates
+
+    async def _merge_exchange_rates(
+        self, loadable_exchange_rates: Iterable[LoadableExchangeRates]
+    ) -> LoadStatus:
+        transaction = self._write_connection_pool.multi_exec()
+
+        merged_exchange_rates = list(coalesce(loadable_exchange_rates))
+        updated_base_currencies = set()
+        for base_currency_key, quote_to_rate in merged_exchange_rates:
             transaction.hmset_dict(base_currency_key, quote_to_rate)
+            updated_base_currencies.add(as_currency(base_currency_key))
 
-        results = await transaction.execute(return_exceptions=True)
+        status = await self._commit_generation(transaction, updated_base_currencies)
+        if status == LoadStatus.SUCCESS and not await self._record_history(
+            merged_exchange_rates
+        ):
+            status = LoadStatus.FAILURE
+
+        return status
+
+    async def _delta_merge_exchange_rates(
+        self, loadable_exchange_rates: Iterable[LoadableExchangeRates]
+    ) -> DeltaLoadReport:
+        """Delta load exchange rates in a single transaction.
+
+        Every base currency written moves rates generation to the same new one.
+        History is recorded for written rates only, once they are committed.
+        """
+        merged_exchange_rates = list(coalesce(loadable_exchange_rates))
+        if not merged_exchange_rates:
+            return DeltaLoadReport(status=LoadStatus.SUCCESS)
+
+        delta_load = await self._load_script(DELTA_LOAD_SCRIPT)
+        generation = uuid4().hex
+        transaction = self._write_connection_pool.multi_exec()
+
+        pending_loads = []
+        for base_currency_key, quote_to_rate in merged_exchange_rates:
+            base_currency = as_currency(base_currency_key)
+            arguments: List[Any] = [
+                generation,
+                UPDATES_CHANNEL,
+                encode_update(generation, [base_currency]),
+            ]
+            for quote, serialized_rate in quote_to_rate.items():
+                arguments += [
+                    quote,
+                    serialized_rate,
+                    decode_last_updated(serialized_rate),
+                ]
+
+            pending_quotes = transaction.evalsha(
+                delta_load, [base_currency_key, GENERATION_STORAGE_KEY], arguments
+            )
+            pending_loads.append((base_currency_key, quote_to_rate, pending_quotes))
+
+        with measure_redis_command("delta"):
+            results = await transaction.execute(return_exceptions=True)
+        if not self._check_script_results(results):
+            return DeltaLoadReport(status=LoadStatus.FAILURE)
+
+        applied_exchange_rates: List[LoadableExchangeRates] = []
+        for base_currency_key, quote_to_rate, pending_quotes in pending_loads:
+            applied_rates = {
+                _as_str(quote): quote_to_rate[_as_str(quote)]
+                for quote in pending_quotes.result()
+            }
+            if applied_rates:
+                applied_exchange_rates.append((base_currency_key, applied_rates))
+
+        rates_count = sum(len(rates) for _, rates in merged_exchange_rates)
+        applied_count = sum(len(rates) for _, rates in applied_exchange_rates)
+        report = DeltaLoadReport(
+            status=LoadStatus.SUCCESS,
+            applied=applied_count,
+            skipped=rates_count - applied_count,
+        )
+        if not applied_exchange_rates:
+            return report
+
+        self._known_generation = generation
+        if self._cache is not None:
+            self._cache.apply_update(
+                generation, [as_currency(key) for key, _ in applied_exchange_rates],
+            )
+        if not await self._record_history(applied_exchange_rates):
+            report.status = LoadStatus.FAILURE
+
+        return report
+
+    async def _replace_exchange_rates(
+        self, loadable_chunks: AsyncIterable[Iterable[LoadableExchangeRates]]
+    ) -> LoadStatus:
+        """Stage rates chunk by chunk and swap them with stored ones at once.
+
+        Every chunk refreshes TTL of all keys staged so far and fails the load
+        if any of them has expired meanwhile, so the swap never runs with
+        a staging key missing.
+        """
+        staging_generation = uuid4().hex
+        staged_base_currencies: Set[Currency] = set()
+        swapped = False
+        try:
+            async for loadable_exchange_rates in loadable_chunks:
+                pipeline = self._write_connection_pool.pipeline()
+                for base_currency_key, quote_to_rate in coalesce(
+                    loadable_exchange_rates
+                ):
+                    base_currency = as_currency(base_currency_key)
+                    staging_key = as_staging_key(staging_generation, base_currency)
+                    pipeline.hmset_dict(staging_key, quote_to_rate)
+                    staged_base_currencies.add(base_currency)
+
+                expirations = [
+                    pipeline.expire(
+                        as_staging_key(staging_generation, currency), self._staging_ttl
+                    )
+                    for currency in staged_base_currencies
+                ]
+                with measure_redis_command("stage"):
+                    results = await pipeline.execute(return_exceptions=True)
+                if any(isinstance(result, Exception) for result in results):
+                    return LoadStatus.FAILURE
+                if not all(expiration.result() for expiration in expirations):
+                    return LoadStatus.FAILURE
+
+            transaction = self._write_connection_pool.multi_exec()
+            for currency in Currency:
+                storage_key = as_storage_key(currency)
+                transaction.unlink(storage_key)
+                if currency in staged_base_currencies:
+                    transaction.rename(
+                        as_staging_key(staging_generation, currency), storage_key
+                    )
+                    transaction.persist(storage_key)
+
+            status = await self._commit_generation(transaction, None)
+            swapped = status == LoadStatus.SUCCESS
+            if swapped and not await self._record_swapped_history(
+                staged_base_currencies
+            ):
+                status = LoadStatus.FAILURE
+
+            return status
+        finally:
+            if not swapped and staged_base_currencies:
+                await self._write_connection_pool.unlink(
+                    *(
+                        as_staging_key(staging_generation, currency)
+                        for currency in staged_base_currencies
+                    )
+                )
+
+    async def _record_history(
+        self, loadable_exchange_rates: Iterable[LoadableExchangeRates]
+    ) -> bool:
+        """Add exchange rates to their history in a single pipeline.
+
+        A rate replaces another one of the same pair and update time. Entries
+        replaced by newer ones more than ``history_retention`` seconds ago
+        are dropped, the newest entry of a pair is always kept.
+        """
+        retention = self._history_retention
+        if retention is None:
+            return True
+
+        prune_history = await self._load_script(PRUNE_HISTORY_SCRIPT)
+        expired_before = int(time()) - retention
+        pipeline = self._write_connection_pool.pipeline()
+        for base_currency_key, quote_to_rate in loadable_exchange_rates:
+            base_currency = as_currency(base_currency_key)
+            for quote, serialized_rate in quote_to_rate.items():
+                history_key = as_history_key(base_currency, quote)
+                last_updated = decode_last_updated(serialized_rate)
+
+                pipeline.zremrangebyscore(history_key, last_updated, last_updated)
+                pipeline.zadd(history_key, last_updated, serialized_rate)
+                pipeline.evalsha(prune_history, [history_key], [expired_before])
+
+        with measure_redis_command("history"):
+            results = await pipeline.execute(return_exceptions=True)
+
+        return self._check_script_results(results)
+
+    async def _record_swapped_history(self, base_currencies: Set[Currency]) -> bool:
+        """Add rates swapped in by a replacing load to their history."""
+        if self._history_retention is None or not base_currencies:
+            return True
+
+        pipeline = self._write_connection_pool.pipeline()
+        storage_keys = [as_storage_key(currency) for currency in base_currencies]
+        for storage_key in storage_keys:
+            pipeline.hgetall(storage_key)
+
+        with measure_redis_command("hgetall"):
+            all_serialized_rates = await pipeline.execute(return_exceptions=True)
+        if any(isinstance(rates, Exception) for rates in all_serialized_rates):
+            return False
+
+        return await self._record_history(
+            (
+                (storage_key, {_as_str(quote): rate for quote, rate in rates.items()})
+                for storage_key, rates in zip(storage_keys, all_serialized_rates)
+            )
+        )
+
+    async def _load_script(self, script: str) -> StoredValue:
+        """Load Lua ``script`` once, returning its digest for ``EVALSHA``."""
+        digest = self._script_digests.get(script)
+        if digest is None:
+            digest = await self._write_connection_pool.script_load(script)
+            self._script_digests[script] = digest
+
+        return digest
+
+    def _check_script_results(self, results: List[Any]) -> bool:
+        """Check pipeline results, forgetting scripts if redis has lost them."""
+        if not any(isinstance(result, Exception) for result in results):
+            return True
+
+        self._script_digests.clear()
+        return False
+
+    async def _read(
+        self, commands: Sequence[ReadCommand], pipelined: bool = True
+    ) -> List[Any]:
+        """Execute read ``commands`` in one round trip, on a replica if possible.
+
+        Replica answers along with its rates generation, which has to be the
+        expected one. Otherwise, or when the replica fails, commands are sent
+        to the primary, learning its current generation. Without replicas
+        a single command is sent as is unless ``pipelined``.
+        """
+        if self._replicas is None:
+            return await _execute(self._connection_pool, commands, pipelined)
+
+        generation_command: ReadCommand = ("get", (GENERATION_STORAGE_KEY,))
+        replica = self._replicas.choose()
+        if replica is not None:
+            replica.in_flight += 1
+            try:
+                results = await _execute(
+                    replica.connection_pool, (generation_command, *commands), True
+                )
+            except RedisError:
+                pass
+            else:
+                if self._is_expected_generation(results[0]):
+                    return results[1:]
+            finally:
+                replica.in_flight -= 1
+
+        results = await _execute(
+            self._connection_pool, (generation_command, *commands), True
+        )
+        if results[0] is not None:
+            self._known_generation = _as_str(results[0])
+
+        return results[1:]
+
+    def _is_expected_generation(self, generation: Optional[StoredValue]) -> bool:
+        if self._cache is not None:
+            expected: Optional[StoredValue] = self._cache.generation
+        elif self._known_generation is None:
+            return True
+        else:
+            expected = self._known_generation
+
+        return generation == expected or (
+            generation is not None
+            and expected is not None
+            and _as_str(generation) == _as_str(expected)
+        )
+
+    async def _commit_generation(
+        self, transaction: MultiExec, base_currencies: Optional[Set[Currency]]
+    ) -> LoadStatus:
+        """Execute rates update transaction under a new rates generation.
+
+        ``None`` base currencies means that all rates are replaced.
+        """
+        generation = uuid4().hex
+        transaction.set(GENERATION_STORAGE_KEY, generation)
+        transaction.publish(UPDATES_CHANNEL, encode_update(generation, base_currencies))
+
+        with measure_redis_command("multi_exec"):
+            results = await transaction.execute(return_exceptions=True)
         succeeded = all(not isinstance(result, Exception) for result in results)
 
+        if succeeded:
+            self._known_generation = generation
+        if succeeded and self._cache is not None:
+            self._cache.apply_update(generation, base_currencies)
+
         return LoadStatus.SUCCESS if succeeded else LoadStatus.FAILURE
 
+    async def _fetch_derived(
+        self, name: str, derive: Callable[[], Awaitable[Derived]]
+    ) -> Derived:
+        """Fetch structure derived from whole rates snapshot.
+
+        Derived structure is cached until rates generation changes.
+        """
+        cache = self._cache
+        if cache is None:
+            return await derive()
+
+        await self._revalidate(cache)
+        derived = cache.get_derived(name)
+        if derived is not None:
+            return derived
+
+        return await self._derived_fetches.fetch(
+            name, partial(self._derive, cache, name, derive)
+        )
+
+    async def _derive(
+        self,
+        cache: ExchangeRatesCache,
+        name: str,
+        derive: Callable[[], Awaitable[Derived]],
+    ) -> Derived:
+        generation = cache.generation
+        derived = await derive()
+        cache.put_derived(name, derived, generation)
+
+        return derived
+
+    async def _revalidate(self, cache: ExchangeRatesCache) -> None:
+        if self._shared_rates is not None:
+            shared_generation = self._shared_rates.generation
+            if shared_generation is not None:
+                cache.validate(shared_generation)
+                return
+
+        if cache.is_stale():
+            cache.validate(
+                await self._generation_fetches.fetch(
+                    GENERATION_STORAGE_KEY, self._fetch_generation
+                )
+            )
+
+    async def _fetch_generation(self) -> Optional[str]:
+        with measure_redis_command("get"):
+            generation = await self._connection_pool.get(GENERATION_STORAGE_KEY)
+
+        return generation
+
+    def _read_shared_rates(
+        self, base_currencies: Iterable[Currency]
+    ) -> Optional[Dict[Currency, QuoteToExchangeRate]]:
+        """Read rates from shared table, ``None`` while it can not answer."""
+        if self._shared_rates is None:
+            return None
+
+        try:
+            return self._shared_rates.exchange_rates(base_currencies)
+        except SharedRatesUnavailable:
+            return None
+
+    async def _fetch_cached_exchange_rates(
+        self, cache: ExchangeRatesCache, base_currencies: Collection[Currency]
+    ) -> Dict[Currency, QuoteToExchangeRate]:
+        """Fetch all rates of base currencies missing in cache in one pipeline."""
+        await self._revalidate(cache)
+
+        exchange_rates: Dict[Currency, QuoteToExchangeRate] = {}
+        missing_base_currencies = []
+        for base_currency in base_currencies:
+            cached_exchange_rates = cache.get(base_currency)
+            if cached_exchange_rates is None:
+                missing_base_currencies.append(base_currency)
+            else:
+                exchange_rates[base_currency] = cached_exchange_rates
+
+        count_cache_lookups(
+            hits=len(exchange_rates), misses=len(missing_base_currencies),
+        )
+        if not missing_base_currencies:
+            return exchange_rates
+
+        async def fetch(
+            base_currencies: List[Currency],
+        ) -> Dict[Currency, QuoteToExchangeRate]:
+            generation = cache.generation
+            with measure_redis_command("hgetall"):
+                all_serialized_rates = await self._read(
+                    [
+                        ("hgetall", (as_storage_key(base_currency),))
+                        for base_currency in base_currencies
+                    ]
+                )
+
+            fetched_exchange_rates = {}
+            for base_currency, serialized_rates in zip(
+                base_currencies, all_serialized_rates
+            ):
+                fetched_exchange_rates[base_currency] = decode_exchange_rates(
+                    serialized_rates
+                )
+                cache.put(
+                    base_currency, fetched_exchange_rates[base_currency], generation
+                )
+
+            return fetched_exchange_rates
+
+        exchange_rates.update(
+            await self._base_currency_fetches.fetch_many(missing_base_currencies, fetch)
+        )
+
+        return exchange_rates
+
+
+async def _execute(
+    connection_pool: Redis, commands: Sequence[ReadCommand], pipelined: bool
+) -> List[Any]:
+    if not pipelined:
+        ((name, arguments),) = commands
+        return [await getattr(connection_pool, name)(*arguments)]
+
+    pipeline = connection_pool.pipeline()
+    for name, arguments in commands:
+        getattr(pipeline, name)(*arguments)
+
+    return await pipeline.execute()
+
 
 def as_storage_key(currency: Currency) -> str:
-    storage_key = f"exchange-rates:{currency.value}"
+    storage_key = STORAGE_KEYS[currency]
     return storage_key
 
 
+def as_staging_key(staging_generation: str, currency: Currency) -> str:
+    staging_key = f"{STAGING_KEY_PREFIX}{staging_generation}:{currency.value}"
+    return staging_key
+
+
+def as_history_key(base_currency: Currency, quote: str) -> str:
+    history_key = f"{HISTORY_KEY_PREFIX}{base_currency.value}:{quote}"
+    return history_key
+
+
+def as_currency(storage_key: str) -> Currency:
+    currency = CURRENCY_BY_STORAGE_KEY[storage_key]
+    return currency
+
+
+def _as_bytes(value: StoredValue) -> bytes:
+    return value.encode() if isinstance(value, str) else value
+
+
+def _as_str(value: StoredValue) -> str:
+    return value.decode() if isinstance(value, bytes) else value
+
+
+async def _as_async_iterable(items: Iterable[Item]) -> AsyncIterator[Item]:
+    for item in items:
+        yield item
+
+
+def encode_update(
+    generation: str, base_currencies: Optional[Iterable[Currency]]
+) -> str:
+    codes = None
+    if base_currencies is not None:
+        codes = sorted(currency.value for currency in base_currencies)
+
+    return json.dumps({"generation": generation, "base_currencies": codes})
+
+
+def decode_update(message: StoredValue) -> Tuple[str, Optional[List[Currency]]]:
+    update = json.loads(message)
+
+    base_currencies = None
+    if update["base_currencies"] is not None:
+        base_currencies = [CURRENCY_BY_CODE[code] for code in update["base_currencies"]]
+
+    return update["generation"], base_currencies
+
+
+def coalesce(
+    loadable_exchange_rates: Iterable[LoadableExchangeRates],
+) -> Iterator[LoadableExchangeRates]:
+    """Merge consecutive rates of the same base currency into a single write."""
+    current_key: Optional[str] = None
+    current_quotes: Dict[str, StoredValue] = {}
+    for base_currency_key, quote_to_rate in loadable_exchange_rates:
+        if base_currency_key != current_key:
+            if current_key is not None:
+                yield current_key, current_quotes
+
+            current_key, current_quotes = base_currency_key, {}
+
+        current_quotes.update(quote_to_rate)
+
+    if current_key is not None:
+        yield current_key, current_quotes
+
+
 def preprocess(
     request: CurrencyExchangeRatesLoadRequest,
+    storage_format: StorageFormat = StorageFormat.JSON,
 ) -> Iterator[LoadableExchangeRates]:
     """Preprocess currency exchange rates to make it loadable to storage."""
     for currency_exchange_rates in request.currency_exchange_rates:
         base_currency_storage_key = as_storage_key(currency_exchange_rates.base)
 
         for quote, rate_info in currency_exchange_rates.quotes.items():
-            quote_to_rate_info = {quote.value: json.dumps(jsonable_encoder(rate_info))}
+            quote_to_rate_info = {
+                quote.value: encode_exchange_rate(rate_info, storage_format)
+            }
 
             yield base_currency_storage_key, quote_to_rate_info
+
+
+async def preprocess_stream(
+    stream: AsyncIterable[CurrencyExchangeRates],
+    chunk_size: int,
+    storage_format: StorageFormat = StorageFormat.JSON,
+) -> AsyncIterator[List[LoadableExchangeRates]]:
+    """Preprocess streamed currency exchange rates into bounded loadable chunks.
+
+    Each base currency makes a single write, a chunk holds about ``chunk_size``
+    exchange rates.
+    """
+    chunk: List[LoadableExchangeRates] = []
+    chunk_rates_count = 0
+    async for currency_exchange_rates in stream:
+        if not currency_exchange_rates.quotes:
+            continue
+
+        chunk.append(
+            (
+                as_storage_key(currency_exchange_rates.base),
+                {
+                    quote.value: encode_exchange_rate(rate_info, storage_format)
+                    for quote, rate_info in currency_exchange_rates.quotes.items()
+                },
+            )
+        )
+        chunk_rates_count += len(currency_exchange_rates.quotes)
+
+        if chunk_rates_count >= chunk_size:
+            yield chunk
+            chunk, chunk_rates_count = [], 0
+
+    if chunk:
+        yield chunk
@@ -0,0 +1,52 @@
+from typing import List, Optional, Sequence
+
+from aioredis import Redis
+
+from .database import CircuitBreaker
+
+
+class Replica:
+    """Read replica of the primary ``redis`` guarded by its own breaker."""
+
+    def __init__(self, connection_pool: Redis, circuit_breaker: CircuitBreaker) -> None:
+        self.connection_pool = connection_pool
+        self.circuit_breaker = circuit_breaker
+        self.in_flight = 0
+
+    @property
+    def is_available(self) -> bool:
+        """Whether the breaker lets a call through, probes included."""
+        return self.circuit_breaker.retry_after == 0.0
+
+
+class ReplicaSet:
+    """Read replicas of the primary ``redis``, balanced by health and load.
+
+    Reads go to the available replica with the fewest reads in flight, ties
+    are broken in turns. A replica is unavailable while its circuit breaker
+    is open, i.e. after consecutive failures, until its next probe is due.
+    """
+
+    def __init__(self, replicas: Sequence[Replica]) -> None:
+        self._replicas = list(replicas)
+        self._turn = 0
+
+    @property
+    def replicas(self) -> List[Replica]:
+        return list(self._replicas)
+
+    def choose(self) -> Optional[Replica]:
+        """Replica to read from, ``None`` while every replica is unavailable."""
+        available = [replica for replica in self._replicas if replica.is_available]
+        if not available:
+            return None
+
+        self._turn = (self._turn + 1) % len(available)
+        _, replica = min(
+            enumerate(available),
+            key=lambda indexed: (
+                indexed[1].in_flight,
+                (indexed[0] - self._turn) % len(available),
+            ),
+        )
+        return replica
@@ -0,0 +1,257 @@
+import mmap
+import os
+import struct
+from decimal import Decimal
+from time import time
+from typing import Dict, Iterable, Mapping, Optional
+
+from currency_converter_service.currency import CURRENCIES, CURRENCY_INDEX, Currency
+from currency_converter_service.models import ExchangeRate
+
+from .rates_cache import QuoteToExchangeRate
+from .rates_encoding import (
+    BINARY_EXCHANGE_RATE,
+    BINARY_FORMAT_MARKER,
+    StorageFormat,
+    StoredValue,
+    encode_exchange_rate,
+)
+
+MAGIC = b"RATES001"
+HEADER = struct.Struct("<8sI4xQd")
+SEQUENCE = struct.Struct("<Q")
+SEQUENCE_OFFSET = 16
+REFRESHED_AT = struct.Struct("<d")
+REFRESHED_AT_OFFSET = 24
+BUFFERS_OFFSET = 64
+
+GENERATION = struct.Struct("32s")
+ENTRY = struct.Struct("18s")
+
+ROW_EMPTY, ROW_STORED, ROW_UNAVAILABLE = 0, 1, 2
+
+MAX_READ_ATTEMPTS = 8
+
+
+class SharedRatesUnavailable(LookupError):
+    """Shared rates table can not answer, rates have to be read from storage."""
+
+
+class SharedRatesTable:
+    """Exchange rates table in a memory-mapped file shared by all workers.
+
+    Rates are indexed by ``Currency`` ordinal pair, so a lookup reads a single
+    fixed-size entry right from shared memory. The table is double-buffered
+    and guarded by a sequence number, odd while a write is in progress and
+    counting two per write. A writer fills the buffer readers do not use and
+    then bumps the sequence switching readers to it. Readers never wait for
+    writers, a read is retried only if the writer has started overwriting
+    the read buffer meanwhile, i.e. the next write has begun.
+
+    Rates not fitting the 18-byte binary format mark their base currency row
+    as unavailable. Whole table is unavailable before the first write and,
+    with ``max_age``, when the writer has not refreshed it for ``max_age``
+    seconds, e.g. because it is gone.
+    """
+
+    def __init__(
+        self, path: str, max_age: Optional[float] = None, writable: bool = False
+    ) -> None:
+        self._max_age = max_age
+        currencies_count = len(CURRENCIES)
+        self._row_size = currencies_count * ENTRY.size
+        self._rows_offset = GENERATION.size
+        self._entries_offset = GENERATION.size + currencies_count
+        self._buffer_size = self._entries_offset + currencies_count * self._row_size
+        size = BUFFERS_OFFSET + 2 * self._buffer_size
+
+        header = HEADER.pack(MAGIC, currencies_count, 0, 0.0)
+        flags = os.O_RDWR | os.O_CREAT if writable else os.O_RDONLY
+        descriptor = os.open(path, flags, 0o644)
+        try:
+            if writable and (
+                os.fstat(descriptor).st_size != size
+                or os.pread(descriptor, SEQUENCE_OFFSET, 0) != header[:SEQUENCE_OFFSET]
+            ):
+                os.ftruncate(descriptor, 0)
+                os.ftruncate(descriptor, size)
+                os.pwrite(descriptor, header, 0)
+
+            self._memory = mmap.mmap(
+                descriptor,
+                size,
+                access=mmap.ACCESS_WRITE if writable else mmap.ACCESS_READ,
+            )
+        finally:
+            os.close(descriptor)
+
+        if self._memory[:SEQUENCE_OFFSET] != header[:SEQUENCE_OFFSET]:
+            self._memory.close()
+            raise ValueError(f"{path} is not a shared rates table of this version")
+
+    @classmethod
+    def create(cls, path: str) -> "SharedRatesTable":
+        """Open table for writing, resetting it if its layout has changed."""
+        return cls(path, writable=True)
+
+    @property
+    def generation(self) -> Optional[str]:
+        """Rates generation readers currently see, ``None`` before first write."""
+        for _ in range(MAX_READ_ATTEMPTS):
+            written = self._written()
+            if not written:
+                return None
+
+            offset = self._buffer_offset(written)
+            (generation,) = GENERATION.unpack_from(self._memory, offset)
+            if not self._overwritten(written):
+                return generation.decode().rstrip() or None
+
+        return None
+
+    def exchange_rate(
+        self, base_currency: Currency, quote_currency: Currency
+    ) -> Optional[ExchangeRate]:
+        base_ordinal = CURRENCY_INDEX[base_currency]
+        entry_offset = (
+            self._entries_offset
+            + base_ordinal * self._row_size
+            + CURRENCY_INDEX[quote_currency] * ENTRY.size
+        )
+        for _ in range(MAX_READ_ATTEMPTS):
+            written = self._written()
+            if not written:
+                break
+
+            offset = self._buffer_offset(written)
+            row = self._memory[offset + self._rows_offset + base_ordinal]
+            exchange_rate = self._read_entry(offset + entry_offset)
+            if self._overwritten(written):
+                continue
+
+            if row == ROW_UNAVAILABLE:
+                break
+
+            return exchange_rate
+
+        raise SharedRatesUnavailable(base_currency)
+
+    def exchange_rates(
+        self, base_currencies: Iterable[Currency]
+    ) -> Dict[Currency, QuoteToExchangeRate]:
+        """Read all rates of ``base_currencies`` from a single table snapshot."""
+        base_currencies = list(base_currencies)
+        for _ in range(MAX_READ_ATTEMPTS):
+            written = self._written()
+            if not written:
+                break
+
+            offset = self._buffer_offset(written)
+            exchange_rates = {}
+            available = True
+            for base_currency in base_currencies:
+                base_ordinal = CURRENCY_INDEX[base_currency]
+                row = self._memory[offset + self._rows_offset + base_ordinal]
+                available = available and row != ROW_UNAVAILABLE
+                exchange_rates[base_currency] = (
+                    self._read_row(offset, base_ordinal) if row == ROW_STORED else {}
+                )
+
+            if self._overwritten(written):
+                continue
+
+            if not available:
+                break
+
+            return exchange_rates
+
+        raise SharedRatesUnavailable(*base_currencies)
+
+    def publish(
+        self,
+        generation: Optional[StoredValue],
+        exchange_rates: Mapping[Currency, Mapping[Currency, ExchangeRate]],
+    ) -> None:
+        """Write rates of ``generation`` and switch readers to them.
+
+        There must be a single writer.
+        """
+        written = self._written() + 1
+        offset = self._buffer_offset(written)
+
+        if isinstance(generation, str):
+            generation = generation.encode()
+
+        buffer = bytearray(self._buffer_size)
+        GENERATION.pack_into(buffer, 0, (generation or b"").ljust(GENERATION.size))
+        for base_currency, quote_to_rate in exchange_rates.items():
+            base_ordinal = CURRENCY_INDEX[base_currency]
+            row = ROW_STORED if quote_to_rate else ROW_EMPTY
+            for quote_currency, exchange_rate in quote_to_rate.items():
+                entry = encode_exchange_rate(exchange_rate, StorageFormat.BINARY)
+                if not isinstance(entry, bytes):
+                    row = ROW_UNAVAILABLE
+                    break
+
+                entry_offset = (
+                    self._entries_offset
+                    + base_ordinal * self._row_size
+                    + CURRENCY_INDEX[quote_currency] * ENTRY.size
+                )
+                ENTRY.pack_into(buffer, entry_offset, entry)
+
+            buffer[self._rows_offset + base_ordinal] = row
+
+        SEQUENCE.pack_into(self._memory, SEQUENCE_OFFSET, 2 * written - 1)
+        self._memory.seek(offset)
+        self._memory.write(buffer)
+        SEQUENCE.pack_into(self._memory, SEQUENCE_OFFSET, 2 * written)
+        self.touch()
+
+    def touch(self) -> None:
+        """Mark table as refreshed by its writer."""
+        REFRESHED_AT.pack_into(self._memory, REFRESHED_AT_OFFSET, time())
+
+    def close(self) -> None:
+        self._memory.close()
+
+    def _sequence(self) -> int:
+        (sequence,) = SEQUENCE.unpack_from(self._memory, SEQUENCE_OFFSET)
+        return sequence
+
+    def _written(self) -> int:
+        """Number of completed writes, the last one is read, 0 if outdated."""
+        if self._max_age is not None:
+            refreshed_at = REFRESHED_AT.unpack_from(self._memory, REFRESHED_AT_OFFSET)
+            if time() - refreshed_at[0] > self._max_age:
+                return 0
+
+        return self._sequence() // 2
+
+    def _overwritten(self, written: int) -> bool:
+        """Whether the write after ``written`` one has started, reusing its buffer."""
+        return self._sequence() > 2 * written + 2
+
+    def _buffer_offset(self, written: int) -> int:
+        return BUFFERS_OFFSET + (written & 1) * self._buffer_size
+
+    def _read_entry(self, offset: int) -> Optional[ExchangeRate]:
+        if self._memory[offset] != BINARY_FORMAT_MARKER[0]:
+            return None
+
+        coefficient, exponent, last_updated = BINARY_EXCHANGE_RATE.unpack_from(
+            self._memory, offset + 1
+        )
+        return ExchangeRate.construct(
+            rate=Decimal(coefficient).scaleb(exponent), last_updated=last_updated
+        )
+
+    def _read_row(self, offset: int, base_ordinal: int) -> QuoteToExchangeRate:
+        row_offset = offset + self._entries_offset + base_ordinal * self._row_size
+        exchange_rates = {}
+        for quote_ordinal, quote_currency in enumerate(CURRENCIES):
+            exchange_rate = self._read_entry(row_offset + quote_ordinal * ENTRY.size)
+            if exchange_rate is not None:
+                exchange_rates[quote_currency] = exchange_rate
+
+        return exchange_rates
@@ -0,0 +1,71 @@
+import asyncio
+from functools import partial
+from typing import (
+    Awaitable,
+    Callable,
+    Dict,
+    Generic,
+    Hashable,
+    Iterable,
+    List,
+    Mapping,
+    TypeVar,
+)
+
+Key = TypeVar("Key", bound=Hashable)
+Value = TypeVar("Value")
+
+
+class SingleFlight(Generic[Key, Value]):
+    """Shares in-flight fetches among concurrent callers asking for same keys.
+
+    A fetch started for some keys is awaited by every caller asking for any of
+    them until it completes, and its result or error is shared. Cancelled
+    callers do not cancel a shared fetch.
+    """
+
+    def __init__(self) -> None:
+        self._fetches: Dict[Key, "asyncio.Future[Mapping[Key, Value]]"] = {}
+
+    async def fetch(self, key: Key, fetch: Callable[[], Awaitable[Value]]) -> Value:
+        async def fetch_one(keys: List[Key]) -> Mapping[Key, Value]:
+            return {key: await fetch()}
+
+        values = await self.fetch_many((key,), fetch_one)
+        return values[key]
+
+    async def fetch_many(
+        self,
+        keys: Iterable[Key],
+        fetch: Callable[[List[Key]], Awaitable[Mapping[Key, Value]]],
+    ) -> Dict[Key, Value]:
+        """Fetch values of ``keys`` joining fetches already in flight.
+
+        ``fetch`` is called once with keys nobody fetches yet and must return
+        values of all of them.
+        """
+        keys = list(dict.fromkeys(keys))
+        missing_keys = [key for key in keys if key not in self._fetches]
+        if missing_keys:
+            pending_values = asyncio.ensure_future(fetch(missing_keys))
+            for key in missing_keys:
+                self._fetches[key] = pending_values
+            pending_values.add_done_callback(partial(self._forget, missing_keys))
+
+        shared_fetches = {key: self._fetches[key] for key in keys}
+
+        values = {}
+        for key, shared_fetch in shared_fetches.items():
+            values[key] = (await asyncio.shield(shared_fetch))[key]
+
+        return values
+
+    def __len__(self) -> int:
+        return len(self._fetches)
+
+    def _forget(
+        self, keys: List[Key], pending_values: "asyncio.Future[Mapping[Key, Value]]"
+    ) -> None:
+        for key in keys:
+            if self._fetches.get(key) is pending_values:
+                del self._fetches[key]
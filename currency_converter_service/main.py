@@ -1,66 +1,432 @@
+import asyncio
+import csv
+import logging
 from decimal import Decimal
+from math import ceil, isnan
+from tempfile import SpooledTemporaryFile
+from typing import (
+    Any,
+    AsyncIterable,
+    AsyncIterator,
+    Dict,
+    Iterable,
+    List,
+    Optional,
+    Union,
+)
 
-from aioredis import Redis
-from fastapi import Depends, FastAPI, HTTPException, Query
-from starlette.responses import RedirectResponse
-from starlette.status import HTTP_201_CREATED, HTTP_400_BAD_REQUEST, HTTP_404_NOT_FOUND
+from aioredis import Redis, RedisError
+from fastapi import Depends, FastAPI, Header, HTTPException, Query
+from pydantic import ValidationError
+from starlette.requests import Request
+from starlette.responses import (
+    JSONResponse,
+    RedirectResponse,
+    Response,
+    StreamingResponse,
+)
+from starlette.status import (
+    HTTP_201_CREATED,
+    HTTP_202_ACCEPTED,
+    HTTP_304_NOT_MODIFIED,
+    HTTP_400_BAD_REQUEST,
+    HTTP_404_NOT_FOUND,
+    HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+    HTTP_422_UNPROCESSABLE_ENTITY,
+    HTTP_429_TOO_MANY_REQUESTS,
+    HTTP_503_SERVICE_UNAVAILABLE,
+)
 
-from currency_converter_service.config import APP_NAME, DATABASE_URI, DEBUG
-from currency_converter_service.currency import Currency
-from currency_converter_service.currency_converter import calculate_conversion
+from currency_converter_service.admission import AdmissionLimiter, AdmissionMiddleware
+from currency_converter_service.config import (
+    ADMISSION_CONTROL_ENABLED,
+    ADMISSION_MAX_WAIT,
+    ADMISSION_RETRY_AFTER,
+    APP_NAME,
+    BATCH_CONVERT_MAX_SIZE,
+    CONVERSION_ENGINE,
+    CONVERSION_ROUNDING,
+    CONVERT_CSV_CHUNK_SIZE,
+    CONVERT_CSV_SPOOL_SIZE,
+    CONVERT_MAX_IN_FLIGHT,
+    CONVERT_MAX_WAITING,
+    CROSS_RATES_ENABLED,
+    CROSS_RATES_MAX_LEGS,
+    DATABASE_AUTO_PIPELINING,
+    DATABASE_COMMAND_TIMEOUT,
+    DATABASE_CONNECT_TIMEOUT,
+    DATABASE_FAILURE_THRESHOLD,
+    DATABASE_HEALTH_CHECK_INTERVAL,
+    DATABASE_MAX_RETRY_BACKOFF,
+    DATABASE_POOL_MAX_SIZE,
+    DATABASE_POOL_MIN_SIZE,
+    DATABASE_REPLICA_URIS,
+    DATABASE_RETRY_BACKOFF,
+    DATABASE_URI,
+    DATABASE_WRITE_POOL_MAX_SIZE,
+    DEBUG,
+    DOCS_ENABLED,
+    FAST_RESPONSES_ENABLED,
+    HISTORY_ENABLED,
+    HISTORY_RETENTION,
+    HTTP_CACHE_MAX_AGE,
+    HTTP_CACHING_ENABLED,
+    LOAD_BATCH_MAX_SIZE,
+    LOAD_CHUNK_SIZE,
+    LOAD_JOB_TTL,
+    LOAD_MAX_IN_FLIGHT,
+    LOAD_MAX_LINE_LENGTH,
+    LOAD_MAX_WAITING,
+    LOAD_QUEUE_MAX_SIZE,
+    LOAD_STAGING_TTL,
+    RATES_CACHE_ENABLED,
+    RATES_CACHE_MAX_SIZE,
+    RATES_CACHE_TTL,
+    RATES_CACHE_UPDATES_ENABLED,
+    RATES_CACHE_UPDATES_RETRY_DELAY,
+    RATES_CACHE_WARMUP_ENABLED,
+    RATES_STORAGE_FORMAT,
+    SHARED_RATES_ENABLED,
+    SHARED_RATES_PATH,
+    SHARED_RATES_REFRESH_INTERVAL,
+)
+from currency_converter_service.csv_conversion import ExchangeRateLookup, convert_csv
+from currency_converter_service.currency import CURRENCY_INDEX, Currency, CurrencyPair
+from currency_converter_service.currency_converter import (
+    ConversionEngine,
+    as_conversion,
+)
 from currency_converter_service.dependencies import (
+    CircuitBreaker,
     CurrencyExchangeRatesStorage,
+    DatabaseUnavailable,
+    ExchangeRatesCache,
+    IngestionQueue,
+    Replica,
+    ReplicaSet,
+    SharedRatesTable,
+    check_health,
     create_connection_pool,
-    preprocess,
+    preprocess_stream,
 )
+from currency_converter_service.metrics import MetricsMiddleware, metrics_response
 from currency_converter_service.models import (
+    CrossExchangeRate,
+    CurrencyExchangeBatchConvertRequest,
+    CurrencyExchangeBatchConvertResponse,
+    CurrencyExchangeConvertRequest,
     CurrencyExchangeConvertResponse,
+    CurrencyExchangeHistoryImportResponse,
+    CurrencyExchangeLoadJob,
     CurrencyExchangeLoadResponse,
+    CurrencyExchangeRates,
     CurrencyExchangeRatesLoadRequest,
+    ExchangeRate,
+)
+from currency_converter_service.rate_matrix import as_decimal
+from currency_converter_service.responses import (
+    ConversionResponse,
+    as_etag,
+    etag_matches,
 )
+from currency_converter_service.streaming import LineTooLong, iter_file, iter_lines
+
+CONVERT_ROUTES = ("/convert", "/convert/batch", "/convert/quotes", "/convert/csv")
+LOAD_ROUTES = ("/database", "/database/stream", "/history")
 
-app: FastAPI = FastAPI(title=APP_NAME, debug=DEBUG)
+logger = logging.getLogger(__name__)
+
+app: FastAPI = FastAPI(
+    title=APP_NAME,
+    debug=DEBUG,
+    openapi_url="/openapi.json" if DOCS_ENABLED else None,
+    docs_url="/docs" if DOCS_ENABLED else None,
+    redoc_url="/redoc" if DOCS_ENABLED else None,
+)
+
+# Every route gets its own limiter, conversions ones admitting many more
+# requests than bulk loads which are cheap to retry.
+admission_limiters: Dict[str, AdmissionLimiter] = {}
+if ADMISSION_CONTROL_ENABLED:
+    for path in CONVERT_ROUTES:
+        admission_limiters[path] = AdmissionLimiter(
+            CONVERT_MAX_IN_FLIGHT,
+            CONVERT_MAX_WAITING,
+            ADMISSION_MAX_WAIT,
+            ADMISSION_RETRY_AFTER,
+        )
+    for path in LOAD_ROUTES:
+        admission_limiters[path] = AdmissionLimiter(
+            LOAD_MAX_IN_FLIGHT,
+            LOAD_MAX_WAITING,
+            ADMISSION_MAX_WAIT,
+            ADMISSION_RETRY_AFTER,
+        )
+app.add_middleware(AdmissionMiddleware, limiters=admission_limiters)
+app.add_middleware(MetricsMiddleware, routes=app.routes)
 
 connection_pool: Redis
+write_connection_pool: Redis
+circuit_breaker: CircuitBreaker
+shared_rates: Optional[SharedRatesTable] = None
 currency_exchange_rates_storage: CurrencyExchangeRatesStorage
+ingestion_queue: IngestionQueue
+rates_updates_tracker: Optional[asyncio.Future] = None
+rates_cache_warmer: Optional[asyncio.Future] = None
+health_checker: Optional[asyncio.Future] = None
+replicas: Optional[ReplicaSet] = None
+replicas_health_checkers: List[asyncio.Future] = []
+ingestion_worker: Optional[asyncio.Future] = None
 
 
 @app.on_event("startup")
 async def startup() -> None:
+    global circuit_breaker
+    circuit_breaker = CircuitBreaker(
+        failure_threshold=DATABASE_FAILURE_THRESHOLD,
+        backoff=DATABASE_RETRY_BACKOFF,
+        max_backoff=DATABASE_MAX_RETRY_BACKOFF,
+    )
+
     global connection_pool
-    connection_pool = await create_connection_pool(DATABASE_URI)
+    connection_pool = await create_connection_pool(
+        DATABASE_URI,
+        min_size=DATABASE_POOL_MIN_SIZE,
+        max_size=DATABASE_POOL_MAX_SIZE,
+        connect_timeout=DATABASE_CONNECT_TIMEOUT,
+        command_timeout=DATABASE_COMMAND_TIMEOUT,
+        circuit_breaker=circuit_breaker,
+        auto_pipelining=DATABASE_AUTO_PIPELINING,
+    )
+
+    global write_connection_pool
+    write_connection_pool = await create_connection_pool(
+        DATABASE_URI,
+        min_size=min(DATABASE_POOL_MIN_SIZE, DATABASE_WRITE_POOL_MAX_SIZE),
+        max_size=DATABASE_WRITE_POOL_MAX_SIZE,
+        connect_timeout=DATABASE_CONNECT_TIMEOUT,
+        command_timeout=DATABASE_COMMAND_TIMEOUT,
+        circuit_breaker=circuit_breaker,
+        watched=False,
+    )
+
+    global health_checker
+    health_checker = asyncio.ensure_future(
+        check_health(connection_pool, interval=DATABASE_HEALTH_CHECK_INTERVAL)
+    )
+
+    global replicas
+    if DATABASE_REPLICA_URIS:
+        replicas = await create_replicas(DATABASE_REPLICA_URIS)
+        for replica in replicas.replicas:
+            replicas_health_checkers.append(
+                asyncio.ensure_future(
+                    check_health(
+                        replica.connection_pool,
+                        interval=DATABASE_HEALTH_CHECK_INTERVAL,
+                    )
+                )
+            )
+
+    cache = None
+    if RATES_CACHE_ENABLED:
+        cache = ExchangeRatesCache(ttl=RATES_CACHE_TTL, max_size=RATES_CACHE_MAX_SIZE)
+
+    global shared_rates
+    if SHARED_RATES_ENABLED:
+        shared_rates = SharedRatesTable(
+            SHARED_RATES_PATH, max_age=3 * SHARED_RATES_REFRESH_INTERVAL
+        )
 
     global currency_exchange_rates_storage
-    currency_exchange_rates_storage = CurrencyExchangeRatesStorage(connection_pool)
+    currency_exchange_rates_storage = CurrencyExchangeRatesStorage(
+        connection_pool,
+        cache=cache,
+        max_cross_rate_legs=CROSS_RATES_MAX_LEGS,
+        staging_ttl=LOAD_STAGING_TTL,
+        history_retention=HISTORY_RETENTION if HISTORY_ENABLED else None,
+        shared_rates=shared_rates,
+        write_connection_pool=write_connection_pool,
+        replicas=replicas,
+    )
+
+    global ingestion_queue, ingestion_worker
+    ingestion_queue = IngestionQueue(
+        currency_exchange_rates_storage,
+        write_connection_pool,
+        max_size=LOAD_QUEUE_MAX_SIZE,
+        batch_size=LOAD_BATCH_MAX_SIZE,
+        job_ttl=LOAD_JOB_TTL,
+        storage_format=RATES_STORAGE_FORMAT,
+    )
+    ingestion_worker = asyncio.ensure_future(ingestion_queue.run())
+
+    if cache is not None and RATES_CACHE_UPDATES_ENABLED:
+        global rates_updates_tracker
+        rates_updates_tracker = asyncio.ensure_future(
+            currency_exchange_rates_storage.track_updates(
+                retry_delay=RATES_CACHE_UPDATES_RETRY_DELAY
+            )
+        )
+
+    if cache is not None and RATES_CACHE_WARMUP_ENABLED:
+        global rates_cache_warmer
+        rates_cache_warmer = asyncio.ensure_future(warm_up_rates_cache())
 
 
 @app.on_event("shutdown")
 async def shutdown() -> None:
-    global connection_pool
-    connection_pool.close()
-    await connection_pool.wait_closed()
+    global rates_updates_tracker, rates_cache_warmer, health_checker, ingestion_worker
+    for background_task in (
+        rates_updates_tracker,
+        rates_cache_warmer,
+        health_checker,
+        ingestion_worker,
+        *replicas_health_checkers,
+    ):
+        if background_task is not None:
+            background_task.cancel()
+            await asyncio.gather(background_task, return_exceptions=True)
+    rates_updates_tracker = rates_cache_warmer = health_checker = None
+    ingestion_worker = None
+    replicas_health_checkers.clear()
+
+    global shared_rates
+    if shared_rates is not None:
+        shared_rates.close()
+        shared_rates = None
+
+    global connection_pool, write_connection_pool, replicas
+    pools = [connection_pool, write_connection_pool]
+    if replicas is not None:
+        pools.extend(replica.connection_pool for replica in replicas.replicas)
+        replicas = None
+    for pool in pools:
+        pool.close()
+        await pool.wait_closed()
+
+
+async def create_replicas(uris: Iterable[str]) -> ReplicaSet:
+    """Connect to read replicas, each one guarded by its own circuit breaker.
+
+    Pools connect lazily, so a replica down at startup does not prevent the
+    worker from starting, reads go elsewhere until it is back.
+    """
+    replicas = []
+    for uri in uris:
+        replica_circuit_breaker = CircuitBreaker(
+            failure_threshold=DATABASE_FAILURE_THRESHOLD,
+            backoff=DATABASE_RETRY_BACKOFF,
+            max_backoff=DATABASE_MAX_RETRY_BACKOFF,
+        )
+        replica_connection_pool = await create_connection_pool(
+            uri,
+            min_size=0,
+            max_size=DATABASE_POOL_MAX_SIZE,
+            connect_timeout=DATABASE_CONNECT_TIMEOUT,
+            command_timeout=DATABASE_COMMAND_TIMEOUT,
+            circuit_breaker=replica_circuit_breaker,
+            watched=False,
+        )
+        replicas.append(Replica(replica_connection_pool, replica_circuit_breaker))
+
+    return ReplicaSet(replicas)
+
+
+async def warm_up_rates_cache() -> None:
+    """Fetch rates and structures derived from them while requests are served.
+
+    Worker starts serving without waiting for it, requests arriving meanwhile
+    join fetches in flight instead of repeating them.
+    """
+    try:
+        await currency_exchange_rates_storage.warm_up_cache()
+        if CROSS_RATES_ENABLED:
+            await currency_exchange_rates_storage.fetch_cross_exchange_rates()
+        if CONVERSION_ENGINE == ConversionEngine.MATRIX:
+            await currency_exchange_rates_storage.fetch_rate_matrix(
+                with_cross_rates=CROSS_RATES_ENABLED
+            )
+    except RedisError as exc:
+        logger.warning("Rates cache warm-up failed: %r", exc)
 
 
 async def database_connection_pool() -> Redis:
+    """Fail requests fast while redis is down, before they reach it."""
+    circuit_breaker.raise_if_open()
     return connection_pool
 
 
+@app.exception_handler(DatabaseUnavailable)
+async def database_unavailable(
+    request: Request, error: DatabaseUnavailable
+) -> JSONResponse:
+    response = JSONResponse(
+        status_code=HTTP_503_SERVICE_UNAVAILABLE,
+        content={"detail": "Database is unavailable"},
+        headers={"Retry-After": str(ceil(error.retry_after))},
+    )
+    return response
+
+
 @app.get(
     "/convert",
     response_model=CurrencyExchangeConvertResponse,
     dependencies=[Depends(database_connection_pool)],
 )
 async def convert_currency(
-    from_currency: Currency, to_currency: Currency, amount: Decimal = Query(..., gt=0),
-) -> CurrencyExchangeConvertResponse:
+    response: Response,
+    from_currency: Currency,
+    to_currency: Currency,
+    amount: Decimal = Query(..., gt=0),
+    at: Optional[int] = Query(
+        None, ge=0, description="Convert at the latest rate updated by timestamp"
+    ),
+    if_none_match: Optional[str] = Header(None),
+) -> Union[CurrencyExchangeConvertResponse, Response]:
+    """Convert amount of one currency into another one.
+
+    Responses are tagged by rates generation, or by the rate they are built
+    from when it is unknown, so a request matching ``If-None-Match`` is
+    answered with ``304`` before any rate is read in the former case.
+    """
     if from_currency == to_currency:
         raise HTTPException(
             status_code=HTTP_400_BAD_REQUEST, detail="Choose different currencies",
         )
 
-    exchange_rate = await currency_exchange_rates_storage.fetch_exchange_rate(
-        base_currency=from_currency, quote_currency=to_currency
-    )
+    if at is not None and not HISTORY_ENABLED:
+        raise HTTPException(
+            status_code=HTTP_400_BAD_REQUEST,
+            detail="Exchange rates history is disabled",
+        )
+
+    etag = None
+    if HTTP_CACHING_ENABLED and at is None:
+        generation = await currency_exchange_rates_storage.fetch_generation()
+        if generation is not None:
+            etag = conversion_etag(generation, from_currency, to_currency, amount)
+            if etag_matches(if_none_match, etag):
+                return not_modified(etag)
+
+    if at is None:
+        exchange_rate = await currency_exchange_rates_storage.fetch_exchange_rate(
+            base_currency=from_currency, quote_currency=to_currency
+        )
+    else:
+        exchange_rate = await (
+            currency_exchange_rates_storage.fetch_historical_exchange_rate(
+                base_currency=from_currency, quote_currency=to_currency, at=at
+            )
+        )
+    path = [from_currency, to_currency]
+    if not exchange_rate and CROSS_RATES_ENABLED and at is None:
+        cross_rate = await currency_exchange_rates_storage.fetch_cross_exchange_rate(
+            base_currency=from_currency, quote_currency=to_currency
+        )
+        if cross_rate:
+            exchange_rate, path = cross_rate, cross_rate.path
+
     if not exchange_rate:
         raise HTTPException(
             status_code=HTTP_404_NOT_FOUND,
@@ -70,31 +436,418 @@ async def convert_currency(
             ),
         )
 
-    conversion_result = calculate_conversion(amount, exchange_rate.rate)
+    headers = None
+    if HTTP_CACHING_ENABLED:
+        if etag is None:
+            etag = conversion_etag(
+                exchange_rate.rate, exchange_rate.last_updated, *path, amount, at
+            )
+            if etag_matches(if_none_match, etag):
+                return not_modified(etag)
 
-    response = CurrencyExchangeConvertResponse(
+        headers = caching_headers(etag)
+
+    conversion_result = convert_amount(amount, exchange_rate.rate, to_currency)
+
+    if FAST_RESPONSES_ENABLED:
+        return ConversionResponse(
+            from_currency=from_currency,
+            to_currency=to_currency,
+            amount=amount,
+            rate=exchange_rate.rate,
+            conversion_result=conversion_result,
+            last_updated=exchange_rate.last_updated,
+            path=path,
+            headers=headers,
+        )
+
+    response.headers.update(headers or {})
+    conversion_response = CurrencyExchangeConvertResponse(
         from_currency=from_currency,
         to_currency=to_currency,
         amount=amount,
         rate=exchange_rate.rate,
         conversion_result=conversion_result,
         last_updated=exchange_rate.last_updated,
+        path=path,
+    )
+
+    return conversion_response
+
+
+def conversion_etag(*values: Any) -> str:
+    """Tag conversion response by ``values`` and conversion settings."""
+    return as_etag(
+        *(value.value if isinstance(value, Currency) else value for value in values),
+        CONVERSION_ENGINE.value,
+        CONVERSION_ROUNDING.value,
     )
 
+
+def caching_headers(etag: str) -> Dict[str, str]:
+    return {"ETag": etag, "Cache-Control": f"max-age={HTTP_CACHE_MAX_AGE}"}
+
+
+def not_modified(etag: str) -> Response:
+    return Response(status_code=HTTP_304_NOT_MODIFIED, headers=caching_headers(etag))
+
+
+@app.post(
+    "/convert/batch",
+    response_model=CurrencyExchangeBatchConvertResponse,
+    dependencies=[Depends(database_connection_pool)],
+)
+async def convert_currency_batch(
+    batch: CurrencyExchangeBatchConvertRequest,
+) -> CurrencyExchangeBatchConvertResponse:
+    if len(batch.conversions) > BATCH_CONVERT_MAX_SIZE:
+        raise HTTPException(
+            status_code=HTTP_400_BAD_REQUEST,
+            detail=f"Batch exceeds {BATCH_CONVERT_MAX_SIZE} conversions",
+        )
+
+    if any(item.from_currency == item.to_currency for item in batch.conversions):
+        raise HTTPException(
+            status_code=HTTP_400_BAD_REQUEST, detail="Choose different currencies",
+        )
+
+    if CONVERSION_ENGINE == ConversionEngine.MATRIX:
+        conversions = await convert_with_rate_matrix(batch.conversions)
+    else:
+        conversions = await convert_with_exchange_rates(batch.conversions)
+
+    response = CurrencyExchangeBatchConvertResponse(conversions=conversions)
+
     return response
 
 
+def convert_amount(amount: Decimal, rate: Decimal, to_currency: Currency) -> Decimal:
+    try:
+        conversion_result = as_conversion(CONVERSION_ENGINE, CONVERSION_ROUNDING)(
+            amount, rate, to_currency
+        )
+    except ArithmeticError:
+        raise HTTPException(
+            status_code=HTTP_400_BAD_REQUEST,
+            detail="Conversion result is out of range",
+        )
+
+    return conversion_result
+
+
+async def convert_with_exchange_rates(
+    items: List[CurrencyExchangeConvertRequest],
+) -> List[CurrencyExchangeConvertResponse]:
+    exchange_rates = await currency_exchange_rates_storage.fetch_exchange_rates(
+        (item.from_currency, item.to_currency) for item in items
+    )
+    if CROSS_RATES_ENABLED and None in exchange_rates.values():
+        cross_rates = await currency_exchange_rates_storage.fetch_cross_exchange_rates()
+        for currency_pair, exchange_rate in exchange_rates.items():
+            if exchange_rate is None:
+                exchange_rates[currency_pair] = cross_rates.get(currency_pair)
+
+    raise_for_missing_exchange_rates(
+        currency_pair
+        for currency_pair, exchange_rate in exchange_rates.items()
+        if exchange_rate is None
+    )
+
+    conversions = []
+    for item in items:
+        exchange_rate = exchange_rates[item.from_currency, item.to_currency]
+        assert exchange_rate is not None
+
+        conversions.append(
+            CurrencyExchangeConvertResponse(
+                from_currency=item.from_currency,
+                to_currency=item.to_currency,
+                amount=item.amount,
+                rate=exchange_rate.rate,
+                conversion_result=convert_amount(
+                    item.amount, exchange_rate.rate, item.to_currency
+                ),
+                last_updated=exchange_rate.last_updated,
+                path=(
+                    exchange_rate.path
+                    if isinstance(exchange_rate, CrossExchangeRate)
+                    else [item.from_currency, item.to_currency]
+                ),
+            )
+        )
+
+    return conversions
+
+
+async def convert_with_rate_matrix(
+    items: List[CurrencyExchangeConvertRequest],
+) -> List[CurrencyExchangeConvertResponse]:
+    rate_matrix = await currency_exchange_rates_storage.fetch_rate_matrix(
+        with_cross_rates=CROSS_RATES_ENABLED
+    )
+    rates, conversion_results, last_updated = rate_matrix.convert(
+        [item.amount for item in items],
+        [(item.from_currency, item.to_currency) for item in items],
+    )
+
+    raise_for_missing_exchange_rates(
+        (item.from_currency, item.to_currency)
+        for item, rate in zip(items, rates)
+        if isnan(rate)
+    )
+
+    conversions = [
+        CurrencyExchangeConvertResponse(
+            from_currency=item.from_currency,
+            to_currency=item.to_currency,
+            amount=item.amount,
+            rate=as_decimal(rate),
+            conversion_result=as_decimal(conversion_result),
+            last_updated=int(item_last_updated),
+            path=rate_matrix.path(item.from_currency, item.to_currency),
+        )
+        for item, rate, conversion_result, item_last_updated in zip(
+            items, rates, conversion_results, last_updated
+        )
+    ]
+
+    return conversions
+
+
+@app.get(
+    "/convert/quotes",
+    response_model=CurrencyExchangeBatchConvertResponse,
+    dependencies=[Depends(database_connection_pool)],
+)
+async def convert_currency_quotes(
+    response: Response,
+    from_currency: Currency,
+    amount: Decimal = Query(..., gt=0),
+    to_currency: List[Currency] = Query(
+        None, description="Quote currencies, every stored one if omitted"
+    ),
+    if_none_match: Optional[str] = Header(None),
+) -> Union[CurrencyExchangeBatchConvertResponse, Response]:
+    """Convert amount of one currency into many quote currencies at once.
+
+    All stored rates of ``from_currency`` are fetched in a single round trip,
+    requested currencies without a stored rate are converted at cross rates.
+    Responses are tagged by rates generation like ``/convert`` ones.
+    """
+    if to_currency and from_currency in to_currency:
+        raise HTTPException(
+            status_code=HTTP_400_BAD_REQUEST, detail="Choose different currencies",
+        )
+
+    if HTTP_CACHING_ENABLED:
+        generation = await currency_exchange_rates_storage.fetch_generation()
+        if generation is not None:
+            etag = conversion_etag(
+                generation, from_currency, amount, *(to_currency or [])
+            )
+            if etag_matches(if_none_match, etag):
+                return not_modified(etag)
+
+            response.headers.update(caching_headers(etag))
+
+    exchange_rates: Dict[Currency, Optional[ExchangeRate]] = dict(
+        await currency_exchange_rates_storage.fetch_all_rates(from_currency)
+    )
+    if to_currency:
+        exchange_rates = {
+            quote_currency: exchange_rates.get(quote_currency)
+            for quote_currency in to_currency
+        }
+    else:
+        exchange_rates = {
+            quote_currency: exchange_rates[quote_currency]
+            for quote_currency in sorted(exchange_rates, key=CURRENCY_INDEX.__getitem__)
+        }
+
+    if CROSS_RATES_ENABLED and None in exchange_rates.values():
+        cross_rates = await currency_exchange_rates_storage.fetch_cross_exchange_rates()
+        for quote_currency, exchange_rate in exchange_rates.items():
+            if exchange_rate is None:
+                exchange_rates[quote_currency] = cross_rates.get(
+                    (from_currency, quote_currency)
+                )
+
+    raise_for_missing_exchange_rates(
+        (from_currency, quote_currency)
+        for quote_currency, exchange_rate in exchange_rates.items()
+        if exchange_rate is None
+    )
+
+    conversions = []
+    for quote_currency, exchange_rate in exchange_rates.items():
+        assert exchange_rate is not None
+
+        conversions.append(
+            CurrencyExchangeConvertResponse(
+                from_currency=from_currency,
+                to_currency=quote_currency,
+                amount=amount,
+                rate=exchange_rate.rate,
+                conversion_result=convert_amount(
+                    amount, exchange_rate.rate, quote_currency
+                ),
+                last_updated=exchange_rate.last_updated,
+                path=(
+                    exchange_rate.path
+                    if isinstance(exchange_rate, CrossExchangeRate)
+                    else [from_currency, quote_currency]
+                ),
+            )
+        )
+
+    quotes_response = CurrencyExchangeBatchConvertResponse(conversions=conversions)
+
+    return quotes_response
+
+
+@app.post(
+    "/convert/csv",
+    response_class=StreamingResponse,
+    dependencies=[Depends(database_connection_pool)],
+)
+async def convert_currency_csv(request: Request) -> StreamingResponse:
+    """Convert streamed ``amount,from_currency,to_currency`` CSV rows.
+
+    All rows are converted at one exchange rates snapshot. Converted CSV gets
+    ``rate``, ``conversion_result``, ``last_updated`` and ``error`` columns,
+    invalid rows have only ``error`` filled in. Converted rows are spooled to
+    a temporary file while upload is read, and streamed back afterwards.
+    """
+    lookup = await fetch_exchange_rate_lookup()
+
+    output = SpooledTemporaryFile(max_size=CONVERT_CSV_SPOOL_SIZE)
+    try:
+        await convert_csv(
+            iter_lines(request.stream(), max_line_length=LOAD_MAX_LINE_LENGTH),
+            lookup,
+            output,
+            CONVERT_CSV_CHUNK_SIZE,
+            as_conversion(CONVERSION_ENGINE, CONVERSION_ROUNDING),
+        )
+    except LineTooLong as error:
+        output.close()
+        raise HTTPException(
+            status_code=HTTP_413_REQUEST_ENTITY_TOO_LARGE, detail=str(error)
+        )
+    except csv.Error as error:
+        output.close()
+        raise HTTPException(
+            status_code=HTTP_422_UNPROCESSABLE_ENTITY, detail=str(error)
+        )
+
+    output.seek(0)
+    response = StreamingResponse(iter_file(output), media_type="text/csv")
+
+    return response
+
+
+async def fetch_exchange_rate_lookup() -> ExchangeRateLookup:
+    exchange_rates = await currency_exchange_rates_storage.fetch_all_exchange_rates()
+    cross_rates = {}
+    if CROSS_RATES_ENABLED:
+        cross_rates = await currency_exchange_rates_storage.fetch_cross_exchange_rates()
+
+    def lookup(
+        base_currency: Currency, quote_currency: Currency
+    ) -> Optional[ExchangeRate]:
+        exchange_rate = exchange_rates.get(base_currency, {}).get(quote_currency)
+        if exchange_rate is None:
+            return cross_rates.get((base_currency, quote_currency))
+
+        return exchange_rate
+
+    return lookup
+
+
+def raise_for_missing_exchange_rates(currency_pairs: Iterable[CurrencyPair]) -> None:
+    missing_pairs = [
+        f"{base_currency.value}/{quote_currency.value}"
+        for base_currency, quote_currency in dict.fromkeys(currency_pairs)
+    ]
+    if missing_pairs:
+        raise HTTPException(
+            status_code=HTTP_404_NOT_FOUND,
+            detail=f"No exchange rates for {', '.join(missing_pairs)} currencies",
+        )
+
+
 @app.post(
     "/database",
+    status_code=HTTP_202_ACCEPTED,
+    response_model=CurrencyExchangeLoadJob,
+    dependencies=[Depends(database_connection_pool)],
+)
+async def load_currency_exchange_rates(
+    merge: bool,
+    currency_exchange_rates: CurrencyExchangeRatesLoadRequest,
+    delta: bool = Query(False, description="Merge only rates newer than stored"),
+):
+    """Queue load of currency exchange rates, its job reports when it is done."""
+    raise_for_replacing_delta_load(merge, delta)
+
+    try:
+        job = await ingestion_queue.submit(
+            currency_exchange_rates, merge=merge, delta=delta
+        )
+    except asyncio.QueueFull:
+        raise HTTPException(
+            status_code=HTTP_429_TOO_MANY_REQUESTS,
+            detail="Too many loads are queued",
+            headers={"Retry-After": "1"},
+        )
+
+    return job
+
+
+@app.get(
+    "/database/jobs/{job_id}",
+    response_model=CurrencyExchangeLoadJob,
+    dependencies=[Depends(database_connection_pool)],
+)
+async def fetch_load_job(job_id: str):
+    job = await ingestion_queue.fetch_job(job_id)
+    if job is None:
+        raise HTTPException(status_code=HTTP_404_NOT_FOUND, detail="Unknown load job")
+
+    return job
+
+
+@app.post(
+    "/database/stream",
     status_code=HTTP_201_CREATED,
     response_model=CurrencyExchangeLoadResponse,
     dependencies=[Depends(database_connection_pool)],
 )
-async def load_currency_exchange_rates(
-    merge: bool, currency_exchange_rates: CurrencyExchangeRatesLoadRequest
+async def stream_currency_exchange_rates(
+    merge: bool,
+    request: Request,
+    delta: bool = Query(False, description="Merge only rates newer than stored"),
 ):
-    status = await currency_exchange_rates_storage.load_exchange_rates(
-        loadable_exchange_rates=preprocess(currency_exchange_rates), merge=merge
+    """Load newline-delimited JSON currency exchange rates in bounded chunks.
+
+    Each line holds rates of one base currency, e.g.
+    ``{"base": "USD", "quotes": {"RUB": {"rate": "79.75", "last_updated": 1}}}``.
+    """
+    raise_for_replacing_delta_load(merge, delta)
+
+    loadable_chunks = preprocess_stream(
+        parse_currency_exchange_rates(request.stream()),
+        LOAD_CHUNK_SIZE,
+        RATES_STORAGE_FORMAT,
+    )
+    if delta:
+        report = await currency_exchange_rates_storage.delta_load_exchange_rates_chunks(
+            loadable_chunks
+        )
+        return CurrencyExchangeLoadResponse(merge=merge, delta=delta, **report.dict())
+
+    status = await currency_exchange_rates_storage.load_exchange_rates_chunks(
+        loadable_chunks, merge=merge,
     )
 
     response = CurrencyExchangeLoadResponse(status=status, merge=merge)
@@ -102,7 +855,77 @@ async def load_currency_exchange_rates(
     return response
 
 
+def raise_for_replacing_delta_load(merge: bool, delta: bool) -> None:
+    if delta and not merge:
+        raise HTTPException(
+            status_code=HTTP_400_BAD_REQUEST,
+            detail="Delta loads can only merge exchange rates",
+        )
+
+
+@app.post(
+    "/history",
+    status_code=HTTP_201_CREATED,
+    response_model=CurrencyExchangeHistoryImportResponse,
+    dependencies=[Depends(database_connection_pool)],
+)
+async def import_currency_exchange_rates_history(request: Request):
+    """Import newline-delimited JSON historical currency exchange rates.
+
+    Lines have ``/database/stream`` format, the same base currency may repeat
+    with rates of different update times. Current rates are not changed.
+    """
+    if not HISTORY_ENABLED:
+        raise HTTPException(
+            status_code=HTTP_400_BAD_REQUEST,
+            detail="Exchange rates history is disabled",
+        )
+
+    status = await currency_exchange_rates_storage.import_history(
+        preprocess_stream(
+            parse_currency_exchange_rates(request.stream()),
+            LOAD_CHUNK_SIZE,
+            RATES_STORAGE_FORMAT,
+        )
+    )
+
+    response = CurrencyExchangeHistoryImportResponse(status=status)
+
+    return response
+
+
+async def parse_currency_exchange_rates(
+    body: AsyncIterable[bytes],
+) -> AsyncIterator[CurrencyExchangeRates]:
+    line_number = 0
+    try:
+        async for line in iter_lines(body, max_line_length=LOAD_MAX_LINE_LENGTH):
+            line_number += 1
+            if line.strip():
+                yield CurrencyExchangeRates.parse_raw(line)
+    except ValidationError as error:
+        raise HTTPException(
+            status_code=HTTP_422_UNPROCESSABLE_ENTITY,
+            detail=[
+                {**line_error, "loc": ["body", line_number, *line_error["loc"]]}
+                for line_error in error.errors()
+            ],
+        )
+    except LineTooLong as error:
+        raise HTTPException(
+            status_code=HTTP_413_REQUEST_ENTITY_TOO_LARGE, detail=str(error)
+        )
+
+
+@app.get("/metrics", include_in_schema=False)
+async def metrics() -> Response:
+    return metrics_response()
+
+
 @app.get("/")
 async def redirect_to_docs() -> RedirectResponse:
+    if not DOCS_ENABLED:
+        raise HTTPException(status_code=HTTP_404_NOT_FOUND)
+
     response = RedirectResponse(url="/docs")
     return response
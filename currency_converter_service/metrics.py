@@ -0,0 +1,213 @@
+import os
+from contextlib import contextmanager
+from time import perf_counter
+from typing import (
+    AsyncIterable,
+    AsyncIterator,
+    Callable,
+    Dict,
+    Iterable,
+    Iterator,
+    Optional,
+    Sized,
+    Tuple,
+    TypeVar,
+)
+
+from aioredis import Redis
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    REGISTRY,
+    CollectorRegistry,
+    Counter,
+    Gauge,
+    Histogram,
+    generate_latest,
+)
+from prometheus_client.multiprocess import MultiProcessCollector
+from starlette.responses import Response
+from starlette.routing import BaseRoute
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from currency_converter_service.models import LoadStatus
+
+MULTIPROCESS_DIR_VARIABLE = "prometheus_multiproc_dir"
+
+LATENCY_BUCKETS = (
+    0.0005,
+    0.001,
+    0.0025,
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+    10.0,
+)
+LOAD_SIZE_BUCKETS = (10, 100, 1000, 10000, 100000, 1000000, 10000000)
+
+UNMATCHED_ROUTE = "unmatched"
+
+REQUEST_LATENCY = Histogram(
+    "http_request_duration_seconds",
+    "HTTP request latency by route.",
+    ["method", "route", "status"],
+    buckets=LATENCY_BUCKETS,
+)
+REDIS_COMMAND_LATENCY = Histogram(
+    "redis_command_duration_seconds",
+    "Latency of redis commands and pipelines issued by rates storage.",
+    ["operation"],
+    buckets=LATENCY_BUCKETS,
+)
+REDIS_POOL_CONNECTIONS = Gauge(
+    "redis_pool_connections",
+    "Connections of redis connection pool by state.",
+    ["state"],
+    multiprocess_mode="livesum",
+)
+RATES_CACHE_REQUESTS = Counter(
+    "exchange_rates_cache_requests",
+    "Base currency lookups in exchange rates cache by result.",
+    ["result"],
+)
+LOAD_SIZE = Histogram(
+    "exchange_rates_load_size",
+    "Number of exchange rates written by a load.",
+    ["mode"],
+    buckets=LOAD_SIZE_BUCKETS,
+)
+LOAD_DURATION = Histogram(
+    "exchange_rates_load_duration_seconds",
+    "Duration of exchange rates loads.",
+    ["mode", "status"],
+    buckets=LATENCY_BUCKETS,
+)
+
+Loadable = TypeVar("Loadable", bound=Tuple[str, Sized])
+
+_connection_pool: Optional[Redis] = None
+
+
+@contextmanager
+def measure_redis_command(operation: str) -> Iterator[None]:
+    started_at = perf_counter()
+    try:
+        yield
+    finally:
+        REDIS_COMMAND_LATENCY.labels(operation).observe(perf_counter() - started_at)
+
+
+def count_cache_lookups(hits: int, misses: int) -> None:
+    if hits:
+        RATES_CACHE_REQUESTS.labels("hit").inc(hits)
+    if misses:
+        RATES_CACHE_REQUESTS.labels("miss").inc(misses)
+
+
+def watch_connection_pool(connection_pool: Redis) -> None:
+    """Report saturation of ``connection_pool`` after every request."""
+    global _connection_pool
+    _connection_pool = connection_pool
+
+
+def observe_connection_pool() -> None:
+    if _connection_pool is None:
+        return
+
+    pool = _connection_pool.connection
+    REDIS_POOL_CONNECTIONS.labels("in_use").set(pool.size - pool.freesize)
+    REDIS_POOL_CONNECTIONS.labels("max").set(pool.maxsize)
+
+
+class LoadMeter:
+    """Counts exchange rates flowing into storage and observes load metrics."""
+
+    def __init__(self, mode: str) -> None:
+        self._mode = mode
+        self._rates_count = 0
+        self._started_at = perf_counter()
+
+    async def count_chunks(
+        self, loadable_chunks: AsyncIterable[Iterable[Loadable]]
+    ) -> AsyncIterator[Iterable[Loadable]]:
+        async for loadable_chunk in loadable_chunks:
+            yield self._count(loadable_chunk)
+
+    def observe(self, status: LoadStatus) -> None:
+        LOAD_SIZE.labels(self._mode).observe(self._rates_count)
+        LOAD_DURATION.labels(self._mode, status.value).observe(
+            perf_counter() - self._started_at
+        )
+
+    def _count(self, loadable_chunk: Iterable[Loadable]) -> Iterator[Loadable]:
+        for loadable in loadable_chunk:
+            self._rates_count += len(loadable[1])
+            yield loadable
+
+
+class MetricsMiddleware:
+    """Observes latency of every HTTP request labelled by its route path."""
+
+    def __init__(self, app: ASGIApp, routes: Iterable[BaseRoute]) -> None:
+        self._app = app
+        self._routes = routes
+        self._route_paths: Dict[Callable, str] = {}
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self._app(scope, receive, send)
+            return
+
+        status_code = 500
+
+        async def send_with_status(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        started_at = perf_counter()
+        try:
+            await self._app(scope, receive, send_with_status)
+        finally:
+            REQUEST_LATENCY.labels(
+                scope["method"], self._route_path(scope), str(status_code)
+            ).observe(perf_counter() - started_at)
+            observe_connection_pool()
+
+    def _route_path(self, scope: Scope) -> str:
+        endpoint = scope.get("endpoint")
+        if endpoint is None:
+            return UNMATCHED_ROUTE
+
+        if endpoint not in self._route_paths:
+            self._route_paths[endpoint] = next(
+                (
+                    getattr(route, "path", UNMATCHED_ROUTE)
+                    for route in self._routes
+                    if getattr(route, "endpoint", None) is endpoint
+                ),
+                UNMATCHED_ROUTE,
+            )
+
+        return self._route_paths[endpoint]
+
+
+def metrics_response() -> Response:
+    """Render metrics of this process, or of all workers in multiprocess mode.
+
+    Multiprocess mode is on when ``prometheus_multiproc_dir`` environment
+    variable points to a directory shared by all workers.
+    """
+    registry = REGISTRY
+    if MULTIPROCESS_DIR_VARIABLE in os.environ:
+        registry = CollectorRegistry()
+        MultiProcessCollector(registry)
+
+    return Response(generate_latest(registry), media_type=CONTENT_TYPE_LATEST)
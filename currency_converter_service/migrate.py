@@ -0,0 +1,31 @@
+"""Rewrite stored exchange rates in ``RATES_STORAGE_FORMAT``.
+
+Run it once after switching storage format, while no rates are loaded:
+``poetry run python -m currency_converter_service.migrate``.
+"""
+import asyncio
+
+from currency_converter_service.config import DATABASE_URI, RATES_STORAGE_FORMAT
+from currency_converter_service.dependencies import (
+    CurrencyExchangeRatesStorage,
+    create_connection_pool,
+)
+from currency_converter_service.models import LoadStatus
+
+
+async def migrate() -> LoadStatus:
+    connection_pool = await create_connection_pool(DATABASE_URI)
+    try:
+        currency_exchange_rates_storage = CurrencyExchangeRatesStorage(connection_pool)
+        status = await currency_exchange_rates_storage.migrate_storage_format(
+            RATES_STORAGE_FORMAT
+        )
+    finally:
+        connection_pool.close()
+        await connection_pool.wait_closed()
+
+    return status
+
+
+if __name__ == "__main__":
+    print(asyncio.run(migrate()).value)
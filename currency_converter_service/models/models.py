@@ -1,16 +1,25 @@
 from decimal import Decimal
 from enum import Enum
-from typing import Dict, List
+from typing import Dict, List, Optional
 
-from pydantic import BaseModel
+from pydantic import BaseModel, condecimal
 
 from currency_converter_service.currency import Currency
 
 __all__ = [
+    "CurrencyExchangeBatchConvertRequest",
+    "CurrencyExchangeBatchConvertResponse",
+    "CurrencyExchangeConvertRequest",
     "CurrencyExchangeConvertResponse",
+    "CurrencyExchangeHistoryImportResponse",
+    "CurrencyExchangeLoadJob",
+    "CurrencyExchangeRates",
     "CurrencyExchangeRatesLoadRequest",
     "CurrencyExchangeLoadResponse",
+    "CrossExchangeRate",
+    "DeltaLoadReport",
     "ExchangeRate",
+    "LoadJobStatus",
     "LoadStatus",
 ]
 
@@ -27,6 +36,21 @@ class CurrencyExchangeConvertResponse(CustomModel):
     rate: Decimal
     conversion_result: Decimal
     last_updated: int
+    path: List[Currency]
+
+
+class CurrencyExchangeConvertRequest(BaseModel):
+    from_currency: Currency
+    to_currency: Currency
+    amount: condecimal(gt=0)  # type: ignore
+
+
+class CurrencyExchangeBatchConvertRequest(BaseModel):
+    conversions: List[CurrencyExchangeConvertRequest]
+
+
+class CurrencyExchangeBatchConvertResponse(CustomModel):
+    conversions: List[CurrencyExchangeConvertResponse]
 
 
 class ExchangeRate(CustomModel):
@@ -34,6 +58,12 @@ class ExchangeRate(CustomModel):
     last_updated: int
 
 
+class CrossExchangeRate(ExchangeRate):
+    """Exchange rate derived through a chain of stored exchange rates."""
+
+    path: List[Currency]
+
+
 class CurrencyExchangeRates(BaseModel):
     base: Currency
     quotes: Dict[Currency, ExchangeRate]
@@ -48,6 +78,38 @@ class LoadStatus(Enum):
     FAILURE = "FAILURE"
 
 
+class DeltaLoadReport(BaseModel):
+    """Outcome of a delta load, rates not newer than stored ones are skipped."""
+
+    status: LoadStatus
+    applied: int = 0
+    skipped: int = 0
+
+
 class CurrencyExchangeLoadResponse(BaseModel):
     status: LoadStatus
     merge: bool
+    delta: bool = False
+    applied: Optional[int] = None
+    skipped: Optional[int] = None
+
+
+class CurrencyExchangeHistoryImportResponse(BaseModel):
+    status: LoadStatus
+
+
+class LoadJobStatus(Enum):
+    QUEUED = "QUEUED"
+    RUNNING = "RUNNING"
+    SUCCESS = "SUCCESS"
+    FAILURE = "FAILURE"
+
+
+class CurrencyExchangeLoadJob(BaseModel):
+    job_id: str
+    status: LoadJobStatus
+    merge: bool
+    delta: bool = False
+    rates_count: int
+    applied: Optional[int] = None
+    skipped: Optional[int] = None
@@ -0,0 +1,110 @@
+from decimal import Decimal
+from typing import TYPE_CHECKING, Any, List, Mapping, Optional, Sequence, Tuple
+
+from currency_converter_service.currency import CURRENCY_INDEX, Currency, CurrencyPair
+from currency_converter_service.models import CrossExchangeRate, ExchangeRate
+
+if TYPE_CHECKING:  # pragma: no cover
+    import numpy as np
+
+SIGNIFICANT_DIGITS = 15
+
+
+class RateMatrix:
+    """Dense ``float64`` matrix of exchange rates indexed by ``Currency`` ordinals.
+
+    Converts many amounts in one vectorized call. Rates and results are
+    rounded to ``SIGNIFICANT_DIGITS`` significant digits, so they agree with
+    ``calculate_conversion`` within relative error of ``1e-14``. Rates with
+    at most 15 significant digits are returned exactly as stored.
+    """
+
+    def __init__(
+        self,
+        rates: "np.ndarray",
+        last_updated: "np.ndarray",
+        paths: Mapping[CurrencyPair, List[Currency]],
+    ) -> None:
+        self._rates = rates
+        self._last_updated = last_updated
+        self._paths = paths
+
+    @classmethod
+    def from_exchange_rates(
+        cls,
+        exchange_rates: Mapping[Currency, Mapping[Currency, ExchangeRate]],
+        cross_rates: Optional[Mapping[CurrencyPair, CrossExchangeRate]] = None,
+    ) -> "RateMatrix":
+        np = import_numpy()
+
+        size = len(CURRENCY_INDEX)
+        rates = np.full((size, size), np.nan, dtype=np.float64)
+        last_updated = np.zeros((size, size), dtype=np.int64)
+
+        for (base_currency, quote_currency), cross_rate in (cross_rates or {}).items():
+            base_index, quote_index = (
+                CURRENCY_INDEX[base_currency],
+                CURRENCY_INDEX[quote_currency],
+            )
+            rates[base_index, quote_index] = float(cross_rate.rate)
+            last_updated[base_index, quote_index] = cross_rate.last_updated
+
+        for base_currency, quotes in exchange_rates.items():
+            base_index = CURRENCY_INDEX[base_currency]
+            for quote_currency, exchange_rate in quotes.items():
+                quote_index = CURRENCY_INDEX[quote_currency]
+                rates[base_index, quote_index] = float(exchange_rate.rate)
+                last_updated[base_index, quote_index] = exchange_rate.last_updated
+
+        paths = {
+            currency_pair: cross_rate.path
+            for currency_pair, cross_rate in (cross_rates or {}).items()
+        }
+
+        return cls(rates, last_updated, paths)
+
+    def convert(
+        self, amounts: Sequence[Decimal], currency_pairs: Sequence[CurrencyPair]
+    ) -> Tuple["np.ndarray", "np.ndarray", "np.ndarray"]:
+        """Convert ``amounts`` between respective currency pairs at once.
+
+        Returns rates, conversion results and rates update times. Rates and
+        results of pairs without exchange rate are ``nan``.
+        """
+        np = import_numpy()
+
+        base_indices = np.fromiter(
+            (CURRENCY_INDEX[base] for base, _ in currency_pairs),
+            dtype=np.intp,
+            count=len(currency_pairs),
+        )
+        quote_indices = np.fromiter(
+            (CURRENCY_INDEX[quote] for _, quote in currency_pairs),
+            dtype=np.intp,
+            count=len(currency_pairs),
+        )
+
+        rates = self._rates[base_indices, quote_indices]
+        results = np.asarray(amounts, dtype=np.float64) * rates
+
+        return rates, results, self._last_updated[base_indices, quote_indices]
+
+    def path(self, base_currency: Currency, quote_currency: Currency) -> List[Currency]:
+        return self._paths.get(
+            (base_currency, quote_currency), [base_currency, quote_currency]
+        )
+
+
+def import_numpy() -> Any:
+    """Import ``numpy`` on first use, it is optional and slow to import."""
+    try:
+        import numpy
+    except ImportError:  # pragma: no cover
+        raise RuntimeError("numpy is required for rate matrix conversions")
+
+    return numpy
+
+
+def as_decimal(value: Any) -> Decimal:
+    """Convert matrix value to ``Decimal`` rounded to significant digits."""
+    return Decimal(repr(float(f"{value:.{SIGNIFICANT_DIGITS}g}")))
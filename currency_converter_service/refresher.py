@@ -0,0 +1,48 @@
+"""Keep shared exchange rates table of this host in sync with stored rates.
+
+Started by ``gunicorn`` master next to workers when ``SHARED_RATES_ENABLED``
+is set, see ``gunicorn.conf.py``. Can be run by hand with
+``poetry run python -m currency_converter_service.refresher``.
+"""
+import asyncio
+
+from aioredis import RedisError
+
+from currency_converter_service.config import (
+    DATABASE_URI,
+    SHARED_RATES_PATH,
+    SHARED_RATES_REFRESH_INTERVAL,
+)
+from currency_converter_service.dependencies import (
+    CurrencyExchangeRatesStorage,
+    SharedRatesTable,
+    create_connection_pool,
+)
+
+
+async def refresh() -> None:
+    shared_rates = SharedRatesTable.create(SHARED_RATES_PATH)
+    try:
+        while True:
+            try:
+                connection_pool = await create_connection_pool(DATABASE_URI)
+                break
+            except (RedisError, OSError):
+                await asyncio.sleep(SHARED_RATES_REFRESH_INTERVAL)
+
+        try:
+            currency_exchange_rates_storage = CurrencyExchangeRatesStorage(
+                connection_pool
+            )
+            await currency_exchange_rates_storage.refresh_shared_rates(
+                shared_rates, interval=SHARED_RATES_REFRESH_INTERVAL
+            )
+        finally:
+            connection_pool.close()
+            await connection_pool.wait_closed()
+    finally:
+        shared_rates.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(refresh())
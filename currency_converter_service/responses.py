@@ -0,0 +1,83 @@
+import json
+from decimal import Decimal
+from hashlib import blake2b
+from typing import Any, Dict, List, Optional
+
+from starlette.responses import Response
+
+from currency_converter_service.currency import Currency
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover
+    orjson = None  # type: ignore
+
+
+def dumps(content: Dict[str, Any]) -> bytes:
+    """Serialize content the same way ``JSONResponse`` does, faster if possible."""
+    if orjson is not None:
+        return orjson.dumps(content)
+
+    return json.dumps(
+        content, ensure_ascii=False, allow_nan=False, separators=(",", ":")
+    ).encode("utf-8")
+
+
+def as_etag(*values: Any) -> str:
+    """Strong entity tag identifying a response by values it is built from."""
+    digest = blake2b(
+        "\x1f".join(str(value) for value in values).encode(), digest_size=16
+    )
+    return f'"{digest.hexdigest()}"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Whether ``If-None-Match`` header value matches ``etag``.
+
+    Tags are compared weakly, as ``If-None-Match`` requires.
+    """
+    if if_none_match is None:
+        return False
+
+    for tag in if_none_match.split(","):
+        tag = tag.strip()
+        if tag == "*" or tag.replace("W/", "", 1) == etag:
+            return True
+
+    return False
+
+
+class ConversionResponse(Response):
+    """Pre-serialized ``CurrencyExchangeConvertResponse``.
+
+    Bypasses ``response_model`` validation and ``jsonable_encoder``, while
+    keeping the same wire format, e.g. ``Decimal`` values are strings.
+    """
+
+    media_type = "application/json"
+
+    def __init__(
+        self,
+        from_currency: Currency,
+        to_currency: Currency,
+        amount: Decimal,
+        rate: Decimal,
+        conversion_result: Decimal,
+        last_updated: int,
+        path: List[Currency],
+        headers: Optional[Dict[str, str]] = None,
+    ) -> None:
+        super().__init__(
+            content=dumps(
+                {
+                    "from_currency": from_currency.value,
+                    "to_currency": to_currency.value,
+                    "amount": str(amount),
+                    "rate": str(rate),
+                    "conversion_result": str(conversion_result),
+                    "last_updated": last_updated,
+                    "path": [currency.value for currency in path],
+                }
+            ),
+            headers=headers or {},
+        )
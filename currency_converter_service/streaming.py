@@ -0,0 +1,41 @@
+from typing import IO, AsyncIterable, AsyncIterator
+
+FILE_BLOCK_SIZE = 65536
+
+
+class LineTooLong(ValueError):
+    """Streamed line is longer than allowed."""
+
+
+async def iter_lines(
+    chunks: AsyncIterable[bytes], max_line_length: int
+) -> AsyncIterator[bytes]:
+    """Split streamed body into lines without holding more than one line.
+
+    Raises ``LineTooLong`` for lines longer than ``max_line_length`` bytes.
+    """
+    buffer = b""
+    async for chunk in chunks:
+        buffer += chunk
+        *lines, buffer = buffer.split(b"\n")
+        for line in lines:
+            yield line
+
+        if len(buffer) > max_line_length:
+            raise LineTooLong(f"Line exceeds {max_line_length} bytes")
+
+    if buffer:
+        yield buffer
+
+
+async def iter_file(
+    file: IO[bytes], block_size: int = FILE_BLOCK_SIZE
+) -> AsyncIterator[bytes]:
+    """Stream ``file`` from the current position in blocks, then close it."""
+    try:
+        block = file.read(block_size)
+        while block:
+            yield block
+            block = file.read(block_size)
+    finally:
+        file.close()
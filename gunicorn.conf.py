@@ -0,0 +1,43 @@
+import os
+import shutil
+import subprocess
+import sys
+from typing import Optional
+
+from prometheus_client import multiprocess
+
+from currency_converter_service.config import SHARED_RATES_ENABLED, SHARED_RATES_PATH
+from currency_converter_service.dependencies import SharedRatesTable
+
+refresher: Optional[subprocess.Popen] = None
+
+
+def on_starting(server) -> None:
+    """Drop metrics of workers left from the previous run.
+
+    With shared rates enabled, create the table before workers open it and
+    start the single process refreshing it for all workers.
+    """
+    metrics_dir = os.environ.get("prometheus_multiproc_dir")
+    if metrics_dir:
+        shutil.rmtree(metrics_dir, ignore_errors=True)
+        os.makedirs(metrics_dir)
+
+    if SHARED_RATES_ENABLED:
+        SharedRatesTable.create(SHARED_RATES_PATH).close()
+
+        global refresher
+        refresher = subprocess.Popen(
+            [sys.executable, "-m", "currency_converter_service.refresher"]
+        )
+
+
+def child_exit(server, worker) -> None:
+    if os.environ.get("prometheus_multiproc_dir"):
+        multiprocess.mark_process_dead(worker.pid)
+
+
+def on_exit(server) -> None:
+    if refresher is not None:
+        refresher.terminate()
+        refresher.wait()
@@ -1,3 +1,7 @@
+import asyncio
+import shutil
+import socket
+import subprocess
 import uuid
 
 import aioredis
@@ -41,3 +45,76 @@ async def database():
     await connection.flushdb()
     connection.close()
     await connection.wait_closed()
+
+
+@pytest.fixture
+async def database_pool():
+    pool = await aioredis.create_redis_pool(REDIS_TEST_SERVER_URI, encoding="UTF-8")
+
+    yield pool
+    pool.close()
+    await pool.wait_closed()
+
+
+@pytest.fixture
+async def raw_database_pool():
+    pool = await aioredis.create_redis_pool(REDIS_TEST_SERVER_URI)
+
+    yield pool
+    pool.close()
+    await pool.wait_closed()
+
+
+@pytest.fixture
+async def spawn_redis_server():
+    """Start local ``redis-server`` processes, replicas of the test one if asked."""
+    executable = shutil.which("redis-server")
+    if executable is None:
+        pytest.skip("redis-server executable is not available")
+
+    processes = []
+
+    async def spawn(replica: bool = True) -> str:
+        with socket.socket() as probe:
+            probe.bind(("localhost", 0))
+            port = probe.getsockname()[1]
+
+        arguments = ["--port", str(port), "--save", "", "--appendonly", "no"]
+        if replica:
+            arguments.extend(["--replicaof", "localhost", str(EXPOSED_PORT)])
+        processes.append(
+            subprocess.Popen(
+                [executable, *arguments],
+                stdout=subprocess.DEVNULL,
+                stderr=subprocess.DEVNULL,
+            )
+        )
+
+        uri = f"redis://localhost:{port}"
+        for _ in range(100):
+            await asyncio.sleep(0.05)
+            if await is_ready(uri, replica):
+                return uri
+
+        raise RuntimeError(f"redis-server did not start on port {port}")
+
+    async def is_ready(uri: str, replica: bool) -> bool:
+        try:
+            connection = await aioredis.create_redis(uri, encoding="UTF-8")
+        except OSError:
+            return False
+        try:
+            info = await connection.info("replication")
+        except aioredis.RedisError:
+            return False
+        finally:
+            connection.close()
+            await connection.wait_closed()
+
+        return not replica or info["replication"]["master_link_status"] == "up"
+
+    yield spawn
+
+    for process in processes:
+        process.terminate()
+        process.wait()
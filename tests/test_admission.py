@@ -0,0 +1,68 @@
+import asyncio
+
+import pytest
+from starlette.status import HTTP_429_TOO_MANY_REQUESTS, HTTP_503_SERVICE_UNAVAILABLE
+
+from currency_converter_service.admission import AdmissionLimiter, Overloaded
+
+
+@pytest.mark.asyncio
+async def test_admission_limiter_hands_released_slots_to_waiting_requests() -> None:
+    limiter = AdmissionLimiter(max_in_flight=1, max_waiting=2, max_wait=1.0)
+
+    await limiter.acquire()
+    first_waiting = asyncio.ensure_future(limiter.acquire())
+    second_waiting = asyncio.ensure_future(limiter.acquire())
+    await asyncio.sleep(0)
+
+    assert (limiter.in_flight, limiter.waiting) == (1, 2)
+
+    limiter.release()
+    await first_waiting
+
+    assert not second_waiting.done()
+    assert (limiter.in_flight, limiter.waiting) == (1, 1)
+
+    limiter.release()
+    await second_waiting
+    limiter.release()
+
+    assert (limiter.in_flight, limiter.waiting) == (0, 0)
+
+
+@pytest.mark.asyncio
+async def test_admission_limiter_rejects_requests_while_queue_is_full() -> None:
+    limiter = AdmissionLimiter(
+        max_in_flight=1, max_waiting=1, max_wait=1.0, retry_after=2.0
+    )
+
+    await limiter.acquire()
+    waiting = asyncio.ensure_future(limiter.acquire())
+    await asyncio.sleep(0)
+
+    with pytest.raises(Overloaded) as error:
+        await limiter.acquire()
+
+    assert error.value.status_code == HTTP_429_TOO_MANY_REQUESTS
+    assert error.value.retry_after == 2.0
+
+    waiting.cancel()
+    await asyncio.gather(waiting, return_exceptions=True)
+
+    assert (limiter.in_flight, limiter.waiting) == (1, 0)
+
+
+@pytest.mark.asyncio
+async def test_admission_limiter_rejects_requests_waiting_too_long() -> None:
+    limiter = AdmissionLimiter(max_in_flight=1, max_waiting=1, max_wait=0.01)
+
+    await limiter.acquire()
+    with pytest.raises(Overloaded) as error:
+        await limiter.acquire()
+
+    assert error.value.status_code == HTTP_503_SERVICE_UNAVAILABLE
+    assert (limiter.in_flight, limiter.waiting) == (1, 0)
+
+    limiter.release()
+
+    assert limiter.in_flight == 0
@@ -0,0 +1,81 @@
+from decimal import Decimal
+
+from currency_converter_service.cross_rates import derive_cross_rates
+from currency_converter_service.currency import Currency
+from currency_converter_service.models import CrossExchangeRate, ExchangeRate
+
+
+def test_derive_cross_rates_through_shortest_path() -> None:
+    exchange_rates = {
+        Currency.USD: {
+            Currency.EUR: ExchangeRate(rate="0.92", last_updated=1584989828),
+            Currency.GBP: ExchangeRate(rate="0.8", last_updated=1584989828),
+        },
+        Currency.EUR: {
+            Currency.RUB: ExchangeRate(rate="86.5", last_updated=1584989000),
+            Currency.USD: ExchangeRate(rate="1.08", last_updated=1584989828),
+        },
+        Currency.RUB: {
+            Currency.CHF: ExchangeRate(rate="0.012", last_updated=1584980000)
+        },
+    }
+
+    cross_rates = derive_cross_rates(exchange_rates, max_legs=3)
+
+    assert cross_rates[Currency.USD, Currency.RUB] == CrossExchangeRate(
+        rate=Decimal("79.580"),
+        last_updated=1584989000,
+        path=[Currency.USD, Currency.EUR, Currency.RUB],
+    )
+    assert cross_rates[Currency.USD, Currency.CHF] == CrossExchangeRate(
+        rate=Decimal("0.954960"),
+        last_updated=1584980000,
+        path=[Currency.USD, Currency.EUR, Currency.RUB, Currency.CHF],
+    )
+    assert cross_rates[Currency.EUR, Currency.GBP].path == [
+        Currency.EUR,
+        Currency.USD,
+        Currency.GBP,
+    ]
+    assert cross_rates[Currency.RUB, Currency.USD].path == [
+        Currency.RUB,
+        Currency.EUR,
+        Currency.USD,
+    ]
+    assert (Currency.USD, Currency.EUR) not in cross_rates
+
+
+def test_derive_cross_rates_limits_path_length() -> None:
+    exchange_rates = {
+        Currency.USD: {Currency.EUR: ExchangeRate(rate="0.92", last_updated=1)},
+        Currency.EUR: {Currency.RUB: ExchangeRate(rate="86.5", last_updated=1)},
+        Currency.RUB: {Currency.CHF: ExchangeRate(rate="0.012", last_updated=1)},
+    }
+
+    cross_rates = derive_cross_rates(exchange_rates, max_legs=2)
+
+    assert (Currency.USD, Currency.RUB) in cross_rates
+    assert (Currency.EUR, Currency.CHF) in cross_rates
+    assert (Currency.USD, Currency.CHF) not in cross_rates
+    assert (Currency.CHF, Currency.USD) not in cross_rates
+
+
+def test_derive_cross_rates_through_inverted_rates() -> None:
+    exchange_rates = {
+        Currency.EUR: {
+            Currency.USD: ExchangeRate(rate="1.25", last_updated=1584989828),
+            Currency.RUB: ExchangeRate(rate="86.5", last_updated=1584989000),
+        },
+    }
+
+    cross_rates = derive_cross_rates(exchange_rates, max_legs=3)
+
+    assert cross_rates[Currency.USD, Currency.RUB] == CrossExchangeRate(
+        rate=Decimal("69.2"),
+        last_updated=1584989000,
+        path=[Currency.USD, Currency.EUR, Currency.RUB],
+    )
+    assert cross_rates[Currency.USD, Currency.EUR] == CrossExchangeRate(
+        rate=Decimal("0.8"), last_updated=1584989828, path=[Currency.USD, Currency.EUR]
+    )
+    assert (Currency.EUR, Currency.USD) not in cross_rates
@@ -0,0 +1,88 @@
+import io
+from typing import AsyncIterator, List, Optional
+
+import pytest
+
+from currency_converter_service.csv_conversion import convert_csv, convert_row
+from currency_converter_service.currency import Currency
+from currency_converter_service.models import ExchangeRate
+
+USD_RUB = ExchangeRate(rate="79.7112", last_updated=1553178002)
+
+
+def lookup(base_currency: Currency, quote_currency: Currency) -> Optional[ExchangeRate]:
+    if (base_currency, quote_currency) == (Currency.USD, Currency.RUB):
+        return USD_RUB
+
+    return None
+
+
+@pytest.mark.parametrize(
+    "row, converted_row",
+    [
+        (
+            ["65", "USD", "RUB"],
+            ("65", "USD", "RUB", "79.7112", "5181.2280", "1553178002", ""),
+        ),
+        (
+            [" 6.5E+1", "USD ", "RUB"],
+            ("6.5E+1", "USD", "RUB", "79.7112", "5181.2280", "1553178002", ""),
+        ),
+        (
+            ["0", "USD", "RUB"],
+            ("0", "USD", "RUB", "", "", "", "Amount must be greater than 0"),
+        ),
+        (
+            ["NaN", "USD", "RUB"],
+            ("NaN", "USD", "RUB", "", "", "", "Amount must be greater than 0"),
+        ),
+        (["ten", "USD", "RUB"], ("ten", "USD", "RUB", "", "", "", "Invalid amount")),
+        (["10", "USD", "XXX"], ("10", "USD", "XXX", "", "", "", "Unknown currency")),
+        (
+            ["10", "USD", "USD"],
+            ("10", "USD", "USD", "", "", "", "Choose different currencies"),
+        ),
+        (
+            ["10", "RUB", "USD"],
+            (
+                "10",
+                "RUB",
+                "USD",
+                "",
+                "",
+                "",
+                "No exchange rates for RUB/USD currencies",
+            ),
+        ),
+        (
+            ["1e999999", "USD", "RUB"],
+            ("1e999999", "USD", "RUB", "", "", "", "Conversion result is out of range"),
+        ),
+        (["10", "USD"], ("10", "USD", "", "", "", "", "Expected 3 columns")),
+    ],
+)
+def test_convert_row(row: List[str], converted_row: tuple) -> None:
+    assert convert_row(row, lookup) == converted_row
+
+
+@pytest.mark.parametrize("chunk_size", [1, 2, 1000])
+@pytest.mark.asyncio
+async def test_convert_csv_in_chunks(chunk_size: int) -> None:
+    async def lines() -> AsyncIterator[bytes]:
+        for line in (
+            b"amount,from_currency,to_currency",
+            b"1,USD,RUB",
+            b"",
+            b"2,RUB,EUR",
+        ):
+            yield line
+
+    output = io.BytesIO()
+    rows_count = await convert_csv(lines(), lookup, output, chunk_size)
+
+    assert rows_count == 2
+    assert output.getvalue().decode().splitlines() == [
+        "amount,from_currency,to_currency,rate,conversion_result,last_updated,error",
+        "1,USD,RUB,79.7112,79.7112,1553178002,",
+        "2,RUB,EUR,,,,No exchange rates for RUB/EUR currencies",
+    ]
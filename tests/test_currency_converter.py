@@ -0,0 +1,76 @@
+import random
+from decimal import MAX_EMAX, MIN_EMIN, Decimal, InvalidOperation, localcontext
+
+import pytest
+
+from currency_converter_service.currency import MINOR_UNITS, Currency
+from currency_converter_service.currency_converter import (
+    Rounding,
+    calculate_conversion,
+    calculate_fixed_point_conversion,
+)
+
+
+def random_decimal(generator: random.Random) -> Decimal:
+    digits = generator.randint(1, 18)
+    sign = generator.choice(["", "-"])
+    coefficient = generator.randrange(10 ** digits)
+    return Decimal(f"{sign}{coefficient}E{generator.randint(-digits - 8, 4)}")
+
+
+@pytest.mark.parametrize("rounding", list(Rounding))
+@pytest.mark.parametrize("minor_units", [0, 2, 3, 4])
+def test_fixed_point_conversion_equals_quantized_decimal_one(
+    rounding: Rounding, minor_units: int
+) -> None:
+    generator = random.Random(1584989828)
+
+    with localcontext() as context:
+        context.prec, context.Emax, context.Emin = 100, MAX_EMAX, MIN_EMIN
+        for _ in range(2000):
+            amount, rate = random_decimal(generator), random_decimal(generator)
+            if generator.random() < 0.1:
+                # Ties are rare among random values, make some.
+                amount = Decimal(generator.randrange(1, 100)) + Decimal("0.005")
+                rate = Decimal("1")
+
+            assert calculate_fixed_point_conversion(
+                amount, rate, minor_units, rounding
+            ) == calculate_conversion(amount, rate, minor_units, rounding), (
+                amount,
+                rate,
+            )
+
+
+@pytest.mark.parametrize(
+    "amount, rounding, conversion_result",
+    [
+        ("1E-999999", Rounding.UP, "0.01"),
+        ("1E-999999", Rounding.HALF_UP, "0.00"),
+        ("-1E-999999", Rounding.FLOOR, "-0.01"),
+        ("-1E-999999", Rounding.CEILING, "0.00"),
+        ("0E+999999", Rounding.HALF_EVEN, "0.00"),
+    ],
+)
+def test_fixed_point_conversion_of_extreme_amounts(
+    amount: str, rounding: Rounding, conversion_result: str
+) -> None:
+    assert calculate_fixed_point_conversion(
+        Decimal(amount), Decimal("79.7112"), 2, rounding
+    ) == Decimal(conversion_result)
+
+
+@pytest.mark.parametrize("amount", ["1E+999999", "1E+26", "Infinity", "NaN"])
+def test_fixed_point_conversion_fails_out_of_precision(amount: str) -> None:
+    with pytest.raises(InvalidOperation):
+        calculate_fixed_point_conversion(Decimal(amount), Decimal("79.7112"), 2)
+
+
+def test_fixed_point_conversion_without_minor_units() -> None:
+    assert MINOR_UNITS[Currency.XAU] is None
+    assert MINOR_UNITS[Currency.JPY] == 0
+    assert MINOR_UNITS[Currency.USD] == 2
+
+    assert calculate_fixed_point_conversion(
+        Decimal("1.5"), Decimal("1234.56789"), MINOR_UNITS[Currency.XAU]
+    ) == Decimal("1851.851835")
@@ -1,21 +1,63 @@
+import asyncio
+import json
+import struct
 from operator import eq, ne
-from typing import Callable, Dict, Iterable, Iterator, Tuple
+from time import time
+from typing import (
+    AsyncIterator,
+    Callable,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Tuple,
+    Union,
+)
 
 import pytest
 from aioredis import Redis
 from more_itertools import first
+from prometheus_client import REGISTRY
 
 from currency_converter_service.currency import Currency
 from currency_converter_service.dependencies import (
+    CircuitBreaker,
     CurrencyExchangeRatesStorage,
+    DatabaseUnavailable,
+    ExchangeRatesCache,
+    IngestionQueue,
+    Replica,
+    ReplicaSet,
+    SharedRatesTable,
+    create_connection_pool,
     preprocess,
 )
-from currency_converter_service.dependencies.rates_storage import LoadableExchangeRates
+from currency_converter_service.dependencies.database import (
+    GuardedMultiExec,
+    GuardedPipeline,
+    GuardedRedis,
+    PipeliningConnectionsPool,
+)
+from currency_converter_service.dependencies.rates_encoding import (
+    StorageFormat,
+    decode_exchange_rate,
+    encode_exchange_rate,
+)
+from currency_converter_service.dependencies.rates_storage import (
+    GENERATION_STORAGE_KEY,
+    LoadableExchangeRates,
+)
+from currency_converter_service.dependencies.shared_rates import SharedRatesUnavailable
+from currency_converter_service.dependencies.single_flight import SingleFlight
 from currency_converter_service.models import (
     CurrencyExchangeRatesLoadRequest,
+    DeltaLoadReport,
     ExchangeRate,
+    LoadJobStatus,
     LoadStatus,
 )
+from tests.conftest import REDIS_TEST_SERVER_URI
 
 
 @pytest.mark.parametrize(
@@ -220,3 +262,953 @@ async def test_load_exchange_rates_succeeded(
     assert operator(exchange_rates, exchange_rates_after_load)
 
     assert status == expected_load_status
+
+
+@pytest.mark.parametrize("merge, mode", [(True, "merge"), (False, "replace")])
+@pytest.mark.asyncio
+async def test_load_exchange_rates_observes_load_metrics(
+    database: Redis, merge: bool, mode: str
+) -> None:
+    def sample(name: str, **labels: str) -> float:
+        return REGISTRY.get_sample_value(name, labels) or 0
+
+    load_labels = {"mode": mode, "status": LoadStatus.SUCCESS.value}
+    loads_before = sample("exchange_rates_load_duration_seconds_count", **load_labels)
+    rates_before = sample("exchange_rates_load_size_sum", mode=mode)
+
+    currency_exchange_rates_storage = CurrencyExchangeRatesStorage(database)
+    await currency_exchange_rates_storage.load_exchange_rates(
+        [
+            ("exchange-rates:USD", {"RUB": "{}", "EUR": "{}"}),
+            ("exchange-rates:RUB", {"USD": "{}"}),
+        ],
+        merge,
+    )
+
+    assert sample("exchange_rates_load_size_sum", mode=mode) == rates_before + 3
+    assert (
+        sample("exchange_rates_load_duration_seconds_count", **load_labels)
+        == loads_before + 1
+    )
+
+
+@pytest.mark.asyncio
+async def test_fetch_exchange_rate_served_from_cache(database: Redis) -> None:
+    await database.hmset_dict(
+        "exchange-rates:EUR",
+        {"GBP": '{"rate": "0.918316", "last_updated": 1584989828}'},
+    )
+
+    cache = ExchangeRatesCache(ttl=60, max_size=10)
+    currency_exchange_rates_storage = CurrencyExchangeRatesStorage(database, cache)
+    await currency_exchange_rates_storage.fetch_exchange_rate(
+        Currency.EUR, Currency.GBP
+    )
+
+    await database.delete("exchange-rates:EUR")
+    fetched_exchange_rate = await currency_exchange_rates_storage.fetch_exchange_rate(
+        Currency.EUR, Currency.GBP
+    )
+
+    assert fetched_exchange_rate == ExchangeRate(
+        rate="0.918316", last_updated=1584989828
+    )
+
+
+@pytest.mark.parametrize(
+    "cache, expected_exchange_rates",
+    [
+        (None, {Currency.RUB: ExchangeRate(rate="0.0125", last_updated=1584989900)},),
+        (
+            ExchangeRatesCache(ttl=60, max_size=10),
+            {
+                Currency.GBP: ExchangeRate(rate="0.918316", last_updated=1584989828),
+                Currency.USD: ExchangeRate(rate="1.25", last_updated=1584989828),
+            },
+        ),
+    ],
+)
+@pytest.mark.asyncio
+async def test_fetch_all_rates(
+    database: Redis,
+    cache: Optional[ExchangeRatesCache],
+    expected_exchange_rates: Dict[Currency, ExchangeRate],
+) -> None:
+    await database.hmset_dict(
+        "exchange-rates:EUR",
+        {
+            "GBP": '{"rate": "0.918316", "last_updated": 1584989828}',
+            "USD": '{"rate": "1.25", "last_updated": 1584989828}',
+        },
+    )
+
+    currency_exchange_rates_storage = CurrencyExchangeRatesStorage(database, cache)
+    await currency_exchange_rates_storage.fetch_all_rates(Currency.EUR)
+    await database.delete("exchange-rates:EUR")
+    await database.hmset_dict(
+        "exchange-rates:EUR", {"RUB": '{"rate": "0.0125", "last_updated": 1584989900}'}
+    )
+    exchange_rates = await currency_exchange_rates_storage.fetch_all_rates(Currency.EUR)
+
+    assert exchange_rates == expected_exchange_rates
+    assert await currency_exchange_rates_storage.fetch_all_rates(Currency.AED) == {}
+
+
+@pytest.mark.asyncio
+async def test_cached_exchange_rates_dropped_on_new_generation(database: Redis) -> None:
+    await database.hmset_dict(
+        "exchange-rates:EUR",
+        {"GBP": '{"rate": "0.918316", "last_updated": 1584989828}'},
+    )
+
+    reading_storage = CurrencyExchangeRatesStorage(
+        database, ExchangeRatesCache(ttl=0, max_size=10)
+    )
+    await reading_storage.fetch_exchange_rate(Currency.EUR, Currency.GBP)
+
+    loading_storage = CurrencyExchangeRatesStorage(database)
+    await loading_storage.load_exchange_rates(
+        (
+            (
+                "exchange-rates:EUR",
+                {"GBP": '{"rate": "0.92", "last_updated": 1584989900}'},
+            ),
+        ),
+        merge=True,
+    )
+    fetched_exchange_rate = await reading_storage.fetch_exchange_rate(
+        Currency.EUR, Currency.GBP
+    )
+
+    assert fetched_exchange_rate == ExchangeRate(rate="0.92", last_updated=1584989900)
+
+
+def test_exchange_rates_cache_evicts_least_recently_used() -> None:
+    cache = ExchangeRatesCache(ttl=60, max_size=2)
+    cache.validate("generation")
+
+    rates = {Currency.RUB: ExchangeRate(rate="79.75", last_updated=1584989828)}
+    cache.put(Currency.USD, rates, "generation")
+    cache.put(Currency.EUR, rates, "generation")
+    cache.get(Currency.USD)
+    cache.put(Currency.GBP, rates, "generation")
+    cache.put(Currency.CHF, rates, "outdated-generation")
+
+    assert len(cache) == 2
+    assert cache.get(Currency.EUR) is None
+    assert cache.get(Currency.USD) == rates
+    assert cache.get(Currency.CHF) is None
+
+
+@pytest.mark.asyncio
+async def test_cache_tracks_published_updates(
+    database: Redis, database_pool: Redis
+) -> None:
+    await database.hmset_dict(
+        "exchange-rates:EUR",
+        {"GBP": '{"rate": "0.918316", "last_updated": 1584989828}'},
+    )
+    await database.hmset_dict(
+        "exchange-rates:USD", {"RUB": '{"rate": "79.75", "last_updated": 1584989828}'}
+    )
+
+    reading_storage = CurrencyExchangeRatesStorage(
+        database_pool, ExchangeRatesCache(ttl=60, max_size=10)
+    )
+    tracker = asyncio.ensure_future(reading_storage.track_updates(retry_delay=0))
+    await asyncio.sleep(0.05)
+    await reading_storage.fetch_exchange_rate(Currency.EUR, Currency.GBP)
+    await reading_storage.fetch_exchange_rate(Currency.USD, Currency.RUB)
+    await database.delete("exchange-rates:USD")
+
+    loading_storage = CurrencyExchangeRatesStorage(database)
+    await loading_storage.load_exchange_rates(
+        (
+            (
+                "exchange-rates:EUR",
+                {"GBP": '{"rate": "0.92", "last_updated": 1584989900}'},
+            ),
+        ),
+        merge=True,
+    )
+    await asyncio.sleep(0.05)
+
+    updated_exchange_rate = await reading_storage.fetch_exchange_rate(
+        Currency.EUR, Currency.GBP
+    )
+    untouched_exchange_rate = await reading_storage.fetch_exchange_rate(
+        Currency.USD, Currency.RUB
+    )
+
+    tracker.cancel()
+    await asyncio.gather(tracker, return_exceptions=True)
+
+    assert updated_exchange_rate == ExchangeRate(rate="0.92", last_updated=1584989900)
+    assert untouched_exchange_rate == ExchangeRate(
+        rate="79.75", last_updated=1584989828
+    )
+
+
+@pytest.mark.parametrize("cache", [None, ExchangeRatesCache(ttl=60, max_size=10)])
+@pytest.mark.asyncio
+async def test_fetch_exchange_rates(
+    database: Redis, cache: Optional[ExchangeRatesCache]
+) -> None:
+    await database.hmset_dict(
+        "exchange-rates:EUR",
+        {
+            "RUB": '{"rate": "79.75", "last_updated": 1584989828}',
+            "GBP": '{"rate": "0.918316", "last_updated": 1584989828}',
+        },
+    )
+    await database.hmset_dict(
+        "exchange-rates:USD", {"RUB": '{"rate": "79.7112", "last_updated": 1553178002}'}
+    )
+
+    currency_exchange_rates_storage = CurrencyExchangeRatesStorage(database, cache)
+    fetched_exchange_rates = await currency_exchange_rates_storage.fetch_exchange_rates(
+        [
+            (Currency.EUR, Currency.GBP),
+            (Currency.USD, Currency.RUB),
+            (Currency.EUR, Currency.RUB),
+            (Currency.EUR, Currency.GBP),
+            (Currency.RUB, Currency.USD),
+        ]
+    )
+
+    assert fetched_exchange_rates == {
+        (Currency.EUR, Currency.GBP): ExchangeRate(
+            rate="0.918316", last_updated=1584989828
+        ),
+        (Currency.EUR, Currency.RUB): ExchangeRate(
+            rate="79.75", last_updated=1584989828
+        ),
+        (Currency.USD, Currency.RUB): ExchangeRate(
+            rate="79.7112", last_updated=1553178002
+        ),
+        (Currency.RUB, Currency.USD): None,
+    }
+
+
+@pytest.mark.asyncio
+async def test_replacing_load_swaps_staged_exchange_rates(database: Redis) -> None:
+    await database.set("unrelated-key", "value")
+    await database.hmset_dict(
+        "exchange-rates:USD", {"RUB": '{"rate": "79.75", "last_updated": 1584989828}'}
+    )
+    await database.hmset_dict(
+        "exchange-rates:EUR",
+        {"GBP": '{"rate": "0.918316", "last_updated": 1584989828}'},
+    )
+
+    currency_exchange_rates_storage = CurrencyExchangeRatesStorage(database)
+    status = await currency_exchange_rates_storage.load_exchange_rates(
+        (
+            (
+                "exchange-rates:EUR",
+                {"RUB": '{"rate": "86.5", "last_updated": 1584989900}'},
+            ),
+        ),
+        merge=False,
+    )
+
+    assert status == LoadStatus.SUCCESS
+    assert await database.hgetall("exchange-rates:EUR") == {
+        "RUB": '{"rate": "86.5", "last_updated": 1584989900}'
+    }
+    assert await database.ttl("exchange-rates:EUR") == -1
+    assert await database.exists("exchange-rates:USD") == 0
+    assert await database.get("unrelated-key") == "value"
+    assert await database.keys("exchange-rates-staging:*") == []
+
+
+@pytest.mark.asyncio
+async def test_delta_load_writes_only_newer_exchange_rates(
+    database: Redis, raw_database_pool: Redis
+) -> None:
+    stored_rub = '{"rate": "79.75", "last_updated": 1584989828}'
+    stored_eur = encode_exchange_rate(
+        ExchangeRate(rate="0.92", last_updated=1584989828), StorageFormat.BINARY
+    )
+    await raw_database_pool.hmset_dict(
+        "exchange-rates:USD", {"RUB": stored_rub, "EUR": stored_eur}
+    )
+    await raw_database_pool.set("exchange-rates-generation", "stored")
+    loadable_exchange_rates = [
+        (
+            "exchange-rates:USD",
+            {
+                "RUB": '{"rate": "79.5", "last_updated": 1584989000}',
+                "EUR": encode_exchange_rate(
+                    ExchangeRate(rate="0.93", last_updated=1584989828),
+                    StorageFormat.BINARY,
+                ),
+                "GBP": '{"rate": "0.8", "last_updated": 1584989900}',
+            },
+        ),
+        ("exchange-rates:RUB", {"USD": '{"rate": "0.0125", "last_updated": 1}'}),
+    ]
+
+    currency_exchange_rates_storage = CurrencyExchangeRatesStorage(raw_database_pool)
+    report = await currency_exchange_rates_storage.delta_load_exchange_rates(
+        loadable_exchange_rates
+    )
+    generation = await raw_database_pool.get("exchange-rates-generation")
+    repeated_report = await currency_exchange_rates_storage.delta_load_exchange_rates(
+        loadable_exchange_rates
+    )
+
+    assert report == DeltaLoadReport(status=LoadStatus.SUCCESS, applied=2, skipped=2)
+    assert repeated_report == DeltaLoadReport(
+        status=LoadStatus.SUCCESS, applied=0, skipped=4
+    )
+    assert await raw_database_pool.hgetall("exchange-rates:USD") == {
+        b"RUB": stored_rub.encode(),
+        b"EUR": stored_eur,
+        b"GBP": b'{"rate": "0.8", "last_updated": 1584989900}',
+    }
+    assert await raw_database_pool.hgetall("exchange-rates:RUB") == {
+        b"USD": b'{"rate": "0.0125", "last_updated": 1}'
+    }
+    assert generation != b"stored"
+    assert await raw_database_pool.get("exchange-rates-generation") == generation
+
+
+@pytest.mark.asyncio
+async def test_ingestion_queue_coalesces_merging_loads(database: Redis) -> None:
+    def sample(mode: str) -> float:
+        labels = {"mode": mode, "status": LoadStatus.SUCCESS.value}
+        return (
+            REGISTRY.get_sample_value(
+                "exchange_rates_load_duration_seconds_count", labels
+            )
+            or 0
+        )
+
+    def load_request(
+        base: str, quotes: Dict[str, ExchangeRate]
+    ) -> CurrencyExchangeRatesLoadRequest:
+        return CurrencyExchangeRatesLoadRequest(
+            currency_exchange_rates=[{"base": base, "quotes": quotes}]
+        )
+
+    merges_before, replaces_before = sample("merge"), sample("replace")
+    ingestion_queue = IngestionQueue(
+        CurrencyExchangeRatesStorage(database),
+        database,
+        max_size=10,
+        batch_size=100,
+        job_ttl=60,
+    )
+    jobs = [
+        await ingestion_queue.submit(
+            load_request("EUR", {"GBP": ExchangeRate(rate="0.9", last_updated=1)}),
+            merge=False,
+            delta=False,
+        ),
+        await ingestion_queue.submit(
+            load_request("USD", {"RUB": ExchangeRate(rate="79", last_updated=1)}),
+            merge=True,
+            delta=False,
+        ),
+        await ingestion_queue.submit(
+            load_request("USD", {"RUB": ExchangeRate(rate="80", last_updated=2)}),
+            merge=True,
+            delta=False,
+        ),
+    ]
+    queued_job = await ingestion_queue.fetch_job(jobs[0].job_id)
+
+    worker = asyncio.ensure_future(ingestion_queue.run())
+    while (await ingestion_queue.fetch_job(jobs[-1].job_id)).status in (
+        LoadJobStatus.QUEUED,
+        LoadJobStatus.RUNNING,
+    ):
+        await asyncio.sleep(0.01)
+    worker.cancel()
+    await asyncio.gather(worker, return_exceptions=True)
+
+    assert queued_job == jobs[0]
+    assert [(await ingestion_queue.fetch_job(job.job_id)).status for job in jobs] == [
+        LoadJobStatus.SUCCESS
+    ] * 3
+    assert await database.hgetall("exchange-rates:USD") == {
+        "RUB": '{"rate": "80", "last_updated": 2}'
+    }
+    assert await database.hgetall("exchange-rates:EUR") == {
+        "GBP": '{"rate": "0.9", "last_updated": 1}'
+    }
+    assert sample("replace") == replaces_before + 1
+    assert sample("merge") == merges_before + 1
+
+
+@pytest.mark.asyncio
+async def test_replacing_load_fails_when_staged_exchange_rates_expire(
+    database: Redis,
+) -> None:
+    await database.hmset_dict(
+        "exchange-rates:USD", {"RUB": '{"rate": "79.75", "last_updated": 1584989828}'}
+    )
+
+    async def expiring_chunks():
+        yield [("exchange-rates:EUR", {"RUB": '{"rate": "86.5", "last_updated": 1}'})]
+        for staging_key in await database.keys("exchange-rates-staging:*"):
+            await database.delete(staging_key)
+        yield [("exchange-rates:GBP", {"RUB": '{"rate": "99.1", "last_updated": 1}'})]
+
+    currency_exchange_rates_storage = CurrencyExchangeRatesStorage(database)
+    status = await currency_exchange_rates_storage.load_exchange_rates_chunks(
+        expiring_chunks(), merge=False
+    )
+
+    assert status == LoadStatus.FAILURE
+    assert await database.hgetall("exchange-rates:USD") == {
+        "RUB": '{"rate": "79.75", "last_updated": 1584989828}'
+    }
+    assert await database.exists("exchange-rates:EUR", "exchange-rates:GBP") == 0
+    assert await database.keys("exchange-rates-staging:*") == []
+
+
+@pytest.mark.parametrize(
+    "exchange_rate, storage_format, expected_encoded_rate",
+    [
+        (
+            ExchangeRate(rate="79.75", last_updated=1584989828),
+            StorageFormat.JSON,
+            '{"rate": "79.75", "last_updated": 1584989828}',
+        ),
+        (
+            ExchangeRate(rate="79.75", last_updated=1584989828),
+            StorageFormat.BINARY,
+            b"\x01" + struct.pack(">qbq", 7975, -2, 1584989828),
+        ),
+        (
+            ExchangeRate(rate="1.00000000000000000001", last_updated=1584989828),
+            StorageFormat.BINARY,
+            '{"rate": "1.00000000000000000001", "last_updated": 1584989828}',
+        ),
+    ],
+)
+def test_exchange_rate_encoding(
+    exchange_rate: ExchangeRate,
+    storage_format: StorageFormat,
+    expected_encoded_rate: Union[bytes, str],
+) -> None:
+    encoded_rate = encode_exchange_rate(exchange_rate, storage_format)
+
+    assert encoded_rate == expected_encoded_rate
+    assert decode_exchange_rate(encoded_rate) == exchange_rate
+
+
+@pytest.mark.asyncio
+async def test_migrate_storage_format(raw_database_pool: Redis) -> None:
+    await raw_database_pool.hmset_dict(
+        "exchange-rates:EUR",
+        {
+            "RUB": '{"rate": "79.75", "last_updated": 1584989828}',
+            "GBP": b"\x01" + struct.pack(">qbq", 918316, -6, 1584989828),
+        },
+    )
+
+    currency_exchange_rates_storage = CurrencyExchangeRatesStorage(raw_database_pool)
+    status = await currency_exchange_rates_storage.migrate_storage_format(
+        StorageFormat.BINARY
+    )
+    stored_exchange_rates = await raw_database_pool.hgetall("exchange-rates:EUR")
+    fetched_exchange_rates = await currency_exchange_rates_storage.fetch_exchange_rates(
+        [(Currency.EUR, Currency.RUB), (Currency.EUR, Currency.GBP)]
+    )
+    await raw_database_pool.flushdb()
+
+    assert status == LoadStatus.SUCCESS
+    assert all(value.startswith(b"\x01") for value in stored_exchange_rates.values())
+    assert fetched_exchange_rates == {
+        (Currency.EUR, Currency.RUB): ExchangeRate(
+            rate="79.75", last_updated=1584989828
+        ),
+        (Currency.EUR, Currency.GBP): ExchangeRate(
+            rate="0.918316", last_updated=1584989828
+        ),
+    }
+
+
+@pytest.mark.asyncio
+async def test_circuit_breaker_fails_fast_and_probes_after_backoff() -> None:
+    circuit_breaker = CircuitBreaker(failure_threshold=2, backoff=0.05, max_backoff=1)
+
+    circuit_breaker.record_failure()
+    circuit_breaker.check()
+
+    circuit_breaker.record_failure()
+    with pytest.raises(DatabaseUnavailable):
+        circuit_breaker.check()
+
+    await asyncio.sleep(0.05)
+    circuit_breaker.check()
+    with pytest.raises(DatabaseUnavailable):
+        circuit_breaker.check()
+
+    circuit_breaker.record_success()
+    circuit_breaker.check()
+    assert not circuit_breaker.is_open
+
+
+@pytest.mark.asyncio
+async def test_circuit_breaker_guard_records_connection_failures() -> None:
+    circuit_breaker = CircuitBreaker(failure_threshold=1, backoff=10, max_backoff=10)
+
+    async def fail() -> None:
+        raise ConnectionRefusedError()
+
+    with pytest.raises(DatabaseUnavailable) as error:
+        await circuit_breaker.guard(fail(), timeout=1)
+
+    assert circuit_breaker.is_open
+    assert 0 < error.value.retry_after <= 10
+
+
+@pytest.mark.asyncio
+async def test_guarded_pool_multiplexes_pipelines_and_transactions(
+    database: Redis,
+) -> None:
+    circuit_breaker = CircuitBreaker(failure_threshold=1, backoff=10, max_backoff=10)
+    connection_pool = await create_connection_pool(
+        REDIS_TEST_SERVER_URI,
+        max_size=1,
+        command_timeout=1,
+        circuit_breaker=circuit_breaker,
+        auto_pipelining=True,
+    )
+    currency_exchange_rates_storage = CurrencyExchangeRatesStorage(connection_pool)
+
+    try:
+        load_statuses = await asyncio.gather(
+            *(
+                currency_exchange_rates_storage.load_exchange_rates(
+                    (
+                        (
+                            "exchange-rates:USD",
+                            {quote: '{"rate": "79.75", "last_updated": 1584989828}'},
+                        ),
+                    ),
+                    merge=True,
+                )
+                for quote in ("RUB", "EUR", "GBP")
+            )
+        )
+        fetched_exchange_rates, fetched_exchange_rate = await asyncio.gather(
+            currency_exchange_rates_storage.fetch_exchange_rates(
+                [(Currency.USD, Currency.EUR), (Currency.USD, Currency.GBP)]
+            ),
+            currency_exchange_rates_storage.fetch_exchange_rate(
+                Currency.USD, Currency.RUB
+            ),
+        )
+        pool_size = connection_pool.connection.size
+    finally:
+        connection_pool.close()
+        await connection_pool.wait_closed()
+
+    assert isinstance(connection_pool, GuardedRedis)
+    assert isinstance(connection_pool.connection, PipeliningConnectionsPool)
+    assert isinstance(connection_pool.pipeline(), GuardedPipeline)
+    assert isinstance(connection_pool.multi_exec(), GuardedMultiExec)
+    assert load_statuses == [LoadStatus.SUCCESS] * 3
+    assert pool_size == 1
+    exchange_rate = ExchangeRate(rate="79.75", last_updated=1584989828)
+    assert fetched_exchange_rates == {
+        (Currency.USD, Currency.EUR): exchange_rate,
+        (Currency.USD, Currency.GBP): exchange_rate,
+    }
+    assert fetched_exchange_rate == exchange_rate
+    assert not circuit_breaker.is_open
+
+
+@pytest.mark.asyncio
+async def test_guarded_pool_times_out_commands_and_fails_fast(database: Redis) -> None:
+    circuit_breaker = CircuitBreaker(failure_threshold=1, backoff=10, max_backoff=10)
+    connection_pool = await create_connection_pool(
+        REDIS_TEST_SERVER_URI,
+        command_timeout=0.05,
+        circuit_breaker=circuit_breaker,
+        auto_pipelining=True,
+    )
+
+    try:
+        with pytest.raises(DatabaseUnavailable):
+            await connection_pool.blpop("missing-key", timeout=1)
+        with pytest.raises(DatabaseUnavailable):
+            await CurrencyExchangeRatesStorage(connection_pool).fetch_exchange_rate(
+                Currency.USD, Currency.RUB
+            )
+    finally:
+        connection_pool.close()
+        await connection_pool.wait_closed()
+
+    assert circuit_breaker.is_open
+
+
+@pytest.mark.parametrize(
+    "with_cache, expected_calls", [(True, ["get", "pipeline"]), (False, ["hget"])]
+)
+@pytest.mark.asyncio
+async def test_concurrent_fetches_share_single_flight(
+    database: Redis, with_cache: bool, expected_calls: List[str]
+) -> None:
+    class CountingRedis:
+        def __init__(self, redis: Redis) -> None:
+            self.calls: List[str] = []
+            self._redis = redis
+
+        def __getattr__(self, name: str):
+            self.calls.append(name)
+            return getattr(self._redis, name)
+
+    await database.hmset_dict(
+        "exchange-rates:USD",
+        {"RUB": json.dumps({"rate": "79.7112", "last_updated": 1553178002})},
+    )
+    connection_pool = CountingRedis(database)
+    cache = ExchangeRatesCache(ttl=60, max_size=10) if with_cache else None
+    currency_exchange_rates_storage = CurrencyExchangeRatesStorage(
+        connection_pool, cache  # type: ignore
+    )
+
+    exchange_rates = await asyncio.gather(
+        *(
+            currency_exchange_rates_storage.fetch_exchange_rate(
+                base_currency=Currency.USD, quote_currency=Currency.RUB
+            )
+            for _ in range(10)
+        )
+    )
+
+    assert connection_pool.calls == expected_calls
+    assert all(exchange_rate is exchange_rates[0] for exchange_rate in exchange_rates)
+    assert exchange_rates[0] == ExchangeRate(rate="79.7112", last_updated=1553178002)
+
+
+@pytest.mark.asyncio
+async def test_single_flight_joins_fetches_in_flight() -> None:
+    single_flight: SingleFlight[str, str] = SingleFlight()
+    fetched_keys = []
+
+    async def fetch(keys: List[str]) -> Dict[str, str]:
+        fetched_keys.append(keys)
+        await asyncio.sleep(0)
+        return {key: key.upper() for key in keys}
+
+    values = await asyncio.gather(
+        single_flight.fetch_many(["a", "b"], fetch),
+        single_flight.fetch_many(["b", "c"], fetch),
+    )
+
+    assert values == [{"a": "A", "b": "B"}, {"b": "B", "c": "C"}]
+    assert fetched_keys == [["a", "b"], ["c"]]
+    assert len(single_flight) == 0
+
+
+@pytest.mark.parametrize("merge", [True, False])
+@pytest.mark.asyncio
+async def test_loaded_exchange_rates_kept_in_history(
+    database: Redis, merge: bool
+) -> None:
+    now = int(time())
+    currency_exchange_rates_storage = CurrencyExchangeRatesStorage(
+        database, history_retention=3600
+    )
+
+    for rate, last_updated in (
+        ("81", now - 9000),
+        ("80", now - 7200),
+        ("79", now - 60),
+        ("78", now),
+    ):
+        await currency_exchange_rates_storage.load_exchange_rates(
+            [
+                (
+                    "exchange-rates:USD",
+                    {"RUB": json.dumps({"rate": rate, "last_updated": last_updated})},
+                )
+            ],
+            merge,
+        )
+
+    async def fetch_historical_rate(at: int) -> Optional[ExchangeRate]:
+        return await currency_exchange_rates_storage.fetch_historical_exchange_rate(
+            Currency.USD, Currency.RUB, at
+        )
+
+    assert await fetch_historical_rate(now - 7300) is None
+    assert await fetch_historical_rate(now - 3600) == ExchangeRate(
+        rate="80", last_updated=now - 7200
+    )
+    assert await fetch_historical_rate(now - 1) == ExchangeRate(
+        rate="79", last_updated=now - 60
+    )
+    assert await fetch_historical_rate(now + 60) == ExchangeRate(
+        rate="78", last_updated=now
+    )
+    assert await database.zcard("exchange-rates-history:USD:RUB") == 3
+    assert await database.ttl("exchange-rates-history:USD:RUB") == -1
+
+
+@pytest.mark.asyncio
+async def test_import_history_keeps_current_exchange_rates(database: Redis) -> None:
+    now = int(time())
+    currency_exchange_rates_storage = CurrencyExchangeRatesStorage(
+        database, history_retention=3600
+    )
+
+    async def loadable_chunks() -> AsyncIterator[List[LoadableExchangeRates]]:
+        yield [
+            ("exchange-rates:USD", {"RUB": f'{{"rate": "80", "last_updated": {now}}}'}),
+            ("exchange-rates:USD", {"RUB": f'{{"rate": "81", "last_updated": {now}}}'}),
+        ]
+
+    status = await currency_exchange_rates_storage.import_history(loadable_chunks())
+
+    assert status == LoadStatus.SUCCESS
+    assert await database.exists("exchange-rates:USD") == 0
+    assert await database.zrange("exchange-rates-history:USD:RUB") == [
+        f'{{"rate": "81", "last_updated": {now}}}'
+    ]
+
+
+def test_shared_rates_table_read_by_other_process(tmp_path) -> None:
+    path = str(tmp_path / "rates")
+    writer = SharedRatesTable.create(path)
+    reader = SharedRatesTable(path, max_age=60)
+
+    with pytest.raises(SharedRatesUnavailable):
+        reader.exchange_rate(Currency.USD, Currency.RUB)
+
+    for rate in ("79.75", "80.5"):
+        writer.publish(
+            "generation",
+            {
+                Currency.USD: {
+                    Currency.RUB: ExchangeRate(rate=rate, last_updated=1584989828)
+                },
+                Currency.EUR: {
+                    Currency.RUB: ExchangeRate(rate="1e300", last_updated=1584989828)
+                },
+            },
+        )
+
+    assert reader.generation == "generation"
+    assert reader.exchange_rate(Currency.USD, Currency.RUB) == ExchangeRate(
+        rate="80.5", last_updated=1584989828
+    )
+    assert reader.exchange_rate(Currency.USD, Currency.GBP) is None
+    assert reader.exchange_rates([Currency.USD, Currency.GBP]) == {
+        Currency.USD: {
+            Currency.RUB: ExchangeRate(rate="80.5", last_updated=1584989828)
+        },
+        Currency.GBP: {},
+    }
+    with pytest.raises(SharedRatesUnavailable):
+        reader.exchange_rate(Currency.EUR, Currency.RUB)
+
+    writer.close()
+    reader.close()
+
+
+async def wait_until(condition: Callable[[], bool], timeout: float = 5.0) -> None:
+    for _ in range(int(timeout / 0.01)):
+        if condition():
+            return
+        await asyncio.sleep(0.01)
+
+    raise AssertionError("condition not met in time")
+
+
+@pytest.mark.asyncio
+async def test_storage_reads_refreshed_shared_rates(
+    database: Redis, database_pool: Redis, tmp_path
+) -> None:
+    path = str(tmp_path / "rates")
+    writer = SharedRatesTable.create(path)
+    shared_rates = SharedRatesTable(path, max_age=60)
+    await database.hmset_dict(
+        "exchange-rates:USD", {"RUB": '{"rate": "79.75", "last_updated": 1584989828}'}
+    )
+
+    refresher = asyncio.ensure_future(
+        CurrencyExchangeRatesStorage(database_pool).refresh_shared_rates(
+            writer, interval=60
+        )
+    )
+
+    def is_published() -> bool:
+        try:
+            return shared_rates.exchange_rate(Currency.USD, Currency.RUB) is not None
+        except SharedRatesUnavailable:
+            return False
+
+    await wait_until(is_published)
+    await database.delete("exchange-rates:USD")
+    currency_exchange_rates_storage = CurrencyExchangeRatesStorage(
+        database_pool, shared_rates=shared_rates
+    )
+    shared_exchange_rate = await currency_exchange_rates_storage.fetch_exchange_rate(
+        Currency.USD, Currency.RUB
+    )
+
+    await currency_exchange_rates_storage.load_exchange_rates(
+        (
+            (
+                "exchange-rates:EUR",
+                {"RUB": '{"rate": "90", "last_updated": 1584989900}'},
+            ),
+        ),
+        merge=True,
+    )
+    generation = await database.get(GENERATION_STORAGE_KEY)
+    await wait_until(lambda: shared_rates.generation == generation)
+    refreshed_exchange_rates = await (
+        currency_exchange_rates_storage.fetch_all_exchange_rates()
+    )
+
+    refresher.cancel()
+    await asyncio.gather(refresher, return_exceptions=True)
+    writer.close()
+    shared_rates.close()
+
+    assert shared_exchange_rate == ExchangeRate(rate="79.75", last_updated=1584989828)
+    assert refreshed_exchange_rates == {
+        Currency.EUR: {Currency.RUB: ExchangeRate(rate="90", last_updated=1584989900)}
+    }
+
+
+@pytest.mark.asyncio
+async def test_outdated_shared_rates_fall_back_to_storage(
+    database: Redis, tmp_path
+) -> None:
+    path = str(tmp_path / "rates")
+    writer = SharedRatesTable.create(path)
+    writer.publish(
+        "generation",
+        {Currency.USD: {Currency.RUB: ExchangeRate(rate="1", last_updated=1)}},
+    )
+    await database.hmset_dict(
+        "exchange-rates:USD", {"RUB": '{"rate": "79.75", "last_updated": 1584989828}'}
+    )
+
+    currency_exchange_rates_storage = CurrencyExchangeRatesStorage(
+        database, shared_rates=SharedRatesTable(path, max_age=0)
+    )
+    exchange_rate = await currency_exchange_rates_storage.fetch_exchange_rate(
+        Currency.USD, Currency.RUB
+    )
+    writer.close()
+
+    assert exchange_rate == ExchangeRate(rate="79.75", last_updated=1584989828)
+
+
+async def connect_replica(uri: str) -> Replica:
+    circuit_breaker = CircuitBreaker(failure_threshold=1, backoff=10, max_backoff=10)
+    connection_pool = await create_connection_pool(
+        uri, min_size=0, circuit_breaker=circuit_breaker, watched=False
+    )
+    return Replica(connection_pool, circuit_breaker)
+
+
+async def count_commands(connection: Redis, command: str) -> int:
+    info = await connection.info("commandstats")
+    return int(info["commandstats"].get(f"cmdstat_{command}", {}).get("calls", 0))
+
+
+@pytest.mark.asyncio
+async def test_reads_balanced_across_replicas(
+    database: Redis, spawn_redis_server: Callable
+) -> None:
+    replicas = ReplicaSet(
+        [await connect_replica(await spawn_redis_server()) for _ in range(2)]
+    )
+    currency_exchange_rates_storage = CurrencyExchangeRatesStorage(
+        database, replicas=replicas
+    )
+    await currency_exchange_rates_storage.load_exchange_rates(
+        [
+            (
+                "exchange-rates:EUR",
+                {"GBP": '{"rate": "0.918316", "last_updated": 1584989828}'},
+            )
+        ],
+        merge=False,
+    )
+    await database.execute("WAIT", 2, 1000)
+    hgets_before = await count_commands(database, "hget")
+
+    for _ in range(4):
+        exchange_rate = await currency_exchange_rates_storage.fetch_exchange_rate(
+            Currency.EUR, Currency.GBP
+        )
+        assert exchange_rate == ExchangeRate(rate="0.918316", last_updated=1584989828)
+
+    assert await count_commands(database, "hget") == hgets_before
+    for replica in replicas.replicas:
+        assert await count_commands(replica.connection_pool, "hget") == 2
+        replica.connection_pool.close()
+        await replica.connection_pool.wait_closed()
+
+
+@pytest.mark.asyncio
+async def test_reads_after_load_skip_lagging_replica(
+    database: Redis, spawn_redis_server: Callable
+) -> None:
+    lagging_replica = await connect_replica(await spawn_redis_server(replica=False))
+    await lagging_replica.connection_pool.hmset_dict(
+        "exchange-rates:EUR", {"GBP": '{"rate": "0.9", "last_updated": 1584989000}'},
+    )
+    currency_exchange_rates_storage = CurrencyExchangeRatesStorage(
+        database, replicas=ReplicaSet([lagging_replica])
+    )
+
+    assert await currency_exchange_rates_storage.fetch_exchange_rate(
+        Currency.EUR, Currency.GBP
+    ) == ExchangeRate(rate="0.9", last_updated=1584989000)
+
+    await currency_exchange_rates_storage.load_exchange_rates(
+        [
+            (
+                "exchange-rates:EUR",
+                {"GBP": '{"rate": "0.918316", "last_updated": 1584989828}'},
+            )
+        ],
+        merge=True,
+    )
+
+    assert await currency_exchange_rates_storage.fetch_exchange_rate(
+        Currency.EUR, Currency.GBP
+    ) == ExchangeRate(rate="0.918316", last_updated=1584989828)
+    lagging_replica.connection_pool.close()
+    await lagging_replica.connection_pool.wait_closed()
+
+
+@pytest.mark.asyncio
+async def test_reads_skip_unavailable_replica(
+    database: Redis, spawn_redis_server: Callable
+) -> None:
+    await database.hmset_dict(
+        "exchange-rates:EUR",
+        {"GBP": '{"rate": "0.918316", "last_updated": 1584989828}'},
+    )
+    unavailable_replica = await connect_replica("redis://localhost:1")
+    available_replica = await connect_replica(await spawn_redis_server())
+    currency_exchange_rates_storage = CurrencyExchangeRatesStorage(
+        database, replicas=ReplicaSet([unavailable_replica, available_replica])
+    )
+
+    for _ in range(4):
+        exchange_rate = await currency_exchange_rates_storage.fetch_exchange_rate(
+            Currency.EUR, Currency.GBP
+        )
+        assert exchange_rate == ExchangeRate(rate="0.918316", last_updated=1584989828)
+
+    assert not unavailable_replica.is_available
+    assert await count_commands(available_replica.connection_pool, "hget") >= 3
+    for replica in (unavailable_replica, available_replica):
+        replica.connection_pool.close()
+        await replica.connection_pool.wait_closed()
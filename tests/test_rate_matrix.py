@@ -0,0 +1,93 @@
+import random
+from decimal import Decimal
+from math import isnan
+
+import pytest
+
+from currency_converter_service.currency import Currency
+from currency_converter_service.currency_converter import calculate_conversion
+from currency_converter_service.models import CrossExchangeRate, ExchangeRate
+from currency_converter_service.rate_matrix import RateMatrix, as_decimal
+
+pytest.importorskip("numpy")
+
+
+def test_rate_matrix_converts_many_amounts() -> None:
+    rate_matrix = RateMatrix.from_exchange_rates(
+        {
+            Currency.USD: {
+                Currency.RUB: ExchangeRate(rate="79.7112", last_updated=1553178002)
+            },
+            Currency.EUR: {
+                Currency.GBP: ExchangeRate(rate="0.918316", last_updated=1584989828)
+            },
+        },
+        {
+            (Currency.USD, Currency.GBP): CrossExchangeRate(
+                rate="0.8",
+                last_updated=1553170000,
+                path=[Currency.USD, Currency.EUR, Currency.GBP],
+            )
+        },
+    )
+
+    rates, conversion_results, last_updated = rate_matrix.convert(
+        [Decimal("65"), Decimal("10"), Decimal("10"), Decimal("1")],
+        [
+            (Currency.USD, Currency.RUB),
+            (Currency.EUR, Currency.GBP),
+            (Currency.USD, Currency.GBP),
+            (Currency.RUB, Currency.USD),
+        ],
+    )
+
+    assert [as_decimal(rate) for rate in rates[:3]] == [
+        Decimal("79.7112"),
+        Decimal("0.918316"),
+        Decimal("0.8"),
+    ]
+    assert [as_decimal(result) for result in conversion_results[:3]] == [
+        Decimal("5181.228"),
+        Decimal("9.18316"),
+        Decimal("8"),
+    ]
+    assert list(last_updated[:3]) == [1553178002, 1584989828, 1553170000]
+    assert isnan(rates[3]) and isnan(conversion_results[3])
+    assert rate_matrix.path(Currency.USD, Currency.GBP) == [
+        Currency.USD,
+        Currency.EUR,
+        Currency.GBP,
+    ]
+    assert rate_matrix.path(Currency.USD, Currency.RUB) == [Currency.USD, Currency.RUB]
+
+
+def test_rate_matrix_agrees_with_calculate_conversion() -> None:
+    generator = random.Random(1584989828)
+    currencies = list(Currency)
+
+    exchange_rates = {}
+    currency_pairs, amounts = [], []
+    for _ in range(1000):
+        base_currency, quote_currency = generator.sample(currencies, 2)
+        rate = Decimal(generator.randint(1, 10 ** 9)).scaleb(-generator.randint(0, 9))
+        exchange_rates.setdefault(base_currency, {})[quote_currency] = ExchangeRate(
+            rate=rate, last_updated=1584989828
+        )
+        currency_pairs.append((base_currency, quote_currency))
+        amounts.append(
+            Decimal(generator.randint(1, 10 ** 12)).scaleb(-generator.randint(0, 6))
+        )
+
+    rate_matrix = RateMatrix.from_exchange_rates(exchange_rates)
+    _, conversion_results, _ = rate_matrix.convert(amounts, currency_pairs)
+
+    for amount, currency_pair, conversion_result in zip(
+        amounts, currency_pairs, conversion_results
+    ):
+        base_currency, quote_currency = currency_pair
+        expected_result = calculate_conversion(
+            amount, exchange_rates[base_currency][quote_currency].rate
+        )
+        assert abs(as_decimal(conversion_result) - expected_result) <= (
+            expected_result * Decimal("1e-14")
+        )
@@ -0,0 +1,31 @@
+from typing import Optional
+
+import pytest
+
+from currency_converter_service.responses import as_etag, etag_matches
+
+ETAG = as_etag("generation", "USD", "RUB", "65")
+
+
+def test_etag_identifies_values() -> None:
+    assert ETAG == as_etag("generation", "USD", "RUB", "65")
+    assert ETAG != as_etag("generation", "USD", "RUB", "66")
+    assert ETAG.startswith('"') and ETAG.endswith('"')
+
+
+@pytest.mark.parametrize(
+    "if_none_match, matches",
+    [
+        (None, False),
+        ("", False),
+        (ETAG, True),
+        (f"W/{ETAG}", True),
+        (f'"other", {ETAG}', True),
+        ('"other"', False),
+        ("*", True),
+    ],
+)
+def test_etag_matches_if_none_match(
+    if_none_match: Optional[str], matches: bool
+) -> None:
+    assert etag_matches(if_none_match, ETAG) == matches
@@ -1,12 +1,46 @@
+import asyncio
+import importlib
 import json
+from time import time
+from typing import Any, Dict
 
 import pytest
+from _pytest.monkeypatch import MonkeyPatch
 from aioredis import Redis
 from async_asgi_testclient import TestClient
-from starlette.status import HTTP_200_OK, HTTP_201_CREATED
+from prometheus_client import REGISTRY
+from starlette.status import (
+    HTTP_200_OK,
+    HTTP_201_CREATED,
+    HTTP_202_ACCEPTED,
+    HTTP_304_NOT_MODIFIED,
+    HTTP_400_BAD_REQUEST,
+    HTTP_404_NOT_FOUND,
+    HTTP_422_UNPROCESSABLE_ENTITY,
+    HTTP_429_TOO_MANY_REQUESTS,
+    HTTP_503_SERVICE_UNAVAILABLE,
+)
 
+from currency_converter_service import config, main, responses
+from currency_converter_service.admission import AdmissionLimiter
+from currency_converter_service.currency_converter import ConversionEngine, Rounding
 from currency_converter_service.main import app
 
+LOAD_JOB_POLLS = 500
+
+
+async def wait_for_load_job(client: TestClient, job: Dict[str, Any]) -> Dict[str, Any]:
+    """Poll queued load job until it is applied."""
+    for _ in range(LOAD_JOB_POLLS):
+        if job["status"] not in ("QUEUED", "RUNNING"):
+            break
+
+        await asyncio.sleep(0.01)
+        response = await client.get(f"/database/jobs/{job['job_id']}")
+        job = response.json()
+
+    return job
+
 
 @pytest.mark.asyncio
 async def test_client_receives_currency_conversion(database: Redis) -> None:
@@ -28,12 +62,253 @@ async def test_client_receives_currency_conversion(database: Redis) -> None:
         "amount": "65",
         "rate": "79.7112",
         "conversion_result": "5181.2280",
+        "path": ["USD", "RUB"],
+    }
+
+    assert response.status_code == HTTP_200_OK
+    assert response.json() == expected_response
+
+
+@pytest.mark.asyncio
+async def test_client_receives_unknown_currency_error(database: Redis) -> None:
+    async with TestClient(app) as client:
+        response = await client.get(
+            "/convert",
+            query_string={"from_currency": "USD", "to_currency": "XXX", "amount": "65"},
+        )
+
+    assert response.status_code == HTTP_422_UNPROCESSABLE_ENTITY
+    (error,) = response.json()["detail"]
+    assert error["loc"] == ["query", "to_currency"]
+    assert error["type"] == "type_error.enum"
+    assert error["msg"].startswith(
+        "value is not a valid enumeration member; permitted: 'AED', 'AFN'"
+    )
+
+
+@pytest.mark.parametrize("orjson_available", [True, False])
+@pytest.mark.asyncio
+async def test_fast_response_keeps_wire_format(
+    database: Redis, monkeypatch: MonkeyPatch, orjson_available: bool
+) -> None:
+    if not orjson_available:
+        monkeypatch.setattr(responses, "orjson", None)
+
+    await database.hmset_dict(
+        "exchange-rates:USD",
+        {"RUB": json.dumps({"rate": "79.7112", "last_updated": 1553178002})},
+    )
+    query_string = {"from_currency": "USD", "to_currency": "RUB", "amount": "6.5E+1"}
+
+    async with TestClient(app) as client:
+        monkeypatch.setattr(main, "FAST_RESPONSES_ENABLED", True)
+        fast_response = await client.get("/convert", query_string=query_string)
+        monkeypatch.setattr(main, "FAST_RESPONSES_ENABLED", False)
+        response = await client.get("/convert", query_string=query_string)
+
+    assert fast_response.status_code == response.status_code == HTTP_200_OK
+    assert fast_response.headers["content-type"] == response.headers["content-type"]
+    assert fast_response.content == response.content
+
+
+@pytest.mark.asyncio
+async def test_client_receives_not_modified_conversion_of_same_generation(
+    database: Redis, monkeypatch: MonkeyPatch
+) -> None:
+    def load_request(rate: str) -> Dict[str, Any]:
+        return {
+            "currency_exchange_rates": [
+                {
+                    "base": "USD",
+                    "quotes": {"RUB": {"rate": rate, "last_updated": 1584989828}},
+                },
+            ]
+        }
+
+    query_string = {"from_currency": "USD", "to_currency": "RUB", "amount": "65"}
+
+    async with TestClient(app) as client:
+        load_response = await client.post(
+            "/database", query_string={"merge": "1"}, json=load_request("79.75")
+        )
+        await wait_for_load_job(client, load_response.json())
+        response = await client.get("/convert", query_string=query_string)
+        etag = response.headers["ETag"]
+
+        async def fetch_exchange_rate(*args: Any, **kwargs: Any) -> None:
+            raise AssertionError("Exchange rate should not be fetched")
+
+        with monkeypatch.context() as patch:
+            patch.setattr(
+                main.currency_exchange_rates_storage,
+                "fetch_exchange_rate",
+                fetch_exchange_rate,
+            )
+            not_modified_response = await client.get(
+                "/convert",
+                query_string=query_string,
+                headers={"If-None-Match": f'"other", W/{etag}'},
+            )
+
+        other_amount_response = await client.get(
+            "/convert",
+            query_string={**query_string, "amount": "66"},
+            headers={"If-None-Match": etag},
+        )
+        load_response = await client.post(
+            "/database", query_string={"merge": "1"}, json=load_request("80.5")
+        )
+        await wait_for_load_job(client, load_response.json())
+        reloaded_response = await client.get(
+            "/convert", query_string=query_string, headers={"If-None-Match": etag},
+        )
+
+    assert response.status_code == HTTP_200_OK
+    assert response.headers["Cache-Control"] == "max-age=0"
+    assert not_modified_response.status_code == HTTP_304_NOT_MODIFIED
+    assert not_modified_response.headers["ETag"] == etag
+    assert not_modified_response.content == b""
+    assert other_amount_response.status_code == HTTP_200_OK
+    assert other_amount_response.headers["ETag"] != etag
+    assert reloaded_response.status_code == HTTP_200_OK
+    assert reloaded_response.headers["ETag"] != etag
+    assert reloaded_response.json()["rate"] == "80.5"
+
+
+@pytest.mark.asyncio
+async def test_client_receives_not_modified_conversion_of_same_rate(
+    database: Redis, monkeypatch: MonkeyPatch
+) -> None:
+    monkeypatch.setattr(main, "FAST_RESPONSES_ENABLED", False)
+    monkeypatch.setattr(main, "HTTP_CACHE_MAX_AGE", 60)
+    await database.hmset_dict(
+        "exchange-rates:USD",
+        {"RUB": json.dumps({"rate": "79.7112", "last_updated": 1553178002})},
+    )
+    query_string = {"from_currency": "USD", "to_currency": "RUB", "amount": "65"}
+
+    async with TestClient(app) as client:
+        response = await client.get("/convert", query_string=query_string)
+        not_modified_response = await client.get(
+            "/convert",
+            query_string=query_string,
+            headers={"If-None-Match": response.headers["ETag"]},
+        )
+
+    assert response.status_code == HTTP_200_OK
+    assert response.headers["Cache-Control"] == "max-age=60"
+    assert not_modified_response.status_code == HTTP_304_NOT_MODIFIED
+
+
+@pytest.mark.asyncio
+async def test_client_receives_cross_rate_conversion(database: Redis) -> None:
+    await database.hmset_dict(
+        "exchange-rates:USD",
+        {"EUR": json.dumps({"rate": "0.92", "last_updated": 1553178002})},
+    )
+    await database.hmset_dict(
+        "exchange-rates:EUR",
+        {"RUB": json.dumps({"rate": "86.5", "last_updated": 1553170000})},
+    )
+
+    async with TestClient(app) as client:
+        response = await client.get(
+            "/convert",
+            query_string={"from_currency": "USD", "to_currency": "RUB", "amount": "10"},
+        )
+
+    expected_response = {
+        "last_updated": 1553170000,
+        "from_currency": "USD",
+        "to_currency": "RUB",
+        "amount": "10",
+        "rate": "79.580",
+        "conversion_result": "795.800",
+        "path": ["USD", "EUR", "RUB"],
     }
 
     assert response.status_code == HTTP_200_OK
     assert response.json() == expected_response
 
 
+@pytest.mark.asyncio
+async def test_client_receives_currency_conversion_to_quotes(database: Redis) -> None:
+    await database.hmset_dict(
+        "exchange-rates:USD",
+        {
+            "RUB": json.dumps({"rate": "79.7112", "last_updated": 1553178002}),
+            "EUR": json.dumps({"rate": "0.920839", "last_updated": 1553178002}),
+        },
+    )
+    await database.hmset_dict(
+        "exchange-rates:EUR",
+        {"GBP": json.dumps({"rate": "0.9", "last_updated": 1553170000})},
+    )
+
+    async with TestClient(app) as client:
+        all_quotes_response = await client.get(
+            "/convert/quotes", query_string={"from_currency": "USD", "amount": "10"}
+        )
+        quotes_response = await client.get(
+            "/convert/quotes",
+            query_string=[
+                ("from_currency", "USD"),
+                ("amount", "10"),
+                ("to_currency", "GBP"),
+                ("to_currency", "RUB"),
+            ],
+        )
+        missing_quotes_response = await client.get(
+            "/convert/quotes",
+            query_string=[
+                ("from_currency", "USD"),
+                ("amount", "10"),
+                ("to_currency", "AED"),
+            ],
+        )
+
+    usd_rub_conversion = {
+        "last_updated": 1553178002,
+        "from_currency": "USD",
+        "to_currency": "RUB",
+        "amount": "10",
+        "rate": "79.7112",
+        "conversion_result": "797.1120",
+        "path": ["USD", "RUB"],
+    }
+    usd_eur_conversion = {
+        "last_updated": 1553178002,
+        "from_currency": "USD",
+        "to_currency": "EUR",
+        "amount": "10",
+        "rate": "0.920839",
+        "conversion_result": "9.208390",
+        "path": ["USD", "EUR"],
+    }
+    usd_gbp_conversion = {
+        "last_updated": 1553170000,
+        "from_currency": "USD",
+        "to_currency": "GBP",
+        "amount": "10",
+        "rate": "0.8287551",
+        "conversion_result": "8.2875510",
+        "path": ["USD", "EUR", "GBP"],
+    }
+
+    assert all_quotes_response.status_code == HTTP_200_OK
+    assert all_quotes_response.json() == {
+        "conversions": [usd_eur_conversion, usd_rub_conversion]
+    }
+    assert quotes_response.status_code == HTTP_200_OK
+    assert quotes_response.json() == {
+        "conversions": [usd_gbp_conversion, usd_rub_conversion]
+    }
+    assert missing_quotes_response.status_code == HTTP_404_NOT_FOUND
+    assert missing_quotes_response.json() == {
+        "detail": "No exchange rates for USD/AED currencies"
+    }
+
+
 @pytest.mark.asyncio
 async def test_client_loads_exchange_rates(database: Redis) -> None:
     async with TestClient(app) as client:
@@ -51,6 +326,7 @@ async def test_client_loads_exchange_rates(database: Redis) -> None:
                 ]
             },
         )
+        job = await wait_for_load_job(client, response.json())
 
     expected_usd_exchange_rates = {
         "RUB": json.dumps({"rate": "79.75", "last_updated": 1584989828}),
@@ -58,7 +334,8 @@ async def test_client_loads_exchange_rates(database: Redis) -> None:
 
     usd_exchange_rates = await database.hgetall("exchange-rates:USD")
     assert usd_exchange_rates == expected_usd_exchange_rates
-    assert response.status_code == HTTP_201_CREATED
+    assert response.status_code == HTTP_202_ACCEPTED
+    assert job["status"] == "SUCCESS"
 
 
 @pytest.mark.asyncio
@@ -86,6 +363,7 @@ async def test_client_merges_exchange_rates(database: Redis) -> None:
                 ]
             },
         )
+        job = await wait_for_load_job(client, response.json())
 
     usd_exchange_rates = await database.hgetall("exchange-rates:USD")
 
@@ -95,4 +373,508 @@ async def test_client_merges_exchange_rates(database: Redis) -> None:
     }
 
     assert usd_exchange_rates == expected_usd_exchange_rates
+    assert response.status_code == HTTP_202_ACCEPTED
+    assert job["status"] == "SUCCESS"
+
+
+@pytest.mark.asyncio
+async def test_client_delta_loads_exchange_rates(database: Redis) -> None:
+    await database.hmset_dict(
+        "exchange-rates:USD",
+        {
+            "RUB": json.dumps({"rate": "79.75", "last_updated": 1584989828}),
+            "EUR": json.dumps({"rate": "0.920839", "last_updated": 1553178002}),
+        },
+    )
+
+    async with TestClient(app) as client:
+        response = await client.post(
+            "/database",
+            query_string={"merge": "1", "delta": "1"},
+            json={
+                "currency_exchange_rates": [
+                    {
+                        "base": "USD",
+                        "quotes": {
+                            "RUB": {"rate": "79.7112", "last_updated": 1553178002},
+                            "EUR": {"rate": "0.9", "last_updated": 1584989828},
+                        },
+                    },
+                ]
+            },
+        )
+        job = await wait_for_load_job(client, response.json())
+
+    usd_exchange_rates = await database.hgetall("exchange-rates:USD")
+
+    expected_usd_exchange_rates = {
+        "RUB": json.dumps({"rate": "79.75", "last_updated": 1584989828}),
+        "EUR": json.dumps({"rate": "0.9", "last_updated": 1584989828}),
+    }
+    expected_job = {
+        "job_id": response.json()["job_id"],
+        "status": "SUCCESS",
+        "merge": True,
+        "delta": True,
+        "rates_count": 2,
+        "applied": 1,
+        "skipped": 1,
+    }
+
+    assert usd_exchange_rates == expected_usd_exchange_rates
+    assert response.status_code == HTTP_202_ACCEPTED
+    assert job == expected_job
+
+
+@pytest.mark.asyncio
+async def test_client_receives_error_fetching_unknown_load_job(database: Redis) -> None:
+    async with TestClient(app) as client:
+        response = await client.get("/database/jobs/unknown")
+
+    assert response.status_code == HTTP_404_NOT_FOUND
+    assert response.json() == {"detail": "Unknown load job"}
+
+
+@pytest.mark.asyncio
+async def test_client_receives_error_while_load_queue_is_full(
+    database: Redis, monkeypatch: MonkeyPatch
+) -> None:
+    monkeypatch.setattr(main, "LOAD_QUEUE_MAX_SIZE", 1)
+    load_request = {"currency_exchange_rates": []}
+
+    async with TestClient(app) as client:
+        main.ingestion_worker.cancel()
+        first_response = await client.post(
+            "/database", query_string={"merge": "1"}, json=load_request
+        )
+        second_response = await client.post(
+            "/database", query_string={"merge": "1"}, json=load_request
+        )
+
+    assert first_response.status_code == HTTP_202_ACCEPTED
+    assert second_response.status_code == HTTP_429_TOO_MANY_REQUESTS
+    assert second_response.headers["Retry-After"] == "1"
+
+
+@pytest.mark.asyncio
+async def test_client_receives_error_delta_loading_replacing_rates(
+    database: Redis,
+) -> None:
+    async with TestClient(app) as client:
+        response = await client.post(
+            "/database",
+            query_string={"merge": "0", "delta": "1"},
+            json={"currency_exchange_rates": []},
+        )
+
+    assert response.status_code == HTTP_400_BAD_REQUEST
+    assert response.json() == {"detail": "Delta loads can only merge exchange rates"}
+
+
+@pytest.mark.asyncio
+async def test_client_receives_batch_currency_conversion(database: Redis) -> None:
+    await database.hmset_dict(
+        "exchange-rates:USD",
+        {
+            "RUB": json.dumps({"rate": "79.7112", "last_updated": 1553178002}),
+            "EUR": json.dumps({"rate": "0.920839", "last_updated": 1553178002}),
+        },
+    )
+
+    async with TestClient(app) as client:
+        response = await client.post(
+            "/convert/batch",
+            json={
+                "conversions": [
+                    {"from_currency": "USD", "to_currency": "RUB", "amount": "65"},
+                    {"from_currency": "USD", "to_currency": "EUR", "amount": "10"},
+                ]
+            },
+        )
+
+    expected_response = {
+        "conversions": [
+            {
+                "last_updated": 1553178002,
+                "from_currency": "USD",
+                "to_currency": "RUB",
+                "amount": "65",
+                "rate": "79.7112",
+                "conversion_result": "5181.2280",
+                "path": ["USD", "RUB"],
+            },
+            {
+                "last_updated": 1553178002,
+                "from_currency": "USD",
+                "to_currency": "EUR",
+                "amount": "10",
+                "rate": "0.920839",
+                "conversion_result": "9.208390",
+                "path": ["USD", "EUR"],
+            },
+        ]
+    }
+
+    assert response.status_code == HTTP_200_OK
+    assert response.json() == expected_response
+
+
+@pytest.mark.asyncio
+async def test_client_receives_rate_matrix_batch_currency_conversion(
+    database: Redis, monkeypatch: MonkeyPatch
+) -> None:
+    pytest.importorskip("numpy")
+    monkeypatch.setattr(main, "CONVERSION_ENGINE", ConversionEngine.MATRIX)
+    await database.hmset_dict(
+        "exchange-rates:USD",
+        {"EUR": json.dumps({"rate": "0.92", "last_updated": 1553178002})},
+    )
+    await database.hmset_dict(
+        "exchange-rates:EUR",
+        {"RUB": json.dumps({"rate": "86.5", "last_updated": 1553170000})},
+    )
+
+    async with TestClient(app) as client:
+        response = await client.post(
+            "/convert/batch",
+            json={
+                "conversions": [
+                    {"from_currency": "USD", "to_currency": "EUR", "amount": "65"},
+                    {"from_currency": "USD", "to_currency": "RUB", "amount": "10"},
+                ]
+            },
+        )
+
+    expected_response = {
+        "conversions": [
+            {
+                "last_updated": 1553178002,
+                "from_currency": "USD",
+                "to_currency": "EUR",
+                "amount": "65",
+                "rate": "0.92",
+                "conversion_result": "59.8",
+                "path": ["USD", "EUR"],
+            },
+            {
+                "last_updated": 1553170000,
+                "from_currency": "USD",
+                "to_currency": "RUB",
+                "amount": "10",
+                "rate": "79.58",
+                "conversion_result": "795.8",
+                "path": ["USD", "EUR", "RUB"],
+            },
+        ]
+    }
+
+    assert response.status_code == HTTP_200_OK
+    assert response.json() == expected_response
+
+
+@pytest.mark.asyncio
+async def test_client_receives_fixed_point_conversion_in_minor_units(
+    database: Redis, monkeypatch: MonkeyPatch
+) -> None:
+    monkeypatch.setattr(main, "CONVERSION_ENGINE", ConversionEngine.FIXED_POINT)
+    monkeypatch.setattr(main, "CONVERSION_ROUNDING", Rounding.UP)
+    await database.hmset_dict(
+        "exchange-rates:USD",
+        {
+            "JPY": json.dumps({"rate": "107.855", "last_updated": 1553178002}),
+            "RUB": json.dumps({"rate": "79.7112", "last_updated": 1553178002}),
+        },
+    )
+
+    async with TestClient(app) as client:
+        response = await client.post(
+            "/convert/batch",
+            json={
+                "conversions": [
+                    {"from_currency": "USD", "to_currency": "JPY", "amount": "65.37"},
+                    {"from_currency": "USD", "to_currency": "RUB", "amount": "65.37"},
+                ]
+            },
+        )
+        out_of_range_response = await client.get(
+            "/convert",
+            query_string={
+                "from_currency": "USD",
+                "to_currency": "RUB",
+                "amount": "1E+30",
+            },
+        )
+
+    conversion_results = [
+        conversion["conversion_result"] for conversion in response.json()["conversions"]
+    ]
+
+    assert response.status_code == HTTP_200_OK
+    assert conversion_results == ["7051", "5210.73"]
+    assert out_of_range_response.status_code == HTTP_400_BAD_REQUEST
+    assert out_of_range_response.json() == {
+        "detail": "Conversion result is out of range"
+    }
+
+
+@pytest.mark.asyncio
+async def test_client_receives_missing_batch_exchange_rates(database: Redis) -> None:
+    async with TestClient(app) as client:
+        response = await client.post(
+            "/convert/batch",
+            json={
+                "conversions": [
+                    {"from_currency": "USD", "to_currency": "RUB", "amount": "65"}
+                ]
+            },
+        )
+
+    assert response.status_code == HTTP_404_NOT_FOUND
+    assert response.json() == {"detail": "No exchange rates for USD/RUB currencies"}
+
+
+@pytest.mark.asyncio
+async def test_client_streams_exchange_rates(database: Redis) -> None:
+    await database.hmset_dict(
+        "exchange-rates:EUR",
+        {"RUB": json.dumps({"rate": "86.5", "last_updated": 1553178002})},
+    )
+
+    lines = [
+        {
+            "base": "USD",
+            "quotes": {
+                "RUB": {"rate": "79.75", "last_updated": 1584989828},
+                "EUR": {"rate": "0.920839", "last_updated": 1584989828},
+            },
+        },
+        {
+            "base": "RUB",
+            "quotes": {"USD": {"rate": "0.013", "last_updated": 1584989897}},
+        },
+    ]
+    async with TestClient(app) as client:
+        response = await client.post(
+            "/database/stream",
+            query_string={"merge": "0"},
+            data="\n".join(json.dumps(line) for line in lines).encode(),
+        )
+
     assert response.status_code == HTTP_201_CREATED
+    assert await database.hgetall("exchange-rates:USD") == {
+        "RUB": json.dumps({"rate": "79.75", "last_updated": 1584989828}),
+        "EUR": json.dumps({"rate": "0.920839", "last_updated": 1584989828}),
+    }
+    assert await database.hgetall("exchange-rates:RUB") == {
+        "USD": json.dumps({"rate": "0.013", "last_updated": 1584989897})
+    }
+    assert await database.hgetall("exchange-rates:EUR") == {}
+
+
+@pytest.mark.asyncio
+async def test_client_receives_streamed_line_validation_error(database: Redis) -> None:
+    lines = [
+        {"base": "USD", "quotes": {"RUB": {"rate": "79.75", "last_updated": 1}}},
+        {"base": "USD", "quotes": {"RUB": {"rate": "79.75"}}},
+    ]
+    async with TestClient(app) as client:
+        response = await client.post(
+            "/database/stream",
+            query_string={"merge": "1"},
+            data="\n".join(json.dumps(line) for line in lines).encode(),
+        )
+
+    assert response.status_code == HTTP_422_UNPROCESSABLE_ENTITY
+    assert response.json()["detail"][0]["loc"] == [
+        "body",
+        2,
+        "quotes",
+        "RUB",
+        "last_updated",
+    ]
+
+
+@pytest.mark.asyncio
+async def test_client_receives_metrics(database: Redis) -> None:
+    await database.hmset_dict(
+        "exchange-rates:USD",
+        {"RUB": json.dumps({"rate": "79.7112", "last_updated": 1553178002})},
+    )
+    route_labels = {"method": "GET", "route": "/convert", "status": "200"}
+    requests_before = (
+        REGISTRY.get_sample_value("http_request_duration_seconds_count", route_labels)
+        or 0
+    )
+
+    async with TestClient(app) as client:
+        await client.get(
+            "/convert",
+            query_string={"from_currency": "USD", "to_currency": "RUB", "amount": "65"},
+        )
+        response = await client.get("/metrics")
+
+    assert response.status_code == HTTP_200_OK
+    assert "exchange_rates_cache_requests_total" in response.text
+    assert "redis_pool_connections" in response.text
+    assert (
+        REGISTRY.get_sample_value("http_request_duration_seconds_count", route_labels)
+        == requests_before + 1
+    )
+
+
+@pytest.mark.asyncio
+async def test_client_fails_fast_while_database_is_unavailable(database: Redis) -> None:
+    async with TestClient(app) as client:
+        for _ in range(main.DATABASE_FAILURE_THRESHOLD):
+            main.circuit_breaker.record_failure()
+
+        response = await client.get(
+            "/convert",
+            query_string={"from_currency": "USD", "to_currency": "RUB", "amount": "65"},
+        )
+
+    assert response.status_code == HTTP_503_SERVICE_UNAVAILABLE
+    assert int(response.headers["Retry-After"]) > 0
+
+
+@pytest.mark.asyncio
+async def test_client_receives_too_many_requests_while_route_is_saturated(
+    database: Redis, monkeypatch: MonkeyPatch
+) -> None:
+    limiter = AdmissionLimiter(max_in_flight=1, max_waiting=0, max_wait=1.0)
+    monkeypatch.setitem(main.admission_limiters, "/convert", limiter)
+    await database.hmset_dict(
+        "exchange-rates:USD",
+        {"RUB": json.dumps({"rate": "79.7112", "last_updated": 1553178002})},
+    )
+    query_string = {"from_currency": "USD", "to_currency": "RUB", "amount": "65"}
+
+    async with TestClient(app) as client:
+        await limiter.acquire()
+        rejected_response = await client.get("/convert", query_string=query_string)
+        quotes_response = await client.get(
+            "/convert/quotes", query_string={"from_currency": "USD", "amount": "65"}
+        )
+        limiter.release()
+        response = await client.get("/convert", query_string=query_string)
+
+    assert rejected_response.status_code == HTTP_429_TOO_MANY_REQUESTS
+    assert rejected_response.headers["Retry-After"] == "1"
+    assert quotes_response.status_code == HTTP_200_OK
+    assert response.status_code == HTTP_200_OK
+    assert limiter.in_flight == 0
+
+
+@pytest.mark.asyncio
+async def test_client_receives_historical_currency_conversion(
+    database: Redis, monkeypatch: MonkeyPatch
+) -> None:
+    monkeypatch.setattr(main, "HISTORY_ENABLED", True)
+    now = int(time())
+    lines = [
+        {"base": "USD", "quotes": {"RUB": {"rate": "70", "last_updated": now - 60}}},
+        {"base": "USD", "quotes": {"RUB": {"rate": "80", "last_updated": now}}},
+    ]
+    query_string = {"from_currency": "USD", "to_currency": "RUB", "amount": "2"}
+
+    async with TestClient(app) as client:
+        import_response = await client.post(
+            "/history", data="\n".join(json.dumps(line) for line in lines).encode()
+        )
+        historical_response = await client.get(
+            "/convert", query_string={**query_string, "at": str(now - 1)}
+        )
+        missing_response = await client.get(
+            "/convert", query_string={**query_string, "at": str(now - 3600)}
+        )
+        current_response = await client.get("/convert", query_string=query_string)
+
+    assert import_response.status_code == HTTP_201_CREATED
+    assert historical_response.json()["conversion_result"] == "140"
+    assert historical_response.json()["last_updated"] == now - 60
+    assert missing_response.status_code == HTTP_404_NOT_FOUND
+    assert current_response.status_code == HTTP_404_NOT_FOUND
+
+
+@pytest.mark.asyncio
+async def test_client_receives_error_converting_at_timestamp_without_history(
+    database: Redis,
+) -> None:
+    async with TestClient(app) as client:
+        response = await client.get(
+            "/convert",
+            query_string={
+                "from_currency": "USD",
+                "to_currency": "RUB",
+                "amount": "2",
+                "at": "1553178002",
+            },
+        )
+
+    assert response.status_code == HTTP_400_BAD_REQUEST
+    assert response.json() == {"detail": "Exchange rates history is disabled"}
+
+
+@pytest.mark.asyncio
+async def test_client_receives_converted_csv(database: Redis) -> None:
+    await database.hmset_dict(
+        "exchange-rates:USD",
+        {"EUR": json.dumps({"rate": "0.92", "last_updated": 1553178002})},
+    )
+    await database.hmset_dict(
+        "exchange-rates:EUR",
+        {"RUB": json.dumps({"rate": "86.5", "last_updated": 1553178000})},
+    )
+
+    async with TestClient(app) as client:
+        response = await client.post(
+            "/convert/csv",
+            data=b"amount,from_currency,to_currency\n10,USD,EUR\n1,USD,RUB\n",
+        )
+
+    assert response.status_code == HTTP_200_OK
+    assert response.headers["content-type"].startswith("text/csv")
+    assert response.text.splitlines() == [
+        "amount,from_currency,to_currency,rate,conversion_result,last_updated,error",
+        "10,USD,EUR,0.92,9.20,1553178002,",
+        "1,USD,RUB,79.580,79.580,1553178000,",
+    ]
+
+
+@pytest.mark.asyncio
+async def test_client_receives_rates_warmed_up_on_startup(database: Redis) -> None:
+    await database.hmset_dict(
+        "exchange-rates:USD",
+        {"RUB": json.dumps({"rate": "79.7112", "last_updated": 1553178002})},
+    )
+
+    async with TestClient(app) as client:
+        await main.rates_cache_warmer
+        await database.delete("exchange-rates:USD")
+
+        response = await client.get(
+            "/convert",
+            query_string={"from_currency": "USD", "to_currency": "RUB", "amount": "65"},
+        )
+
+    assert response.status_code == HTTP_200_OK
+    assert response.json()["conversion_result"] == "5181.2280"
+
+
+@pytest.mark.asyncio
+async def test_client_receives_not_found_while_docs_are_disabled(
+    monkeypatch: MonkeyPatch,
+) -> None:
+    monkeypatch.setattr(config, "DOCS_ENABLED", False)
+    try:
+        client = TestClient(importlib.reload(main).app)
+        docs_responses = [
+            await client.get(path) for path in ("/", "/docs", "/redoc", "/openapi.json")
+        ]
+    finally:
+        monkeypatch.undo()
+        importlib.reload(main)
+
+    assert all(
+        response.status_code == HTTP_404_NOT_FOUND for response in docs_responses
+    )